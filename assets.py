@@ -0,0 +1,139 @@
+# Include all necessary tools.
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+# https://pythonhosted.org/SuperWires/index.html
+from superwires import games
+
+
+class Asset(object):
+    """Handle of an image or a sound. Decoded in the background,
+    the actual object is handed out by get()."""
+
+    IMAGE = "image"
+    SOUND = "sound"
+
+    def __init__(self, loader, kind, filename, transparent=True):
+        self.loader = loader
+        self.kind = kind
+        self.filename = filename
+        self.transparent = transparent
+
+        self._future = None
+        self._value = None
+
+    def __repr__(self):
+        return f"Asset({self.kind}, {self.filename!r})"
+
+    # Runs on a worker thread -- pure decoding, no display access.
+    def _decode(self):
+        if self.kind == Asset.IMAGE:
+            return pygame.image.load(self.filename)
+        return pygame.mixer.Sound(self.filename)
+
+    # Runs on the main thread -- the same finishing touches games.load_image() applies.
+    # (Sprites are made on the simulation thread with a SimulationThread, so
+    # everything is finished by wait() before that one starts.)
+    def _finish(self, value):
+        if self.kind == Asset.IMAGE:
+            if not games.screen.virtual:
+                value = value.convert()
+            if self.transparent:
+                colorkey = value.get_at((0, 0))
+                value.set_colorkey(colorkey, pygame.RLEACCEL)
+        return value
+
+    def submit(self, executor):
+        self._future = executor.submit(self._decode)
+        self._future.add_done_callback(self.loader._decoded)
+
+    def ready(self):
+        """Tell if get() would return without waiting for the disk."""
+        return self._value is not None or (self._future is not None and self._future.done())
+
+    def get(self):
+        """Return the loaded object. Blocks only if it isn't decoded yet."""
+        if self._value is None:
+            if self._future is None:
+                # Nobody started the loader -- just load it right now.
+                raw = self._decode()
+            elif self._future.done():
+                raw = self._future.result()
+            else:
+                start = time.perf_counter()
+                raw = self._future.result()
+                self.loader.blocked_time += time.perf_counter() - start
+                self.loader.blocked_assets += 1
+            self._value = self._finish(raw)
+
+        return self._value
+
+
+class AssetLoader(object):
+    """Registry of game assets decoded by a pool of worker threads."""
+
+    WORKERS = 4
+
+    def __init__(self):
+        self.assets = []
+        self.executor = None
+        self.lock = threading.Lock()
+
+        self.decoded = 0
+        self.started = None
+        self.finished = None
+
+        # Time the main thread spent waiting for assets not decoded yet.
+        self.blocked_time = 0.0
+        self.blocked_assets = 0
+
+    def _register(self, asset):
+        self.assets.append(asset)
+        if self.executor:
+            asset.submit(self.executor)
+        return asset
+
+    def image(self, filename, transparent=True):
+        return self._register(Asset(self, Asset.IMAGE, filename, transparent))
+
+    def sound(self, filename):
+        return self._register(Asset(self, Asset.SOUND, filename))
+
+    def start(self, workers=None):
+        """Begin decoding all registered assets in the background."""
+        if self.executor:
+            return
+
+        self.started = time.perf_counter()
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers or AssetLoader.WORKERS,
+            thread_name_prefix="asset-loader"
+        )
+        for asset in self.assets:
+            asset.submit(self.executor)
+
+    # Worker callback -- keeps the progress count.
+    def _decoded(self, future):
+        with self.lock:
+            self.decoded += 1
+            if self.decoded == len(self.assets):
+                self.finished = time.perf_counter()
+
+    def progress(self):
+        """Return (decoded, total) asset count."""
+        return self.decoded, len(self.assets)
+
+    def done(self):
+        """Tell if every asset is decoded."""
+        return self.decoded >= len(self.assets)
+
+    def wait(self):
+        """Block until every asset is loaded."""
+        for asset in self.assets:
+            asset.get()
+
+    def shutdown(self):
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
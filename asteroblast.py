@@ -1,10 +1,43 @@
 # Include all necessary tools.
-import math
+import argparse
+import collections
+import logging
+import os
 import random
+import time
 # https://pythonhosted.org/SuperWires/index.html
+import pygame
 from superwires import games, color
 from time import sleep
 
+from assets import AssetLoader
+from autopilot import Autopilot
+from collision import SweptCollider
+from controls import InputLatency, InputSnapshot
+from damage import DamageResolver
+from events import (EventBus, DEBRIS_DESTROYED, EXPLOSION, LEVEL_CLEARED, LEVEL_STARTED,
+                    SHIP_DESTROYED, SHOT_FIRED, THRUST)
+from kinematics import ahead, heading
+from pacing import FramePacer
+from particles import ParticleEffect, ParticleSystem
+from prefetch import Prefetcher
+from profiler import HitchProfiler
+from quality import QualityGovernor
+from recorder import FrameRecorder
+from render import BatchRenderer, SharedRotation
+from results import ResultsStore
+from scheduler import FrameScheduler
+from sessions import SessionRecorder
+from simthread import SimulationThread
+from spatial import SpatialGrid
+
+# Servers and batch tools run without a display or a sound card --
+# point SDL at its dummy drivers before the window gets created.
+HEADLESS = bool(os.environ.get("ASTEROBLAST_HEADLESS"))
+if HEADLESS:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
 # Create window and get access to games instructions subset.
 games.init(
     screen_width=800,
@@ -18,17 +51,234 @@ WINDOW_HEIGHT = games.screen.height
 SCREEN_WIDTH_CENTER = WINDOW_WIDTH/2
 SCREEN_HEIGHT_CENTER = WINDOW_HEIGHT/2
 
+# Wall clock reference for the startup timings.
+STARTED = time.perf_counter()
+
 # Useful global assets.
+# Intro screen needs these two right away, the rest is
+# registered with ASSETS and decoded in the background.
 DUMMY_PXL = games.load_image('./assets/graphics/dummy-pixel.png')
 ORBIT_BACKGROUND = games.load_image(
     filename="./assets/graphics/orbit.png",
     transparent=False
 )
 
+ASSETS = AssetLoader()
+
+# Batched layer for exhaust, explosions and similar eye candy.
+PARTICLES = ParticleSystem()
+
+log = logging.getLogger("asteroblast")
+
+
+class GameLoop(object):
+    """The main loop. Does what games.screen.mainloop() does, frame by frame,
+    and lets other subsystems hook in after each simulated and presented frame.
+
+    A frame is made of pump_events(), simulate() and present(); step() runs
+    them in a row, a SimulationThread (see simthread module) runs simulate()
+    on a thread of its own.
+    """
+
+    def __init__(self, screen, pacer, keyboard, damage, collider=None, renderer=None):
+        self.screen = screen
+        self.pacer = pacer
+        # Local keyboard, read once at the start of every frame.
+        self.keyboard = keyboard
+        # Hits of the frame, applied once all sprites have moved.
+        self.damage = damage
+        # Catches hits the overlap check missed between two frames (None -- overlaps only).
+        self.collider = collider
+        # Draws all sprites at once after they've moved (None -- each sprite draws itself).
+        self.renderer = renderer
+        self.frame = 0
+        self.frame_started = time.perf_counter()
+        # When the running frame's simulation started (off the main thread
+        # with a SimulationThread) and the longest simulation of the frames
+        # presented since the last one, if it ran off the main thread, with
+        # when that one started.
+        self.sim_started = self.frame_started
+        self.sim_time = 0.0
+        self.slow_sim_started = 0.0
+
+        # Callables invoked (without arguments) after every simulated frame --
+        # whatever changes the game world from outside the sprites goes here.
+        self.tick_listeners = []
+        # Callables invoked with the rendered buffer after every presented frame.
+        self.frame_listeners = []
+
+    # Move, draw and update all sprites once and present the result.
+    # Returns False if the game has been quit in the meantime.
+    def step(self):
+        self.frame_started = self.sim_started = time.perf_counter()
+        self.clear()
+        if not self.pump_events():
+            return False
+        if not self.simulate(draw=self.renderer is None):
+            return False
+
+        if self.renderer is not None:
+            self.renderer.draw(self.screen)
+        self.present(self.frame)
+
+        self.frame += 1
+        # Listeners may remove themselves (note_first_frame does).
+        for listener in list(self.frame_listeners):
+            listener(self.screen.buffer)
+
+        return True
+
+    # Seconds the presented frame has cost so far -- simulating it on
+    # another thread counts as much as drawing it here.
+    def frame_elapsed(self):
+        return max(time.perf_counter() - self.frame_started, self.sim_time)
+
+    # Fresh background for the next frame.
+    def clear(self):
+        screen = self.screen
+        screen.old_dirties = screen.new_dirties
+        screen.new_dirties = []
+        screen.buffer.blit(screen._real_background, (0, 0))
+
+    # Handle window events (main thread only). Returns False on window close.
+    def pump_events(self):
+        screen = self.screen
+        latency = self.keyboard.latency
+        if not screen.virtual:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    screen.quit()
+                    return False
+                if event.type == pygame.KEYDOWN and latency is not None:
+                    latency.key_event(event.key)
+        return True
+
+    # Read the keys, move and update all sprites, sweep the fast ones and resolve the hits.
+    # Sprites draw themselves along the way if asked to.
+    def simulate(self, draw=False):
+        screen = self.screen
+        keyboard = self.keyboard
+        keyboard.capture(self.frame)
+        if keyboard.is_pressed(games.K_ESCAPE):
+            screen.quit()
+
+        for sprite in screen.all_objects:
+            if not screen.running:
+                return False
+            if draw:
+                sprite._process_sprite()
+            else:
+                self._simulate(sprite)
+        if not screen.running:
+            return False
+        if self.collider is not None:
+            self.collider.check()
+        self.damage.resolve()
+
+        for listener in self.tick_listeners:
+            listener()
+        return True
+
+    # Put the buffer on the display -- it shows given simulated frame.
+    def present(self, frame):
+        screen = self.screen
+        if not screen.virtual:
+            screen.screen_surf.blit(screen.buffer, (0, 0))
+            pygame.display.update()
+        if self.keyboard.latency is not None:
+            self.keyboard.latency.presented(frame)
+
+    # games.Sprite._process_sprite() without the drawing part.
+    @staticmethod
+    def _simulate(sprite):
+        sprite._check_overlap()
+        sprite._move()
+        sprite.update()
+        sprite.tick_timer -= 1
+        if not sprite.tick_timer:
+            sprite.tick()
+            sprite.tick_timer = sprite._interval
+
+    # Keep the screen running until quit (or given number of frames).
+    # Unthrottled loops serve batch tools -- they go as fast as possible.
+    def run(self, max_frames=None, throttle=True):
+        screen = self.screen
+        screen.running = True
+
+        frames = 0
+        while screen.running:
+            if not self.step():
+                return
+
+            frames += 1
+            if max_frames is not None and frames >= max_frames:
+                return
+
+            if throttle:
+                self.pacer.wait()
+
+
+# Frame rate follows the game state (a headless game has no focus to lose).
+PACER = FramePacer(fps=games.screen.fps, watch_focus=not HEADLESS)
+
+# Whatever the local player steers reads this snapshot rather than games.keyboard.
+KEYBOARD = InputSnapshot(latency=InputLatency())
+
+# Collisions hit, this takes the structure off -- all at once, at the end of each frame.
+DAMAGE = DamageResolver()
+
+# Swept collisions of blasts and crafts against the belt -- no tunnelling through small rocks.
+# The biggest rock's half width plus its top speed stay within a grid cell.
+COLLIDER = SweptCollider(DAMAGE, margin=SpatialGrid.CELL)
+
+LOOP = GameLoop(games.screen, PACER, KEYBOARD, DAMAGE, collider=COLLIDER, renderer=BatchRenderer())
+
+# Garbage collection in frame slack time (once attached to the LOOP).
+SCHEDULER = FrameScheduler(fps=games.screen.fps)
+
+# Sheds eye candy when frames run late (once attached to the LOOP).
+QUALITY = QualityGovernor(fps=games.screen.fps)
+
+# Builds the next level's belt in idle frame time (once attached to the LOOP).
+PREFETCHER = Prefetcher(fps=games.screen.fps)
+
+# Game events -- scoring, audio, HUD and metrics subscribe at the end of this module.
+# Posted events are delivered after each simulated frame.
+EVENTS = EventBus()
+LOOP.tick_listeners.append(EVENTS.flush)
+
+
+class LoadedAnimation(SharedRotation, games.Animation):
+    """games.Animation built from already loaded images.
+    (superwires accepts only file names there and reads them from disk every time.)"""
+
+    def __init__(self, images, angle=0, x=0, y=0, dx=0, dy=0,
+                 repeat_interval=1, n_repeats=0, is_collideable=True):
+        self.images = images
+        games.Sprite.__init__(
+            self,
+            image=images[0],
+            angle=angle,
+            x=x,
+            y=y,
+            dx=dx,
+            dy=dy,
+            interval=repeat_interval,
+            is_collideable=is_collideable
+        )
+
+        # Same repeats bookkeeping as in games.Animation -- 0 means forever.
+        self.n_repeats = n_repeats
+        if not self.n_repeats:
+            self.n_repeats -= 1
+        self.pos = 0
+
 
 class ScreenWrapper(games.Sprite):
     """The screen "wrapper"."""
 
+    structure = 1  # Hits it takes to die (see DamageResolver).
+
     # If the object gets beyond given edge of the screen,
     # transfer it to the opposite side...
     def update(self):
@@ -56,120 +306,89 @@ class ScreenWrapper(games.Sprite):
 class Bumper(ScreenWrapper):
     """Collision detection system."""
 
+    grid = None  # Belt index to sweep the path of every frame against (see SweptCollider).
+
     # Load assets.
     # All credit goes to:
     # https://freesound.org/people/timgormly/sounds/170144/
-    SOUND = games.load_sound('./assets/sounds/170144__timgormly__8-bit-explosion2.wav')
+    SOUND = ASSETS.sound('./assets/sounds/170144__timgormly__8-bit-explosion2.wav')
 
     def update(self):
         # Inherit wrapping mechanics.
         super(Bumper, self).update()
 
         # Simple check if any other sprite overlaps self-object...
-        if self.overlapping_sprites:
-            # ... and for any such sprite -- it should destroy itself.
-            # The try-except clause serves the debris that requires multiple hits.
-            try:
-                for sprite in self.overlapping_sprites:
-                    sprite.structure -= 1
-
-                    if not sprite.structure:
-                        sprite.die()
-            except:
-                sprite.die()
-
-            self.die()
+        overlapping = self.overlapping_sprites
+        if overlapping:
+            # ... any such sprite takes a hit, and so does the bumper itself.
+            # Whatever runs out of structure dies once the frame's hits are resolved.
+            for sprite in overlapping:
+                DAMAGE.hit(sprite)
+            DAMAGE.hit(self)
+        # Nothing in the way right now -- but maybe on the way here.
+        elif self.grid is not None:
+            COLLIDER.sweep(self, self.grid)
 
     def die(self):
-        # Play explosion sound.
-        Bumper.SOUND.play()
+        # Let the audio know.
+        EVENTS.publish(EXPLOSION, sprite=self)
 
-        # Create new outburst instance and put it onto the screen.
-        new_explosion = Explosion(x=self.x, y=self.y)
-        games.screen.add(new_explosion)
+        # Put new outburst onto the screen.
+        effect = Explosion.SHORT_EFFECT if QUALITY.short_explosions else Explosion.EFFECT
+        PARTICLES.emit(effect, x=self.x, y=self.y)
         self.destroy()
 
 
-class Explosion(games.Animation):
+class Explosion(object):
     """Outburst animation after collision detection."""
 
     # Load assets.
-    ANIMATION_IMAGES = [
-        "./assets/graphics/explosion-1.png",
-        "./assets/graphics/explosion-2.png",
-        "./assets/graphics/explosion-3.png",
-        "./assets/graphics/explosion-4.png",
-        "./assets/graphics/explosion-5.png",
-        "./assets/graphics/explosion-6.png",
-        "./assets/graphics/explosion-7.png",
-        "./assets/graphics/explosion-8.png",
-        "./assets/graphics/explosion-9.png",
-        "./assets/graphics/explosion-10.png",
-    ]
-
-    def __init__(self, x, y):
-        # Appeal to the games.Animation constructor in order
-        # to set up frames and call upon coordinates.
-        super(Explosion, self).__init__(
-            images=Explosion.ANIMATION_IMAGES,
-            x=x,
-            y=y,
-            # Configure animation FPS.
-            repeat_interval=5,
-            # Set how many times animation shall display itself.
-            n_repeats=1,
-            is_collideable=False
-        )
-
-
-class SpacecraftExhaust(games.Animation):
+    EFFECT = ParticleEffect(
+        images=[
+            ASSETS.image("./assets/graphics/explosion-1.png"),
+            ASSETS.image("./assets/graphics/explosion-2.png"),
+            ASSETS.image("./assets/graphics/explosion-3.png"),
+            ASSETS.image("./assets/graphics/explosion-4.png"),
+            ASSETS.image("./assets/graphics/explosion-5.png"),
+            ASSETS.image("./assets/graphics/explosion-6.png"),
+            ASSETS.image("./assets/graphics/explosion-7.png"),
+            ASSETS.image("./assets/graphics/explosion-8.png"),
+            ASSETS.image("./assets/graphics/explosion-9.png"),
+            ASSETS.image("./assets/graphics/explosion-10.png"),
+        ],
+        # Configure animation FPS.
+        repeat_interval=5
+    )
+
+    # Every other frame only -- for when the quality governor is short on time.
+    SHORT_EFFECT = ParticleEffect(images=EFFECT.images[::2], repeat_interval=5)
+
+
+class SpacecraftExhaust(object):
     """Ship exhaust animation-overlapper."""
 
     # Load assets.
-    ANIMATION_IMGS = [
-        "./assets/graphics/exhaust-1.png",
-        "./assets/graphics/exhaust-2.png"
-    ]
+    EFFECT = ParticleEffect(
+        images=[
+            ASSETS.image("./assets/graphics/exhaust-1.png"),
+            ASSETS.image("./assets/graphics/exhaust-2.png")
+        ],
+        # Configure animation FPS.
+        repeat_interval=1
+    )
 
-    def __init__(self, craft_x, craft_y, craft_angle, ship_x_vel, ship_y_vel):
-        # Object image representation shall spawn itself at the spacecraft.
-        x = craft_x
-        y = craft_y
-        angle = craft_angle
-
-        # In order to create the illusion, exhaust animation shall move onwards
-        # just like the ship itself.
-        dx = ship_x_vel
-        dy = ship_y_vel
 
-        # Appeal to the games.Animation constructor in order
-        # to set up frames and call upon coordinates.
-        super(SpacecraftExhaust, self).__init__(
-            images=SpacecraftExhaust.ANIMATION_IMGS,
-            x=x,
-            y=y,
-            angle=angle,
-            dx=dx,
-            dy=dy,
-            # Configure animation FPS.
-            repeat_interval=1,
-            # Set how many times animation shall display itself.
-            n_repeats=1,
-            is_collideable=False,
-        )
-
-
-class SpacecraftTurnAround(games.Animation):
+class SpacecraftTurnAround(LoadedAnimation):
     """Craft's turning around animation sequence"""
 
     # Load assets.
     ANIMATION_IMGS = [
-        "./assets/graphics/qturn-anim-1.png",
-        "./assets/graphics/qturn-anim-2.png",
-        "./assets/graphics/qturn-anim-3.png",
-        "./assets/graphics/qturn-anim-4.png",
-        "./assets/graphics/qturn-anim-5.png",
-        "./assets/graphics/qturn-anim-6.png"
+        ASSETS.image("./assets/graphics/qturn-anim-1.png"),
+        ASSETS.image("./assets/graphics/qturn-anim-2.png"),
+        ASSETS.image("./assets/graphics/qturn-anim-3.png"),
+        ASSETS.image("./assets/graphics/qturn-anim-4.png"),
+        ASSETS.image("./assets/graphics/qturn-anim-5.png"),
+        ASSETS.image("./assets/graphics/qturn-anim-6.png")
     ]
 
     def __init__(self, craft_x, craft_y, craft_angle, craft_x_vel, craft_y_vel):
@@ -183,10 +402,10 @@ class SpacecraftTurnAround(games.Animation):
         dx = craft_x_vel
         dy = craft_y_vel
 
-        # Appeal to the games.Animation constructor in order
+        # Appeal to the LoadedAnimation constructor in order
         # to set up frames and call upon coordinates.
         super(SpacecraftTurnAround, self).__init__(
-            images=SpacecraftTurnAround.ANIMATION_IMGS,
+            images=[image.get() for image in SpacecraftTurnAround.ANIMATION_IMGS],
             x=x,
             y=y,
             angle=angle,
@@ -200,29 +419,57 @@ class SpacecraftTurnAround(games.Animation):
         )
 
 
-class Debris(ScreenWrapper):
+# What sets the debris tiers apart (see Debris.TIERS).
+DebrisTier = collections.namedtuple("DebrisTier", "structure score spawns images")
+
+
+class Debris(SharedRotation, ScreenWrapper):
     """Space rock -- enemy in the gameplay. An asteroid to be shot."""
 
+    TIER = 1  # Toughness tier -- row of the TIERS table (as filed in run results too).
     VELOCITY = 3  # The actual speed factor.
-    CRASH_SPAWNS = 2  # Number of pieces to spawn after crash.
 
     # Asteroids classification constants.
     SMALL = 1
     MEDIUM = 2
     BIG = 3
 
-    # Load assets.
-    ASTEROID_IMAGES = {
-        SMALL: games.load_image('./assets/graphics/debris-small-tier-1.png'),
-        MEDIUM: games.load_image('./assets/graphics/debris-medium-tier-1.png'),
-        BIG: games.load_image('./assets/graphics/debris-big-tier-1.png')
+    # Base points per size (multiplied by the tier's score, see points()).
+    POINTS = {
+        SMALL: 3,
+        MEDIUM: 2,
+        BIG: 1
+    }
+
+    # Hits it takes to break a rock, score multiplier,
+    # number of pieces to spawn after crash and the looks -- per tier.
+    TIERS = {
+        1: DebrisTier(structure=1, score=1, spawns=2, images={
+            SMALL: ASSETS.image('./assets/graphics/debris-small-tier-1.png'),
+            MEDIUM: ASSETS.image('./assets/graphics/debris-medium-tier-1.png'),
+            BIG: ASSETS.image('./assets/graphics/debris-big-tier-1.png')
+        }),
+        2: DebrisTier(structure=2, score=2, spawns=2, images={
+            SMALL: ASSETS.image('./assets/graphics/debris-small-tier-2.png'),
+            MEDIUM: ASSETS.image('./assets/graphics/debris-medium-tier-2.png'),
+            BIG: ASSETS.image('./assets/graphics/debris-big-tier-2.png')
+        }),
+        3: DebrisTier(structure=3, score=3, spawns=2, images={
+            SMALL: ASSETS.image('./assets/graphics/debris-small-tier-3.png'),
+            MEDIUM: ASSETS.image('./assets/graphics/debris-medium-tier-3.png'),
+            BIG: ASSETS.image('./assets/graphics/debris-big-tier-3.png')
+        }),
     }
 
-    def __init__(self, game, x, y, size):
+    # Rocks of a level yet to come are made ahead of time (from its own random
+    # generator) and only launched into play once the level starts.
+    def __init__(self, game, x, y, size, rng=random, launch=True):
+        self.tier = Debris.TIERS[self.TIER]
+
         # Appeal to the ScreenWrapper constructor in order
         # to set up the image and call upon coordinates.
         super(Debris, self).__init__(
-            image=Debris.ASTEROID_IMAGES[size],
+            image=self.tier.images[size].get(),
             x=x,
             y=y,
             # Set up debris speed randomly:
@@ -232,27 +479,46 @@ class Debris(ScreenWrapper):
             # coordinates feed -- direction of movement.
             # The equation ends divided by size of the object --
             # smaller ones tend to be speedier.
-            dx = Debris.VELOCITY*random.random()*random.choice([-1, 1])/size,
-            dy = Debris.VELOCITY*random.random()*random.choice([-1, 1])/size,
+            dx = Debris.VELOCITY*rng.random()*rng.choice([-1, 1])/size,
+            dy = Debris.VELOCITY*rng.random()*rng.choice([-1, 1])/size,
             # Set up debris angle randomly for variety.
-            angle=random.randrange(361)
+            angle=rng.randrange(361)
         )
 
         self.size = size
         self.game = game
+        # Hits left until the rock breaks (taken off by the DAMAGE resolver).
+        self.structure = self.tier.structure
 
-        # Add new object to the Game's belt collection.
+        if launch:
+            self.launch(x, y)
+
+    def launch(self, x, y):
+        self.x = x
+        self.y = y
+
+        # Add new object to the Game's belt collection (and its spatial index).
         self.game.belt.append(self)
+        self.game.grid.insert(self)
+
+    def update(self):
+        # Inherit wrapping mechanics.
+        super(Debris, self).update()
+
+        # Keep the spatial index in step with the rock.
+        self.game.grid.move(self)
 
     def die(self):
         # Remove debris from Game's asteroid collector.
         self.game.belt.remove(self)
+        self.game.grid.remove(self)
 
         # Make space rocks break up until there is no smaller size.
+        # The pieces are of the same tier.
         if self.size != Debris.SMALL:
-            for _ in range(Debris.CRASH_SPAWNS):
-                # Spawn two smaller sized asteroids in the place of the crash.
-                new_debris = Debris(
+            for _ in range(self.tier.spawns):
+                # Spawn smaller sized asteroids in the place of the crash.
+                new_debris = type(self)(
                     game=self.game,
                     x=self.x,
                     y=self.y,
@@ -262,223 +528,73 @@ class Debris(ScreenWrapper):
 
         super(Debris, self).die()
 
-        # Add some value to the score.
-        if self.size == Debris.BIG:
-            self.game.score.value += 1
-        elif self.size == Debris.MEDIUM:
-            self.game.score.value += 2
-        elif self.size == Debris.SMALL:
-            self.game.score.value += 3
+        self.destroyed()
 
-        self.game.score.value += int(30/self.size)
+    # Score value of the rock -- tougher ones are worth more.
+    def points(self):
+        return self.tier.score*(Debris.POINTS[self.size] + int(30/self.size))
 
-        # If there are no space rocks left...
-#        if not self.game.belt:
-            # ... appeal to the Game class and it's advance method
-            # in order to get to higher level.
-#            self.game.advance()
+    # Gone for good -- tell whoever listens. The last rock of the belt
+    # clears the level, though only after the frame is over.
+    def destroyed(self):
+        EVENTS.publish(DEBRIS_DESTROYED, debris=self)
+        if not self.game.belt:
+            EVENTS.post(LEVEL_CLEARED, game=self.game)
 
 
 class ToughDebris(Debris):
     """Space rock -- enemy in the gameplay. An asteroid to be shot. Tough version."""
 
-    VELOCITY = 3  # The actual speed factor.
-    CRASH_SPAWNS = 2  # Number of pieces to spawn after crash.
-
-    # Asteroids classification constants.
-    SMALL = 1
-    MEDIUM = 2
-    BIG = 3
-
-    # Load assets.
-    TOUGH_ASTEROID_IMAGES = {
-        SMALL: games.load_image('./assets/graphics/debris-small-tier-2.png'),
-        MEDIUM: games.load_image('./assets/graphics/debris-medium-tier-2.png'),
-        BIG: games.load_image('./assets/graphics/debris-big-tier-2.png')
-    }
-
-    def __init__(self, game, x, y, size):
-        # Appeal to the ScreenWrapper constructor in order
-        # to set up the image and call upon coordinates.
-        super(ScreenWrapper, self).__init__(
-            image=ToughDebris.TOUGH_ASTEROID_IMAGES[size],
-            x=x,
-            y=y,
-            # Just like w/ normal debris -- set up speed randomly:
-            # Debris.VELOCITY factor gets multiplied by a random number
-            # from range of 0-0.9(9) for diversity. Next, it's getting
-            # multiplied by either -1 or 1 which determines it's positive/negative
-            # coordinates feed -- direction of movement.
-            # The equation ends divided by size of the object --
-            # smaller ones tend to be speedier.
-            dx = Debris.VELOCITY*random.random()*random.choice([-1, 1])/size,
-            dy = Debris.VELOCITY*random.random()*random.choice([-1, 1])/size,
-            # Set up debris angle randomly for variety.
-            angle=random.randrange(361)
-        )
-
-        self.size = size
-        self.game = game
-        self.structure = 2
-
-        # Add new object to the Game's belt collection.
-        self.game.belt.append(self)
-
-    def die(self):
-        # Remove debris from Game's asteroid collector.
-        self.game.belt.remove(self)
-
-        # Make space rocks break up until there is no smaller size.
-        if self.size != ToughDebris.SMALL:
-            for _ in range(ToughDebris.CRASH_SPAWNS):
-                # Spawn two smaller sized asteroids in the place of the crash.
-                new_tough_debris = ToughDebris(
-                    game=self.game,
-                    x=self.x,
-                    y=self.y,
-                    size=self.size-1
-                )
-                games.screen.add(new_tough_debris)
-
-        super(Debris, self).die()
-
-        # Add some value to the score.
-        if self.size == ToughDebris.BIG:
-            self.game.score.value += 2
-        elif self.size == ToughDebris.MEDIUM:
-            self.game.score.value += 4
-        elif self.size == ToughDebris.SMALL:
-            self.game.score.value += 6
-
-        self.game.score.value += int(30/self.size)*2
-
-        # If there are no space rocks left...
-#        if not self.game.belt:
-            # ... appeal to the Game class and it's advance method
-            # in order to get to higher level.
-#            self.game.advance()
+    TIER = 2  # Toughness tier (see Debris.TIERS).
 
 
 class SuperToughDebris(ToughDebris):
     """Space rock -- enemy in the gameplay. An asteroid to be shot. Super tough version."""
 
-    VELOCITY = 3  # The actual speed factor.
-    CRASH_SPAWNS = 2  # Number of pieces to spawn after crash.
-
-    # Asteroids classification constants.
-    SMALL = 1
-    MEDIUM = 2
-    BIG = 3
-
-    # Load assets.
-    SUPER_TOUGH_ASTEROID_IMAGES = {
-        SMALL: games.load_image('./assets/graphics/debris-small-tier-3.png'),
-        MEDIUM: games.load_image('./assets/graphics/debris-medium-tier-3.png'),
-        BIG: games.load_image('./assets/graphics/debris-big-tier-3.png')
-    }
-
-    def __init__(self, game, x, y, size):
-        # Appeal to the ScreenWrapper constructor in order
-        # to set up the image and call upon coordinates.
-        super(ScreenWrapper, self).__init__(
-            image=SuperToughDebris.SUPER_TOUGH_ASTEROID_IMAGES[size],
-            x=x,
-            y=y,
-            # Just like w/ normal debris -- set up speed randomly:
-            # Debris.VELOCITY factor gets multiplied by a random number
-            # from range of 0-0.9(9) for diversity. Next, it's getting
-            # multiplied by either -1 or 1 which determines it's positive/negative
-            # coordinates feed -- direction of movement.
-            # The equation ends divided by size of the object --
-            # smaller ones tend to be speedier.
-            dx = Debris.VELOCITY*random.random()*random.choice([-1, 1])/size,
-            dy = Debris.VELOCITY*random.random()*random.choice([-1, 1])/size,
-            # Set up debris angle randomly for variety.
-            angle=random.randrange(361)
-        )
-
-        self.size = size
-        self.game = game
-        self.structure = 3
-
-        # Add new object to the Game's belt collection.
-        self.game.belt.append(self)
-
-    def die(self):
-        # Remove debris from Game's asteroid collector.
-        self.game.belt.remove(self)
-
-        # Make space rocks break up until there is no smaller size.
-        if self.size != SuperToughDebris.SMALL:
-            for _ in range(SuperToughDebris.CRASH_SPAWNS):
-                # Spawn two smaller sized asteroids in the place of the crash.
-                new_super_tough_debris = SuperToughDebris(
-                    game=self.game,
-                    x=self.x,
-                    y=self.y,
-                    size=self.size-1
-                )
-                games.screen.add(new_super_tough_debris)
-
-        super(Debris, self).die()
-
-        # Add some value to the score.
-        if self.size == SuperToughDebris.BIG:
-            self.game.score.value += 3
-        elif self.size == SuperToughDebris.MEDIUM:
-            self.game.score.value += 6
-        elif self.size == SuperToughDebris.SMALL:
-            self.game.score.value += 9
-
-        self.game.score.value += int(30/self.size)*3
+    TIER = 3  # Toughness tier (see Debris.TIERS).
 
-        # If there are no space rocks left...
-#        if not self.game.belt:
-            # ... appeal to the Game class and it's advance method
-            # in order to get to higher level.
-#            self.game.advance()
 
-
-class Blast(games.Animation, Bumper):
+class Blast(LoadedAnimation, Bumper):
     """A projectile. Spacecraft's blaster weapon system. Also has visual effect."""
 
     SPAWN_BUFFER_PX = 60  # Spawn distance from the ship.
     VELOCITY_FACTOR = 10  # An actual speed factor.
     BLAST_LIFETIME = 30  # Blast lifetime duration.
+    RANGE_PX = SPAWN_BUFFER_PX + VELOCITY_FACTOR*BLAST_LIFETIME  # Farthest reach from the ship.
 
     # Load assets.
     ANIMATION_IMGS = [
-        "./assets/graphics/blast-bounce-1.png",
-        "./assets/graphics/blast-bounce-2.png",
-        "./assets/graphics/blast-bounce-3.png",
-        "./assets/graphics/blast-bounce-4.png",
+        ASSETS.image("./assets/graphics/blast-bounce-1.png"),
+        ASSETS.image("./assets/graphics/blast-bounce-2.png"),
+        ASSETS.image("./assets/graphics/blast-bounce-3.png"),
+        ASSETS.image("./assets/graphics/blast-bounce-4.png"),
     ]
 
     # All credit goes to:
     # https://freesound.org/people/colmmullally/sounds/462220/
-    SOUND = games.load_sound('./assets/sounds/462220__colmmullally__zap.wav')
+    SOUND = ASSETS.sound('./assets/sounds/462220__colmmullally__zap.wav')
 
-    def __init__(self, craft_x, craft_y, craft_angle):
-        # Play projectile sound.
-        Blast.SOUND.play()
+    def __init__(self, craft_x, craft_y, craft_angle, craft_heading=None, grid=None):
+        # The craft passes its heading unit vector along, so it's only looked up once a frame.
+        if craft_heading is None:
+            craft_heading = heading(craft_angle)
 
         # Object animation representation shall spawn itself in front of the spacecraft.
         # Projectile position is calculated similarly to the Spacecraft class method.
         # The only difference is the shift in pixels by adding SPAWN_BUFFER_PX value.
-        x = craft_x + Blast.SPAWN_BUFFER_PX * math.sin(math.radians(craft_angle))
-        y = craft_y + Blast.SPAWN_BUFFER_PX * -math.cos(math.radians(craft_angle))
+        x, y = ahead(craft_x, craft_y, craft_heading, Blast.SPAWN_BUFFER_PX)
         angle = craft_angle
 
         # Projectile shall fly freely onwards from shooting spot.
         # Again, the movement calculation is along the x, y coordinate system --
         # crunched similarly to the Spaceship positioning method.
-        dx = Blast.VELOCITY_FACTOR * math.sin(math.radians(craft_angle))
-        dy = Blast.VELOCITY_FACTOR * -math.cos(math.radians(craft_angle))
+        dx = Blast.VELOCITY_FACTOR * craft_heading[0]
+        dy = Blast.VELOCITY_FACTOR * craft_heading[1]
 
         # Appeal to the ScreenWrapper constructor in order
         # to set up the image and call upon coordinates.
         super(Blast, self).__init__(
-            images=Blast.ANIMATION_IMGS,
+            images=[image.get() for image in Blast.ANIMATION_IMGS],
             x=x,
             y=y,
             angle=angle,
@@ -492,6 +608,8 @@ class Blast(games.Animation, Bumper):
         )
 
         self.lifetime = Blast.BLAST_LIFETIME
+        # Blasts fly further per frame than small rocks are wide -- sweep them against the belt.
+        self.grid = grid
 
     # Check for important object events in real time.
     def update(self):
@@ -509,13 +627,13 @@ class BlasterViewfinder(games.Sprite):
     """Spacecraft's aim assistance."""
 
     # Load assets.
-    IMG = games.load_image("./assets/graphics/viewfinder-gray.png")
+    IMG = ASSETS.image("./assets/graphics/viewfinder-gray.png")
 
     def __init__(self, craft_x, craft_y, craft_angle):
         # Appeal to the games.Sprite constructor in order
         # to set up the image and call upon coordinates.
         super(BlasterViewfinder, self).__init__(
-            image=BlasterViewfinder.IMG,
+            image=BlasterViewfinder.IMG.get(),
             is_collideable=False
         )
 
@@ -532,25 +650,33 @@ class Spacecraft(Bumper):
     VIEWFINDER_DISPLAY_BUFFER = 150  # Blaster viewfinder display distance from the craft.
     VIEWFINDER_DISPLAY_DELAY = 10  # Time unit to slow down viewfinder toggle.
     COOMETER_DISPLAY_DELAY = 15  # Time unit to slow down coordinates display refresh.
+    INVULNERABLE = False  # Rocks bounce off the craft (load testing only).
 
     # Load assets.
-    SPACECRAFT_IMG = games.load_image("./assets/graphics/spacecraft-1.png")
+    SPACECRAFT_IMG = ASSETS.image("./assets/graphics/spacecraft-1.png")
 
     # All credit goes to:
     # https://freesound.org/people/BloodPixelHero/sounds/572623/
-    SOUND = games.load_sound('./assets/sounds/572623__bloodpixelhero__spaceship-flight.wav')
+    SOUND = ASSETS.sound('./assets/sounds/572623__bloodpixelhero__spaceship-flight.wav')
 
-    def __init__(self, game, x, y):
+    def __init__(self, game, x, y, controls=None):
         # Appeal to the Bumper constructor in order
         # to set up the image and call upon coordinates.
         super(Spacecraft, self).__init__(
-            image=Spacecraft.SPACECRAFT_IMG,
+            image=Spacecraft.SPACECRAFT_IMG.get(),
             x=x,
             y=y,
             is_collideable=True
         )
 
         self.game = game
+        self.grid = game.grid
+
+        # Anything with is_pressed(key) can steer the craft:
+        # the local keyboard by default, a network peer or a bot otherwise.
+        if controls is None:
+            controls = KEYBOARD
+        self.controls = controls
         self.blaster_cooldown = 0
         self.coordinates_txt = games.Text(
             value=None,
@@ -565,21 +691,27 @@ class Spacecraft(Bumper):
         self.coometer_cooldown = 0
         self.turn_around_delay = 0
 
+        # Unit vector the craft faces -- refreshed once per frame, after turning.
+        self.heading = heading(self.angle)
+
+        # Debris a shot fired right now would hit (target lock).
+        self.target = None
+
     # Check for important object events in real time.
     def update(self):
         # Inherit wrapping mechanics and collision detection.
         super(Spacecraft, self).update()
 
         # Turn ship leftwards along it's axis via LEFT KEY.
-        if games.keyboard.is_pressed(games.K_LEFT):
+        if self.controls.is_pressed(games.K_LEFT):
             self.angle -= Spacecraft.TURN_FACTOR
 
         # Turn ship rightwards along it's axis via RIGHT KEY.
-        if games.keyboard.is_pressed(games.K_RIGHT):
+        if self.controls.is_pressed(games.K_RIGHT):
             self.angle += Spacecraft.TURN_FACTOR
 
         # Quickly turn the ship by 180 degrees via T KEY.
-        if games.keyboard.is_pressed(games.K_t) and self.turn_around_delay == 0:
+        if self.controls.is_pressed(games.K_t) and self.turn_around_delay == 0:
 
             new_turn_around = SpacecraftTurnAround(
                 craft_x=self.x,
@@ -597,37 +729,42 @@ class Spacecraft(Bumper):
         if self.turn_around_delay:
             self.turn_around_delay -= 1
 
+        # Turning is done for this frame -- look up where the craft faces now.
+        # Thrust, reverse pull, blasts and viewfinder all share this one vector.
+        self.heading = heading(self.angle)
+
         # Propel ship forward.
-        if games.keyboard.is_pressed(games.K_UP):
-            # Play acceleration sound.
-            Spacecraft.SOUND.play()
+        if self.controls.is_pressed(games.K_UP):
+            # Acceleration sound.
+            EVENTS.publish(THRUST, ship=self)
 
             # The trick is to shift the craft along coordinate system:
-            # using math sine and cosine functions here to determine the exact placement;
-            # the actual angle of the sprite has to be converted from degrees to radians,
-            # because superwires uses degrees and math trigonometric functions are running
-            # on radians;
+            # heading holds sine and cosine of the craft's angle (see kinematics module),
+            # which determine the exact placement;
             # speed is incremented by the VELOCITY_FACOTR constant via UP KEY.
-            self.dx += Spacecraft.VELOCITY_FACTOR * math.sin(math.radians(self.angle))
-            self.dy += Spacecraft.VELOCITY_FACTOR * -math.cos(math.radians(self.angle))
-
-            # Display exhaust animation.
-            new_exhaust_anim = SpacecraftExhaust(
-                craft_x=self.x,
-                craft_y=self.y,
-                craft_angle=self.angle,
-                ship_x_vel=self.dx,
-                ship_y_vel=self.dy
-            )
-            games.screen.add(new_exhaust_anim)
+            self.dx += Spacecraft.VELOCITY_FACTOR * self.heading[0]
+            self.dy += Spacecraft.VELOCITY_FACTOR * self.heading[1]
+
+            # Display exhaust animation. In order to create the illusion,
+            # exhaust shall move onwards just like the ship itself.
+            # (First thing to go when frames run late.)
+            if QUALITY.exhaust:
+                PARTICLES.emit(
+                    SpacecraftExhaust.EFFECT,
+                    x=self.x,
+                    y=self.y,
+                    angle=self.angle,
+                    dx=self.dx,
+                    dy=self.dy
+                )
 
         # Activate reverse pull via DOWN KEY.
-        if games.keyboard.is_pressed(games.K_DOWN):
-            self.dx -= Spacecraft.REVERSE_PULL_FACTOR * math.sin(math.radians(self.angle))
-            self.dy -= Spacecraft.REVERSE_PULL_FACTOR * -math.cos(math.radians(self.angle))
+        if self.controls.is_pressed(games.K_DOWN):
+            self.dx -= Spacecraft.REVERSE_PULL_FACTOR * self.heading[0]
+            self.dy -= Spacecraft.REVERSE_PULL_FACTOR * self.heading[1]
 
         # Decelerate the ship until [almost] stillness via R KEY.
-        if games.keyboard.is_pressed(games.K_r):
+        if self.controls.is_pressed(games.K_r):
             if self.dx > 0:
                 self.dx -= Spacecraft.VELOCITY_FACTOR
             elif self.dx < 0:
@@ -642,10 +779,17 @@ class Spacecraft(Bumper):
 
         # Shoot a projectile via SPACE KEY or F KEY.
         # Only works if the blaster has cooled off!
-        if (games.keyboard.is_pressed(games.K_SPACE) and self.blaster_cooldown == 0) \
-        or (games.keyboard.is_pressed(games.K_f) and self.blaster_cooldown ==0):
-            new_blast = Blast(craft_x=self.x, craft_y=self.y, craft_angle=self.angle)
+        if (self.controls.is_pressed(games.K_SPACE) and self.blaster_cooldown == 0) \
+        or (self.controls.is_pressed(games.K_f) and self.blaster_cooldown ==0):
+            new_blast = Blast(
+                craft_x=self.x,
+                craft_y=self.y,
+                craft_angle=self.angle,
+                craft_heading=self.heading,
+                grid=self.game.grid
+            )
             games.screen.add(new_blast)
+            EVENTS.publish(SHOT_FIRED, blast=new_blast)
             self.blaster_cooldown = Spacecraft.BLASTER_DELAY
 
         # Wait until the blaster cools off.
@@ -667,18 +811,18 @@ class Spacecraft(Bumper):
                 is_collideable=False
             )
             games.screen.add(self.coordinates_txt)
-            self.coometer_cooldown = Spacecraft.COOMETER_DISPLAY_DELAY
+            self.coometer_cooldown = Spacecraft.COOMETER_DISPLAY_DELAY*QUALITY.hud_slowdown
 
         # Keep coordinates timer synchro.
         if self.coometer_cooldown:
             self.coometer_cooldown -= 1
 
         # Evoke help screen layer via H KEY.
-        if games.keyboard.is_pressed(games.K_h):
+        if self.controls.is_pressed(games.K_h):
             self.game.display_help()
 
         # Toggle viewfinder on/off.
-        if games.keyboard.is_pressed(games.K_v) and self.viewfinder_cooldown == 0:
+        if self.controls.is_pressed(games.K_v) and self.viewfinder_cooldown == 0:
             if self.viewfinder_on:
                 self.remove_viewfinder()
                 self.viewfinder_on = False
@@ -693,16 +837,28 @@ class Spacecraft(Bumper):
         if self.viewfinder_cooldown:
             self.viewfinder_cooldown -= 1
 
-        # Calibrate viewfinder assistance so it moves with the craft.
-        self.viewfinder.angle = self.angle
-        self.viewfinder.x = self.x + Spacecraft.VIEWFINDER_DISPLAY_BUFFER * math.sin(math.radians(self.angle))
-        self.viewfinder.y = self.y + Spacecraft.VIEWFINDER_DISPLAY_BUFFER * -math.cos(math.radians(self.angle))
+        # Under heavy load the quality governor hides the viewfinder (and brings it back later).
+        if self.viewfinder_on and QUALITY.viewfinder != (self.viewfinder.screen is not None):
+            if QUALITY.viewfinder:
+                games.screen.add(self.viewfinder)
+            else:
+                self.remove_viewfinder()
 
-        # If there are no space rocks left...
-        if not self.game.belt:
-            # ... appeal to the Game class and it's advance method
-            # in order to get to higher level.
-            self.game.advance()
+        # Target lock -- ask the belt's spatial index what lies along the line of fire.
+        hit = self.game.grid.ray_cast(self.x, self.y, self.heading, Blast.RANGE_PX)
+        self.target = hit[1] if hit else None
+
+        # Calibrate viewfinder assistance so it moves with the craft.
+        # (Setting the angle re-rotates the image, so only do that on turns.)
+        if self.viewfinder.angle != self.angle:
+            self.viewfinder.angle = self.angle
+        if self.target is not None:
+            # Locked on -- the reticle sits on the rock in the line of fire.
+            self.viewfinder.x, self.viewfinder.y = self.target.x, self.target.y
+        else:
+            self.viewfinder.x, self.viewfinder.y = ahead(
+                self.x, self.y, self.heading, Spacecraft.VIEWFINDER_DISPLAY_BUFFER
+            )
 
     # Velocity is regulated via update() method itself -- the craft cannot go faster
     # than value specified in VELOCITY_MAX constant.
@@ -735,14 +891,26 @@ class Spacecraft(Bumper):
         self.remove_coordinates()
 
     def die(self):
+        if Spacecraft.INVULNERABLE:
+            return
+
         # Inherit all die() functionality.
         super(Spacecraft, self).die()
         self.clear_screen_data()
+        # No more levels -- even if the last rock went down with the craft.
+        self.game.over = True
+
+        # Ending screen is static, automatic garbage collection may go back on.
+        SCHEDULER.leave_gameplay()
+        PACER.leave_gameplay()
+
+        EVENTS.publish(SHIP_DESTROYED, ship=self)
 
         ending = EndingScreen(
             final_score=self.game.score.value,
             reached_depth=self.game.depth,
-            debris_left=self.game.belt
+            debris_left=self.game.belt,
+            controls=self.controls
         )
         games.screen.add(ending)
 
@@ -752,19 +920,42 @@ class Gameplay(object):
 
     # Set up handy constants.
     TEXT_HEIGHT = 25
+    RESULTS = None  # ResultsStore finished games are filed into (see --results).
+    SESSIONS = None  # SessionRecorder logging every game for replays (see --sessions).
+    SUPER_TOUGH_ODDS = 20  # One in that many new rocks is of tier 3...
+    TOUGH_ODDS = 10  # ... and one in that many of the rest of tier 2.
+    PREFETCH_BELOW = 4  # Rocks left when the next level starts being built.
 
     # Load assets.
 
     # All credit goes to: PUBLIC DOMAIN.
-    ADVANCE_SOUND = games.load_sound('./assets/sounds/level-advance.wav')
+    ADVANCE_SOUND = ASSETS.sound('./assets/sounds/level-advance.wav')
+
+    def __init__(self, controls=None, seed=None):
+        # Effects layer is shared by all games -- put it on the screen once.
+        if PARTICLES.screen is None:
+            games.screen.add(PARTICLES)
+
+        # Every game can be replayed from its seed (drawn from the running
+        # random state unless given, so seeded sessions stay reproducible).
+        if seed is None:
+            seed = random.randrange(2**31)
+        self.seed = seed
+        random.seed(seed)
+
+        self.started = time.perf_counter()
+        self.started_frame = LOOP.frame
 
-    def __init__(self):
         # View starter help screen.
         self.display_help()
 
         # This defines level number and it's difficulty.
         # Look up advance() below for details.
         self.depth = 0
+        # Set once the craft is gone.
+        self.over = False
+        # The next level's belt in the making (see prefetch_next_level()).
+        self.next_level = None
 
         # Depth level text sprite init.
         self.depth_txt = games.Text(
@@ -775,6 +966,8 @@ class Gameplay(object):
 
         # Asteroids per level collection.
         self.belt = []
+        # Same asteroids, indexed by position for nearest/radius/ray queries.
+        self.grid = SpatialGrid(WINDOW_WIDTH, WINDOW_HEIGHT)
 
         # Score and it's display.
         self.score = games.Text(
@@ -792,76 +985,110 @@ class Gameplay(object):
         self.spacecraft = Spacecraft(
             x=SCREEN_WIDTH_CENTER,
             y=SCREEN_HEIGHT_CENTER,
-            game=self
+            game=self,
+            controls=controls
         )
         games.screen.add(self.spacecraft)
 
+        if Gameplay.SESSIONS is not None:
+            Gameplay.SESSIONS.begin(self, self.spacecraft.controls, invulnerable=Spacecraft.INVULNERABLE)
+
     # Allow the player to perform an actual gameplay -- level by level.
     def play(self):
         # Set up chosen background.
         games.screen.background = ORBIT_BACKGROUND
 
+        # No automatic garbage collection while flying.
+        SCHEDULER.enter_gameplay()
+        # Full frame rate from now on.
+        PACER.enter_gameplay()
+
         # Start particular level.
         self.advance()
 
     # Proceed to the next level.
     def advance(self):
-        # Play level adavnce sound.
-        Gameplay.ADVANCE_SOUND.play()
-
-        # Clear old depth number from the screen.
-        games.screen.remove(self.depth_txt)
+        # The previous level is gone -- a good moment for a full garbage collection.
+        SCHEDULER.full_collect()
 
         # Increment the level depth and it's difficulty.
         # Player gets more debris to shoot with each level iteration.
         self.depth += 1
+        # Depth display and level advance sound follow.
+        EVENTS.publish(LEVEL_STARTED, game=self)
+
+        # The belt has (mostly) been built during the tail of the previous level.
+        if self.next_level is None:
+            self.prefetch_next_level()
+        rocks = PREFETCHER.take(self.next_level)
+        self.next_level = None
+
+        # Avoid spawning debris on the ship or close to it --
+        # rocks keep their distance from wherever the craft is now.
+        for rock in rocks:
+            x_shift, y_shift = rock.spawn_shift
+            rock.launch(self.spacecraft.x + x_shift, self.spacecraft.y + y_shift)
+            games.screen.add(rock)
+
+    # Start building the belt of the level after the current one.
+    def prefetch_next_level(self):
+        self.next_level = PREFETCHER.start(self.layout(self.depth + 1))
+
+    # Rocks of given level, made but not in play yet. Every level has
+    # its own random generator, so it looks the same however it's built.
+    def layout(self, depth):
+        MIN_SPAWN_BUFFER_PX = 300
+        MAX_SPAWN_BUFFER_PX = 350
+        rng = random.Random(f"{self.seed}:{depth}")
 
-        # Update and display level number on the screen.
-        self.depth_txt = games.Text(
-            value=f"Depth: {self.depth}",
-            size=25,
-            color=color.gray,
-            x=SCREEN_WIDTH_CENTER,
-            y=Gameplay.TEXT_HEIGHT,
-            is_collideable=False
-        )
-        games.screen.add(self.depth_txt)
-
-        for _ in range(self.depth):
-            # Avoid spawning debris on the ship or close to it.
-            MIN_SPAWN_BUFFER_PX = 300
-            MAX_SPAWN_BUFFER_PX = 350
-
-            x_shift = self.spacecraft.x + random.randint(MIN_SPAWN_BUFFER_PX, MAX_SPAWN_BUFFER_PX)
-            y_shift = self.spacecraft.y + random.randint(MIN_SPAWN_BUFFER_PX, MAX_SPAWN_BUFFER_PX)
+        # Player gets more debris to shoot with each level iteration.
+        for _ in range(depth):
+            spawn_shift = (
+                rng.randint(MIN_SPAWN_BUFFER_PX, MAX_SPAWN_BUFFER_PX),
+                rng.randint(MIN_SPAWN_BUFFER_PX, MAX_SPAWN_BUFFER_PX)
+            )
 
             # Tier 3 debris spawns very rarely...
-            if random.randrange(20) == 0:
-                new_super_tough_debris = SuperToughDebris(
-                    game=self,
-                    x=x_shift,
-                    y=y_shift,
-                    size=random.randint(SuperToughDebris.MEDIUM, SuperToughDebris.BIG)
-                )
-                games.screen.add(new_super_tough_debris)
+            if rng.randrange(Gameplay.SUPER_TOUGH_ODDS) == 0:
+                kind = SuperToughDebris
             # Tier 2 debris sprawns just rarely...
-            elif random.randrange(10) == 0:
-                new_tough_debris = ToughDebris(
-                        game=self,
-                        x=x_shift,
-                        y=y_shift,
-                        size=random.randint(ToughDebris.MEDIUM, ToughDebris.BIG),
-                )
-                games.screen.add(new_tough_debris)
-            else:
+            elif rng.randrange(Gameplay.TOUGH_ODDS) == 0:
+                kind = ToughDebris
             # In any other case, just sprawn normal asteroids.
-                new_debris = Debris(
-                    game=self,
-                    x=x_shift,
-                    y=y_shift,
-                    size=random.randint(Debris.MEDIUM, Debris.BIG)
-                )
-                games.screen.add(new_debris)
+            else:
+                kind = Debris
+
+            rock = kind(
+                game=self,
+                x=0,
+                y=0,
+                size=rng.randint(kind.MEDIUM, kind.BIG),
+                rng=rng,
+                launch=False
+            )
+            rock.spawn_shift = spawn_shift
+            yield rock
+
+    # Game over -- file the run into the results store (if there is one).
+    def finish(self):
+        if Gameplay.RESULTS is None:
+            return
+
+        frames = LOOP.frame - self.started_frame
+        duration = time.perf_counter() - self.started
+        left = collections.Counter(rock.TIER for rock in self.belt)
+        Gameplay.RESULTS.append(
+            seed=self.seed,
+            score=self.score.value,
+            depth=self.depth,
+            frames=frames,
+            duration_s=duration,
+            mean_frame_ms=1000*duration/max(frames, 1),
+            debris_left_tier1=left[Debris.TIER],
+            debris_left_tier2=left[ToughDebris.TIER],
+            debris_left_tier3=left[SuperToughDebris.TIER],
+            finished_at=time.time()
+        )
 
     # Show help screen.
     def display_help(self):
@@ -1009,7 +1236,7 @@ class Gameplay(object):
 class IntroScreen(games.Sprite):
     """Asteroblast welcome screen."""
 
-    def __init__(self):
+    def __init__(self, controls=None):
         # The image parameter is necessary for games.Sprite creation,
         # but it's totally unnecessary in such usage context.
         super(IntroScreen, self).__init__(
@@ -1017,6 +1244,10 @@ class IntroScreen(games.Sprite):
             is_collideable=False
         )
 
+        if controls is None:
+            controls = KEYBOARD
+        self.controls = controls
+
         # Set up chosen background.
         games.screen.background = ORBIT_BACKGROUND
 
@@ -1064,19 +1295,42 @@ class IntroScreen(games.Sprite):
         )
         games.screen.add(self.quit_txt)
 
+        # Create and view asset loading progress.
+        self.loading_txt = games.Text(
+            value=self.loading_status(),
+            size=20,
+            color=color.gray,
+            x=SCREEN_WIDTH_CENTER,
+            y=SCREEN_HEIGHT_CENTER+220,
+            is_collideable=False
+        )
+        games.screen.add(self.loading_txt)
+
+    # Assets keep loading in the background while the intro is displayed.
+    def loading_status(self):
+        if ASSETS.done():
+            return "ready"
+        decoded, total = ASSETS.progress()
+        return f"loading {decoded}/{total}"
+
     # Check for important object events in real time.
     def update(self):
+        # Refresh loading progress (only re-render the text if it has changed).
+        status = self.loading_status()
+        if self.loading_txt.value != status:
+            self.loading_txt.value = status
+
         # S KEY starts the game (intro screen is cleared beforehand).
-        if games.keyboard.is_pressed(games.K_s):
+        if self.controls.is_pressed(games.K_s):
             self.clear_start_screen()
 
             # Create Game instance.
-            asteroblast = Gameplay()
+            asteroblast = Gameplay(controls=self.controls)
             # Defend these skies!
             asteroblast.play()
 
         # Q simply quits the game and closes the program.
-        if games.keyboard.is_pressed(games.K_q):
+        if self.controls.is_pressed(games.K_q):
             games.screen.quit()
 
     # Screen shall be cleared and dummy pixel removed before game start.
@@ -1085,6 +1339,7 @@ class IntroScreen(games.Sprite):
         games.screen.remove(self.start_txt)
         games.screen.remove(self.help_text)
         games.screen.remove(self.quit_txt)
+        games.screen.remove(self.loading_txt)
 
         self.destroy()
 
@@ -1092,7 +1347,7 @@ class IntroScreen(games.Sprite):
 class EndingScreen(games.Sprite):
     """Asteroblast replay/quit screen."""
 
-    def __init__(self, debris_left, final_score=1, reached_depth=1):
+    def __init__(self, debris_left, final_score=1, reached_depth=1, controls=None):
         # The image parameter is necessary for games.Sprite creation,
         # but it's totally unnecessary in such usage context.
         super(EndingScreen, self).__init__(
@@ -1104,6 +1359,11 @@ class EndingScreen(games.Sprite):
         self.reached_depth = reached_depth
         self.debris_left = debris_left
 
+        # Whoever flew the last game decides about the next one.
+        if controls is None:
+            controls = KEYBOARD
+        self.controls = controls
+
         # Create and view game over text.
         self.game_over_txt = games.Text(
             value="GAME OVER",
@@ -1161,20 +1421,26 @@ class EndingScreen(games.Sprite):
 
     # Check for important object events in real time.
     def update(self):
-        # A KEY starts the game anew (ending screen is cleared beforehand).
-        if games.keyboard.is_pressed(games.K_a):
-            self.clear_ending_screen()
+        # A KEY starts the game anew.
+        if self.controls.is_pressed(games.K_a):
+            self.play_again()
 
-            for rock in self.debris_left:
-                games.screen.remove(rock)
+        if self.controls.is_pressed(games.K_q):
+            games.screen.quit()
 
-            # Create Game instance.
-            asteroblast = Gameplay()
-            # Defend these skies!
-            asteroblast.play()
+    def play_again(self):
+        # Ending screen is cleared beforehand.
+        self.clear_ending_screen()
 
-        if games.keyboard.is_pressed(games.K_q):
-            games.screen.quit()
+        for rock in self.debris_left:
+            games.screen.remove(rock)
+        # Don't keep the previous game's belt alive.
+        self.debris_left = []
+
+        # Create Game instance.
+        asteroblast = Gameplay(controls=self.controls)
+        # Defend these skies!
+        asteroblast.play()
 
     # Screen shall be cleared and dummy pixel removed before game start.
     def clear_ending_screen(self):
@@ -1187,19 +1453,308 @@ class EndingScreen(games.Sprite):
         self.destroy()
 
 
+# Event subscribers.
+
+# Scoring.
+def add_points(debris):
+    debris.game.score.value += debris.points()
+
+
+# Level flow -- the belt is about to go, start building the next one...
+def prefetch_level(debris):
+    game = debris.game
+    if game.next_level is None and not game.over and len(game.belt) <= Gameplay.PREFETCH_BELOW:
+        game.prefetch_next_level()
+
+
+# ... and once it's gone, on to the next level (unless the game is over).
+def clear_level(game):
+    if not game.over and not game.belt:
+        game.advance()
+
+
+# No next level after all.
+def drop_prefetch(ship):
+    if ship.game.next_level is not None:
+        PREFETCHER.cancel(ship.game.next_level)
+        ship.game.next_level = None
+
+
+# HUD -- display the new level number.
+def show_depth(game):
+    games.screen.remove(game.depth_txt)
+    game.depth_txt = games.Text(
+        value=f"Depth: {game.depth}",
+        size=25,
+        color=color.gray,
+        x=SCREEN_WIDTH_CENTER,
+        y=Gameplay.TEXT_HEIGHT,
+        is_collideable=False
+    )
+    games.screen.add(game.depth_txt)
+
+
+# Audio.
+def play_explosion(sprite):
+    Bumper.SOUND.get().play()
+
+
+def play_shot(blast):
+    Blast.SOUND.get().play()
+
+
+def play_thrust(ship):
+    Spacecraft.SOUND.get().play()
+
+
+def play_advance(game):
+    Gameplay.ADVANCE_SOUND.get().play()
+
+
+# Metrics -- file the finished run (and close its session log).
+def file_results(ship):
+    ship.game.finish()
+    if Gameplay.SESSIONS is not None:
+        Gameplay.SESSIONS.end(ship.game)
+
+
+EVENTS.subscribe(DEBRIS_DESTROYED, add_points)
+EVENTS.subscribe(DEBRIS_DESTROYED, prefetch_level)
+EVENTS.subscribe(LEVEL_CLEARED, clear_level)
+EVENTS.subscribe(LEVEL_STARTED, show_depth)
+EVENTS.subscribe(LEVEL_STARTED, play_advance)
+EVENTS.subscribe(EXPLOSION, play_explosion)
+EVENTS.subscribe(SHOT_FIRED, play_shot)
+EVENTS.subscribe(THRUST, play_thrust)
+EVENTS.subscribe(SHIP_DESTROYED, file_results)
+EVENTS.subscribe(SHIP_DESTROYED, drop_prefetch)
+
+
 class GameHandler(games.Sprite):
     """Intro screen and gameplay wrapper."""
 
-    def __init__(self):
-        self.intro = IntroScreen()
+    def __init__(self, controls=None):
+        self.intro = IntroScreen(controls=controls)
         games.screen.add(self.intro)
 
 
-def main():
-    game = GameHandler()
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="asteroblast -- blast'em all and save the planet!")
+    parser.add_argument(
+        "--max-particles",
+        type=int,
+        default=ParticleSystem.MAX_PARTICLES,
+        help="cap of simultaneously displayed effects (exhaust, explosions)"
+    )
+    parser.add_argument(
+        "--record",
+        metavar="DIR",
+        help="record gameplay footage into given directory"
+    )
+    parser.add_argument(
+        "--record-format",
+        choices=FrameRecorder.FORMATS,
+        default="raw",
+        help="raw RGB frames in a single file or one compressed image per frame"
+    )
+    parser.add_argument(
+        "--record-every",
+        type=int,
+        default=1,
+        help="record every N-th frame only"
+    )
+    parser.add_argument(
+        "--no-gc-scheduler",
+        action="store_true",
+        help="leave garbage collection to Python instead of frame slack time"
+    )
+    parser.add_argument(
+        "--results",
+        metavar="DIR",
+        help="file every finished game into a results store (see results.py)"
+    )
+    parser.add_argument(
+        "--sessions",
+        metavar="DIR",
+        help="log every game as a replayable session (seed and inputs, see dataset.py)"
+    )
+    parser.add_argument(
+        "--autopilot",
+        action="store_true",
+        help="let the built-in bot fly (demo and load generator)"
+    )
+    parser.add_argument(
+        "--no-quality-governor",
+        action="store_true",
+        help="keep full effects quality even when frames run late"
+    )
+    parser.add_argument(
+        "--profile-hitches",
+        metavar="DIR",
+        help="sample the main loop and save folded stacks of slow frames into DIR (F9 captures on demand)"
+    )
+    parser.add_argument(
+        "--hitch-ms",
+        type=float,
+        default=25.0,
+        help="frame time that counts as a hitch for --profile-hitches"
+    )
+    parser.add_argument(
+        "--no-prefetch",
+        action="store_true",
+        help="build each level's belt all at once when it starts instead of during the end of the previous one"
+    )
+    parser.add_argument(
+        "--no-batch-render",
+        action="store_true",
+        help="let every sprite blit itself instead of drawing all of them in one batch"
+    )
+    parser.add_argument(
+        "--threaded-sim",
+        action="store_true",
+        help="simulate on a worker thread while the main thread only renders finished frames"
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="log performance statistics on exit"
+    )
+    return parser.parse_args(argv)
+
+
+# Startup timings, milliseconds since the program has started.
+STARTUP = {}
+
+
+def note_first_frame(buffer):
+    STARTUP["first_frame_ms"] = 1000*(time.perf_counter() - STARTED)
+    LOOP.frame_listeners.remove(note_first_frame)
+
+
+def report_stats():
+    if ASSETS.finished:
+        # Since then, starting the game never waits for the disk.
+        STARTUP["playable_ms"] = 1000*(ASSETS.finished - STARTED)
+    STARTUP["blocked_on_assets_ms"] = 1000*ASSETS.blocked_time
+    STARTUP["blocked_on_assets"] = ASSETS.blocked_assets
+    log.info("startup: %s", STARTUP)
+    log.info("particles: %s", PARTICLES.stats())
+    if SCHEDULER.enabled:
+        log.info("frame scheduler: %s", SCHEDULER.stats())
+    log.info("frame pacing: %s", PACER.stats())
+    log.info("input latency: %s", KEYBOARD.latency.stats())
+    if QUALITY.enabled:
+        log.info("quality governor: %s", QUALITY.stats())
+    if LOOP.renderer and LOOP.renderer.frames:
+        log.info("renderer: %s", LOOP.renderer.stats())
+    log.info("damage: %s", DAMAGE.stats())
+    log.info("swept collisions: %s", COLLIDER.stats())
+    log.info("level prefetch: %s", PREFETCHER.stats())
+    log.info("events: %s", EVENTS.stats())
+
+
+# Empty screen and no leftovers of the previous game (batch tools play many games in a row).
+def clear_world():
+    # Screen.clear() removes while iterating and leaves every other sprite behind.
+    for sprite in list(games.screen.all_objects):
+        games.screen.remove(sprite)
+    PARTICLES.clear()
+    EVENTS.queue = []
+    DAMAGE.pending.clear()
+    COLLIDER.pending = []
+
+
+def make_autopilot():
+    return Autopilot(
+        blast_speed=Blast.VELOCITY_FACTOR,
+        blast_range=Blast.RANGE_PX
+    )
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(name)s: %(message)s")
+
+    PARTICLES.max_particles = args.max_particles
+
+    # The image writer is a forked process -- fork it while this one
+    # has no other threads yet (that could hold a lock the child needs).
+    recorder = None
+    if args.record:
+        recorder = FrameRecorder(
+            directory=args.record,
+            size=(WINDOW_WIDTH, WINDOW_HEIGHT),
+            image_format=args.record_format,
+            every=args.record_every
+        )
+
+    # Decode all assets in the background while the intro is on.
+    ASSETS.start()
+    LOOP.frame_listeners.append(note_first_frame)
+
+    if not args.no_gc_scheduler:
+        SCHEDULER.attach(LOOP)
+
+    if not args.no_quality_governor:
+        QUALITY.attach(LOOP)
+
+    if not args.no_prefetch:
+        PREFETCHER.attach(LOOP)
+
+    if args.no_batch_render:
+        LOOP.renderer = None
+
+    simulation = SimulationThread(LOOP) if args.threaded_sim else None
+
+    profiler = None
+    if args.profile_hitches:
+        profiler = HitchProfiler(directory=args.profile_hitches, threshold=args.hitch_ms/1000, controls=KEYBOARD)
+        profiler.attach(LOOP, simulation)
+
+    if recorder:
+        LOOP.frame_listeners.append(recorder.capture)
+
+    if args.results:
+        Gameplay.RESULTS = ResultsStore(args.results)
+
+    if args.sessions:
+        Gameplay.SESSIONS = SessionRecorder(args.sessions)
+        Gameplay.SESSIONS.attach(LOOP)
+
+    controls = None
+    if args.autopilot:
+        controls = make_autopilot()
+        controls.attach(LOOP)
+
+    game = GameHandler(controls=controls)
     # Run the actual game -- keep the screen running
     # by evoking the main loop.
-    games.screen.mainloop()
+    try:
+        if simulation:
+            # Converting images must not race with the blits here -- finish
+            # every asset on this thread before the worker makes any sprite.
+            ASSETS.wait()
+            simulation.run()
+        else:
+            LOOP.run()
+    finally:
+        ASSETS.shutdown()
+        if recorder:
+            recorder.close()
+            log.info("recorder: %s", recorder.stats())
+        if Gameplay.RESULTS:
+            Gameplay.RESULTS.close()
+        if Gameplay.SESSIONS:
+            Gameplay.SESSIONS.close()
+            log.info("sessions: %s", Gameplay.SESSIONS.stats())
+        if profiler:
+            profiler.detach()
+            log.info("hitch profiler: %s", profiler.stats())
+
+    if args.stats:
+        report_stats()
+        if simulation:
+            log.info("simulation thread: %s", simulation.stats())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,207 @@
+"""Built-in autopilot for asteroblast.
+
+The bot flies the craft through the same is_pressed() interface the keyboard
+offers: it aims at the nearest debris (leading moving targets), shoots
+whenever the blaster has cooled off and a rock is in the line of fire, and
+steers away from rocks on a collision course. It sees the belt through the
+game's spatial index, so thinking costs the same at any depth. Besides being a demo, it's a load generator that
+pushes the game to deep levels for profiling:
+
+    python autopilot.py --depth 50 --invulnerable --cprofile deep.prof
+    python asteroblast.py --autopilot
+"""
+
+# Include all necessary tools.
+import argparse
+import cProfile
+import logging
+import math
+import os
+import random
+import sys
+import time
+
+# https://pythonhosted.org/SuperWires/index.html
+from superwires import games
+
+from kinematics import heading
+
+log = logging.getLogger("asteroblast.autopilot")
+
+
+class Autopilot(object):
+    """Bot pilot. Keys it holds are recomputed after every frame."""
+
+    AIM_TOLERANCE = 4  # Degrees off target still good enough to shoot.
+    DANGER_PX = 110  # Rocks closer than that (plus their size) get evaded.
+    BIGGEST_RADIUS = 40  # Half the size of the biggest rock.
+    CRUISE_SPEED = 1.0  # Brake when going faster than that and there's nothing to evade.
+
+    def __init__(self, blast_speed, blast_range):
+        self.blast_speed = blast_speed
+        self.blast_range = blast_range
+
+        self.keys = set()
+        self.ship = None
+
+    def is_pressed(self, key):
+        return key in self.keys
+
+    def attach(self, loop):
+        """Think after every simulated frame of given GameLoop."""
+        loop.tick_listeners.append(self.think)
+
+    def find_ship(self):
+        if self.ship is not None and self.ship.screen is not None:
+            return self.ship
+
+        self.ship = None
+        for sprite in games.screen.all_objects:
+            if getattr(sprite, "controls", None) is self and hasattr(sprite, "game"):
+                self.ship = sprite
+                break
+        return self.ship
+
+    def think(self):
+        ship = self.find_ship()
+        if ship is None:
+            # Intro or ending screen -- (re)start the game.
+            self.keys = {games.K_s, games.K_a}
+            return
+
+        keys = set()
+        grid = ship.game.grid
+        direction = heading(ship.angle)
+
+        # Closest rock that is closing in on the ship.
+        threat = None
+        threat_distance = None
+        for distance, rock in grid.in_radius(ship.x, ship.y, Autopilot.DANGER_PX + Autopilot.BIGGEST_RADIUS):
+            dx, dy = grid.delta(ship.x, ship.y, rock)
+            closing = dx*(rock.dx - ship.dx) + dy*(rock.dy - ship.dy) < 0
+            if closing and distance < Autopilot.DANGER_PX + rock.width/2:
+                threat, threat_distance = (dx, dy), distance
+                break
+
+        nearest = grid.nearest(ship.x, ship.y)
+        if nearest is not None:
+            target_distance, rock = nearest
+            dx, dy = grid.delta(ship.x, ship.y, rock)
+
+            # Lead the target: aim where it will be once the blast gets there.
+            flight = target_distance/self.blast_speed
+            dx += rock.dx*flight
+            dy += rock.dy*flight
+
+            desired = math.degrees(math.atan2(dx, -dy)) % 360
+            error = (desired - ship.angle + 540) % 360 - 180
+
+            if abs(error) > 120 and ship.turn_around_delay == 0:
+                keys.add(games.K_t)
+            elif error > Autopilot.AIM_TOLERANCE/2:
+                keys.add(games.K_RIGHT)
+            elif error < -Autopilot.AIM_TOLERANCE/2:
+                keys.add(games.K_LEFT)
+
+            aimed = abs(error) <= Autopilot.AIM_TOLERANCE and target_distance <= self.blast_range
+            if ship.blaster_cooldown == 0 and (aimed or ship.target is not None):
+                keys.add(games.K_SPACE)
+
+        if threat is not None:
+            # Push away from the rock -- forward or in reverse, whichever faces away.
+            away_x = -threat[0]/max(threat_distance, 1)
+            away_y = -threat[1]/max(threat_distance, 1)
+            facing = direction[0]*away_x + direction[1]*away_y
+            if facing > 0.3:
+                keys.add(games.K_UP)
+            elif facing < -0.3:
+                keys.add(games.K_DOWN)
+        elif math.hypot(ship.dx, ship.dy) > Autopilot.CRUISE_SPEED:
+            keys.add(games.K_r)
+
+        self.keys = keys
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="asteroblast autopilot load generator")
+    parser.add_argument("--depth", type=int, default=50, help="stop once this depth is reached")
+    parser.add_argument("--max-frames", type=int, default=None, help="stop after that many frames anyway")
+    parser.add_argument("--invulnerable", action="store_true", help="rocks can't destroy the craft (load testing)")
+    parser.add_argument("--on-screen", action="store_true", help="open the game window instead of running headless")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--results", metavar="DIR", help="file finished games into a results store")
+    parser.add_argument("--cprofile", metavar="FILE", help="profile the run and save the stats to FILE")
+    args = parser.parse_args(argv)
+
+    if not args.on_screen:
+        os.environ.setdefault("ASTEROBLAST_HEADLESS", "1")
+    import asteroblast
+
+    logging.basicConfig(level=logging.INFO, format="%(name)s: %(message)s")
+    random.seed(args.seed)
+
+    asteroblast.Spacecraft.INVULNERABLE = args.invulnerable
+    if args.results:
+        asteroblast.Gameplay.RESULTS = asteroblast.ResultsStore(args.results)
+    pilot = asteroblast.make_autopilot()
+    pilot.attach(asteroblast.LOOP)
+    asteroblast.SCHEDULER.attach(asteroblast.LOOP)
+    asteroblast.PREFETCHER.attach(asteroblast.LOOP)
+
+    game = asteroblast.Gameplay(controls=pilot)
+    game.play()
+
+    # Per depth: frames flown and frame time spent there.
+    depth = game.depth
+    depth_frames = 0
+    depth_time = 0.0
+    depth_worst = 0.0
+
+    profiler = cProfile.Profile() if args.cprofile else None
+    if profiler:
+        profiler.enable()
+
+    frames = 0
+    started = time.perf_counter()
+    while True:
+        start = time.perf_counter()
+        asteroblast.LOOP.run(max_frames=1, throttle=False)
+        elapsed = time.perf_counter() - start
+        frames += 1
+
+        # Restarts from the ending screen create a new Gameplay.
+        if pilot.ship is not None and pilot.ship.game is not game:
+            game = pilot.ship.game
+
+        if game.depth != depth:
+            log.info(
+                "depth %d: %d frames, %.2f ms/frame avg, %.2f ms worst, %d sprites",
+                depth, depth_frames, 1000*depth_time/max(depth_frames, 1), 1000*depth_worst,
+                len(games.screen.all_objects)
+            )
+            depth, depth_frames, depth_time, depth_worst = game.depth, 0, 0.0, 0.0
+        depth_frames += 1
+        depth_time += elapsed
+        depth_worst = max(depth_worst, elapsed)
+
+        if depth >= args.depth or not games.screen.running:
+            break
+        if args.max_frames is not None and frames >= args.max_frames:
+            break
+
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(args.cprofile)
+
+    if asteroblast.Gameplay.RESULTS:
+        # The last game is still on -- file it as it stands.
+        if pilot.ship is not None:
+            game.finish()
+        asteroblast.Gameplay.RESULTS.close()
+
+    log.info("reached depth %d in %d frames (%.1f s wall time)", depth, frames, time.perf_counter() - started)
+    return 0 if depth >= args.depth else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+"""Benchmarks of asteroblast's hot paths, run headless.
+
+    python benchmark.py               # every case
+    python benchmark.py draw --depth 40
+    python benchmark.py transition --depths 10,50,200
+    python benchmark.py tunnel --steps 1,2,4
+
+Each case sets up its own scene and logs milliseconds per frame for the
+implementations it compares.
+"""
+
+# Include all necessary tools.
+import argparse
+import logging
+import math
+import os
+import random
+import statistics
+import sys
+import time
+
+# No window, no sound card -- numbers only.
+os.environ.setdefault("ASTEROBLAST_HEADLESS", "1")
+
+# https://pythonhosted.org/SuperWires/index.html
+from superwires import games
+
+import asteroblast
+from render import BatchRenderer
+from simthread import SimulationThread
+
+log = logging.getLogger("asteroblast.benchmark")
+
+
+class IdleControls(object):
+    """Nobody at the keyboard."""
+
+    def is_pressed(self, key):
+        return False
+
+
+def deep_scene(depth, blasts, seed=0):
+    """Gameplay at given depth with the belts of all previous levels still flying."""
+    asteroblast.clear_world()
+    random.seed(seed)
+    asteroblast.ASSETS.wait()
+
+    game = asteroblast.Gameplay(controls=IdleControls(), seed=seed)
+    game.play()
+    while game.depth < depth:
+        game.advance()
+
+    for _ in range(blasts):
+        games.screen.add(asteroblast.Blast(
+            craft_x=random.randrange(asteroblast.WINDOW_WIDTH),
+            craft_y=random.randrange(asteroblast.WINDOW_HEIGHT),
+            craft_angle=random.randrange(0, 360, asteroblast.Spacecraft.TURN_FACTOR),
+            grid=game.grid
+        ))
+    return game
+
+
+def timed(frames, draw):
+    screen = games.screen
+    start = time.perf_counter()
+    for _ in range(frames):
+        screen.new_dirties = []
+        screen.buffer.blit(screen._real_background, (0, 0))
+        draw()
+    return 1000*(time.perf_counter() - start)/frames
+
+
+def bench_draw(args):
+    """Per-sprite blits (superwires) against the batched render path."""
+    deep_scene(args.depth, args.blasts)
+    screen = games.screen
+    log.info("draw: depth %d, %d sprites on the screen", args.depth, len(screen.all_objects))
+
+    def per_sprite():
+        for sprite in screen.all_objects:
+            sprite._draw()
+
+    grouped = BatchRenderer(group_surfaces=True)
+    ordered = BatchRenderer(group_surfaces=False)
+
+    results = [
+        ("per-sprite blits", timed(args.frames, per_sprite)),
+        ("batched, z-ordered", timed(args.frames, lambda: ordered.draw(screen))),
+        ("batched, grouped by surface", timed(args.frames, lambda: grouped.draw(screen))),
+    ]
+    baseline = results[0][1]
+    for name, ms in results:
+        log.info("  %-28s %6.3f ms/frame  %4.2fx", name, ms, baseline/ms)
+    log.info("  %d distinct surfaces", len({sprite._rot_image for sprite in screen.all_objects
+                                              if hasattr(sprite, "_rot_image")}))
+
+
+def level_end(depth, seed):
+    """Gameplay at given depth with the last rock just shot down."""
+    asteroblast.clear_world()
+    asteroblast.ASSETS.wait()
+
+    game = asteroblast.Gameplay(controls=IdleControls(), seed=seed)
+    game.play()
+    for rock in list(game.belt):
+        game.belt.remove(rock)
+        game.grid.remove(rock)
+        games.screen.remove(rock)
+    game.depth = depth - 1
+    return game
+
+
+def transition_frame(game):
+    """Milliseconds spent starting the next level, and on the whole frame it happens in."""
+    start = time.perf_counter()
+    game.advance()
+    advanced = time.perf_counter()
+    asteroblast.LOOP.run(max_frames=1, throttle=False)
+    return 1000*(advanced - start), 1000*(time.perf_counter() - start)
+
+
+def idle_tail(depth, seed, frames, threaded):
+    """Level end played in real time with the next belt in the making.
+    Returns whether the prefetch got done in idle frame time."""
+    game = level_end(depth, seed)
+    game.prefetch_next_level()
+    if threaded:
+        SimulationThread(asteroblast.LOOP).run(max_frames=frames)
+    else:
+        asteroblast.LOOP.run(max_frames=frames)
+    done = game.next_level.done
+    game.advance()
+    return done
+
+
+def bench_transition(args):
+    """Level transition frame: the whole belt built at once against a prefetched one."""
+    log.info("transition: median of %d transitions per depth (garbage collection at transitions not included)",
+             args.transitions)
+    for depth in args.depths:
+        at_once, prefetched, prepare = [], [], []
+        for seed in range(args.transitions):
+            game = level_end(depth, seed)
+            at_once.append(transition_frame(game))
+
+            game = level_end(depth, seed)
+            game.prefetch_next_level()
+            start = time.perf_counter()
+            game.next_level.prepare(deadline=float("inf"))
+            prepare.append(1000*(time.perf_counter() - start))
+            prefetched.append(transition_frame(game))
+
+        advance_at_once = statistics.median(ms for ms, _ in at_once)
+        advance_prefetched = statistics.median(ms for ms, _ in prefetched)
+        log.info(
+            "  depth %3d: level start %6.3f ms at once, %6.3f ms prefetched (%4.1fx) --"
+            " transition frame %6.3f / %6.3f ms, prefetch work %6.3f ms spread over idle frames",
+            depth,
+            advance_at_once,
+            advance_prefetched,
+            advance_at_once/advance_prefetched,
+            statistics.median(ms for _, ms in at_once),
+            statistics.median(ms for _, ms in prefetched),
+            statistics.median(prepare)
+        )
+
+        # The same in real time, prefetching in the idle tail of frames.
+        prefetcher = asteroblast.PREFETCHER
+        prefetcher.attach(asteroblast.LOOP)
+        try:
+            done = {
+                threaded: sum(idle_tail(depth, seed, args.idle_frames, threaded) for seed in range(args.transitions))
+                for threaded in (False, True)
+            }
+        finally:
+            prefetcher.detach()
+        log.info("  depth %3d: prefetched within %d idle frames %d/%d times single-threaded, %d/%d with --threaded-sim",
+                 depth, args.idle_frames, done[False], args.transitions, done[True], args.transitions)
+
+
+def shot_at_rock(step, seed):
+    """One blast fired at one small rock, everything moving `step` frames' worth per frame.
+    Returns True if the rock was hit."""
+    asteroblast.clear_world()
+    asteroblast.ASSETS.wait()
+    rng = random.Random(seed)
+
+    game = asteroblast.Gameplay(controls=IdleControls(), seed=seed)
+    game.play()
+    games.screen.remove(game.spacecraft)
+    for rock in list(game.belt):
+        game.belt.remove(rock)
+        game.grid.remove(rock)
+        games.screen.remove(rock)
+
+    x = rng.uniform(0, asteroblast.WINDOW_WIDTH)
+    y = rng.uniform(0, asteroblast.WINDOW_HEIGHT)
+    rock = asteroblast.Debris(game=game, x=x, y=y, size=asteroblast.Debris.SMALL, rng=rng)
+
+    # Aimed at where the rock will be, from anywhere within range.
+    angle = rng.uniform(0, 360)
+    distance = rng.uniform(20, asteroblast.Blast.RANGE_PX - asteroblast.Blast.SPAWN_BUFFER_PX - 20)
+    flight = distance/asteroblast.Blast.VELOCITY_FACTOR
+    towards = (math.sin(math.radians(angle)), -math.cos(math.radians(angle)))
+    blast = asteroblast.Blast(
+        craft_x=x + rock.dx*flight - towards[0]*(distance + asteroblast.Blast.SPAWN_BUFFER_PX),
+        craft_y=y + rock.dy*flight - towards[1]*(distance + asteroblast.Blast.SPAWN_BUFFER_PX),
+        craft_angle=angle,
+        grid=game.grid
+    )
+    rock.dx *= step
+    rock.dy *= step
+    games.screen.add(rock)
+    blast.dx *= step
+    blast.dy *= step
+    blast.lifetime = -(-asteroblast.Blast.BLAST_LIFETIME//step)
+    games.screen.add(blast)
+
+    for _ in range(blast.lifetime + 1):
+        asteroblast.LOOP.run(max_frames=1, throttle=False)
+    return rock not in game.belt
+
+
+def bench_tunnel(args):
+    """Blasts against small rocks at coarser time steps -- overlap checks alone and swept."""
+    log.info("tunnel: %d shots at small rocks per time step (step N: N frames of motion per frame)", args.shots)
+    collider = asteroblast.COLLIDER
+    enabled = collider.enabled
+    invulnerable = asteroblast.Spacecraft.INVULNERABLE
+    asteroblast.Spacecraft.INVULNERABLE = True
+    try:
+        for step in args.steps:
+            hits = {}
+            for swept in (False, True):
+                collider.enabled = swept
+                hits[swept] = sum(shot_at_rock(step, seed) for seed in range(args.shots))
+            log.info("  step %d (%2d Hz): %5.1f%% hit with overlaps only, %5.1f%% swept",
+                     step, round(games.screen.fps/step), 100*hits[False]/args.shots, 100*hits[True]/args.shots)
+
+        # What sweeping costs in a busy scene.
+        collider.enabled = True
+        deep_scene(args.depth, args.blasts)
+        before = collider.stats()
+        frame_ms = timed(args.frames, lambda: asteroblast.LOOP.run(max_frames=1, throttle=False))
+        after = collider.stats()
+        log.info("  depth %d, %d blasts: sweeps take %.3f of %.3f ms/frame",
+                 args.depth, args.blasts, (after["check_ms"] - before["check_ms"])/args.frames, frame_ms)
+    finally:
+        collider.enabled = enabled
+        asteroblast.Spacecraft.INVULNERABLE = invulnerable
+
+
+def depth_list(text):
+    return [int(depth) for depth in text.split(",")]
+
+
+CASES = {
+    "draw": bench_draw,
+    "transition": bench_transition,
+    "tunnel": bench_tunnel,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="asteroblast benchmarks")
+    parser.add_argument("cases", nargs="*", choices=[[]] + list(CASES), default=[],
+                        help="cases to run (all by default)")
+    parser.add_argument("--frames", type=int, default=300, help="frames measured per implementation")
+    parser.add_argument("--depth", type=int, default=30, help="level depth of the scene")
+    parser.add_argument("--blasts", type=int, default=20, help="blasts flying in the scene")
+    parser.add_argument("--depths", type=depth_list, default=[10, 25, 50, 100, 200],
+                        help="comma separated level depths of the transition case")
+    parser.add_argument("--transitions", type=int, default=5, help="transitions measured per depth")
+    parser.add_argument("--idle-frames", type=int, default=30,
+                        help="real time frames the transition case gives the background prefetch")
+    parser.add_argument("--steps", type=depth_list, default=[1, 2, 4, 6],
+                        help="comma separated time steps of the tunnel case (frames of motion per frame)")
+    parser.add_argument("--shots", type=int, default=200, help="shots per time step of the tunnel case")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(name)s: %(message)s")
+
+    for name in args.cases or CASES:
+        CASES[name](args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
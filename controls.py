@@ -0,0 +1,158 @@
+# Include all necessary tools.
+import time
+
+# https://pythonhosted.org/SuperWires/index.html
+from superwires import games
+
+# Keys the game reacts to, each one a bit of the action mask.
+ACTION_KEYS = (
+    games.K_LEFT,
+    games.K_RIGHT,
+    games.K_UP,
+    games.K_DOWN,
+    games.K_t,
+    games.K_r,
+    games.K_SPACE,
+    games.K_f,
+    games.K_h,
+    games.K_v,
+    games.K_s,
+    games.K_q,
+    games.K_a,
+    games.K_ESCAPE,
+    games.K_F9,
+)
+BITS = {key: 1 << index for index, key in enumerate(ACTION_KEYS)}
+
+
+def percentile(values, share):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share*len(ordered)))]
+
+
+class InputLatency(object):
+    """Times key presses from the event to the entity reacting and to the screen.
+
+    A press starts the clock when its KEYDOWN event is taken off the queue
+    (pygame events carry no time of their own) or, with no event queue
+    (headless, patched keyboards), when a frame's snapshot first sees it.
+    The first is_pressed() answering yes is the update, the end of that
+    frame's presentation is the present. Presses nobody asked about by then
+    are counted as ignored, taps released before any snapshot saw them as missed.
+    """
+
+    HISTORY = 1024  # Latest presses kept for percentiles.
+
+    def __init__(self):
+        self.pending = {}
+        self.updated = {}
+
+        self.to_update = []
+        self.to_present = []
+        self.frames_to_present = []
+        self.ignored = 0
+        self.missed = 0
+
+    def key_event(self, key, when=None):
+        bit = BITS.get(key)
+        if bit is not None and bit not in self.pending:
+            self.pending[bit] = (time.perf_counter() if when is None else when, None)
+
+    def captured(self, pressed, down, frame):
+        """Snapshot taken -- `pressed` are bits that weren't down the frame before, `down` all of them."""
+        for bit, (when, seen) in list(self.pending.items()):
+            if seen is None and not down & bit:
+                # Pressed and released between two snapshots.
+                del self.pending[bit]
+                self.missed += 1
+
+        now = None
+        for bit in BITS.values():
+            if pressed & bit:
+                event = self.pending.get(bit)
+                if event is None:
+                    now = now or time.perf_counter()
+                    self.pending[bit] = (now, frame)
+                elif event[1] is None:
+                    self.pending[bit] = (event[0], frame)
+
+    def consumed(self, bit):
+        if bit in self.pending and bit not in self.updated:
+            self.updated[bit] = time.perf_counter()
+
+    def presented(self, frame):
+        if not self.pending:
+            return
+
+        now = time.perf_counter()
+        for bit, (when, seen) in list(self.pending.items()):
+            if seen is None:
+                # Event arrived, key state not caught up yet -- wait for the next snapshot.
+                continue
+            del self.pending[bit]
+
+            updated = self.updated.pop(bit, None)
+            if updated is None:
+                self.ignored += 1
+                continue
+            self._keep(self.to_update, updated - when)
+            self._keep(self.to_present, now - when)
+            self._keep(self.frames_to_present, frame - seen)
+
+    def _keep(self, values, value):
+        values.append(value)
+        if len(values) > InputLatency.HISTORY:
+            del values[0]
+
+    def stats(self):
+        return {
+            "presses": len(self.to_present),
+            "ignored": self.ignored,
+            "missed": self.missed,
+            "event_to_update_p50_ms": 1000*percentile(self.to_update, 0.5),
+            "event_to_update_p95_ms": 1000*percentile(self.to_update, 0.95),
+            "event_to_present_p50_ms": 1000*percentile(self.to_present, 0.5),
+            "event_to_present_p95_ms": 1000*percentile(self.to_present, 0.95),
+            "event_to_present_p99_ms": 1000*percentile(self.to_present, 0.99),
+            "frames_to_present_max": max(self.frames_to_present, default=0),
+        }
+
+
+class InputSnapshot(object):
+    """Keyboard state read once per frame into an action bitmask.
+
+    Everything steered by the local keyboard asks this object instead of
+    games.keyboard, so one frame sees one consistent set of keys, however
+    many entities ask and in whatever order. Keys outside ACTION_KEYS are
+    still answered, straight from the keyboard.
+    """
+
+    def __init__(self, source=None, latency=None):
+        self.source = source
+        self.latency = latency
+        self.mask = 0
+
+    def capture(self, frame=0):
+        """Read the source; called by the game loop at the start of each frame."""
+        source = self.source or games.keyboard
+        previous = self.mask
+        mask = 0
+        for key, bit in BITS.items():
+            if source.is_pressed(key):
+                mask |= bit
+        self.mask = mask
+
+        if self.latency is not None and (mask & ~previous or self.latency.pending):
+            self.latency.captured(mask & ~previous, mask, frame)
+
+    def is_pressed(self, key):
+        bit = BITS.get(key)
+        if bit is None:
+            return (self.source or games.keyboard).is_pressed(key)
+        if self.mask & bit:
+            if self.latency is not None and self.latency.pending:
+                self.latency.consumed(bit)
+            return True
+        return False
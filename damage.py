@@ -0,0 +1,53 @@
+class DamageResolver(object):
+    """Collects the hits of a frame and applies them all at once.
+
+    Bumpers report what they've run into with hit() while the sprites are
+    being processed; resolve() then takes `structure` off every target --
+    once per frame, however many hits it took -- and lets those that have
+    none left die. Nothing is removed from the screen in the middle of the
+    sprite loop and a sprite can't die twice in one frame.
+
+    Every collideable sprite has a structure (ScreenWrapper defaults to 1).
+    """
+
+    def __init__(self):
+        # Target id -> [target, hits] of the running frame.
+        self.pending = {}
+
+        # Statistics.
+        self.frames = 0
+        self.hits = 0
+        self.kills = 0
+        self.busiest = 0
+
+    def hit(self, target, damage=1):
+        entry = self.pending.get(id(target))
+        if entry is None:
+            self.pending[id(target)] = [target, damage]
+        else:
+            entry[1] += damage
+
+    def resolve(self):
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, {}
+
+        self.frames += 1
+        self.busiest = max(self.busiest, len(pending))
+        for target, damage in pending.values():
+            self.hits += damage
+            # Already gone (destroyed by something else this frame).
+            if target.screen is None:
+                continue
+            target.structure -= damage
+            if target.structure <= 0:
+                self.kills += 1
+                target.die()
+
+    def stats(self):
+        return {
+            "frames_with_hits": self.frames,
+            "hits": self.hits,
+            "kills": self.kills,
+            "busiest_frame_targets": self.busiest,
+        }
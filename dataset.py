@@ -0,0 +1,353 @@
+"""Trajectory datasets -- recorded sessions replayed into memory-mapped arrays.
+
+    python asteroblast.py --autopilot --sessions sessions/
+    python dataset.py export sessions/ dataset/ --workers 8
+    python dataset.py show dataset/ 0 120
+
+Every session (see --sessions and the sessions module) is replayed headless
+and unthrottled on a process pool from its seed and logged inputs; the
+replay is checked against how the recorded game ended. Per frame, the ship's
+pose, the inputs, score and depth, every rock of the belt and the game events
+of the frame go into three files of fixed-size little-endian records:
+
+    frames.bin  FRAME  -- one per frame of every session, session after session
+    belt.bin    ROCK   -- rocks of a frame, at the frame's belt_start/belt_count
+    events.bin  EVENT  -- events of a frame, at the frame's event_start/event_count
+
+Starts are counted from the session's first record, index.json holds where
+each session's records begin (and the record formats and event kinds).
+Dataset maps the files and reads any frame of any session without loading
+or parsing anything else -- numpy.memmap with the same formats works too.
+"""
+
+# Include all necessary tools.
+import argparse
+import collections
+import json
+import logging
+import mmap
+import multiprocessing
+import os
+import shutil
+import struct
+import sys
+import time
+
+from sessions import ReplayControls, list_sessions, load_inputs
+
+log = logging.getLogger("asteroblast.dataset")
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+FRAME = struct.Struct("<IIfffffIIHBxIIII")
+FRAME_FIELDS = (
+    "session frame x y angle dx dy inputs score depth alive "
+    "belt_start belt_count event_start event_count"
+)
+ROCK = struct.Struct("<fffffBBH")
+ROCK_FIELDS = "x y angle dx dy tier size structure"
+EVENT = struct.Struct("<Bxxxff")
+EVENT_FIELDS = "kind x y"
+
+Frame = collections.namedtuple("Frame", FRAME_FIELDS)
+Rock = collections.namedtuple("Rock", ROCK_FIELDS)
+Event = collections.namedtuple("Event", EVENT_FIELDS)
+
+# Files of a dataset (and of a session's part while exporting) and their records.
+TABLES = (("frames", FRAME), ("belt", ROCK), ("events", EVENT))
+
+
+# Worker process side -- the game is imported once per worker.
+asteroblast = None
+EVENT_KINDS = ()
+INIT_ERROR = None
+
+
+def init_worker():
+    global asteroblast, EVENT_KINDS, INIT_ERROR
+    try:
+        # The game loads its assets relative to its own directory.
+        os.chdir(HERE)
+        os.environ["ASTEROBLAST_HEADLESS"] = "1"
+        logging.getLogger("asteroblast").setLevel(logging.WARNING)
+        import asteroblast
+        import events
+        EVENT_KINDS = event_kinds(events)
+        asteroblast.ASSETS.start()
+        asteroblast.ASSETS.wait()
+        # Idle loader threads would keep the worker from exiting.
+        asteroblast.ASSETS.shutdown()
+    except Exception as error:
+        # Raised from here, the pool would replace the worker with another
+        # one failing the same way, forever -- jobs fail instead.
+        INIT_ERROR = error
+
+
+def event_kinds(events):
+    """Event names in the order of their kind numbers."""
+    return tuple(
+        value for name, value in vars(events).items()
+        if name.isupper() and isinstance(value, str)
+    )
+
+
+def replay(job):
+    """Replay one session into part files. Returns (number, summary)."""
+    if INIT_ERROR is not None:
+        raise RuntimeError(f"worker failed to start: {INIT_ERROR!r}")
+    number, session, parts = job
+
+    # Nothing of the previous game may leak into this one.
+    asteroblast.clear_world()
+    asteroblast.Spacecraft.INVULNERABLE = session["invulnerable"]
+
+    # Events of the frame being simulated, with where they happened.
+    happened = []
+    game = None
+
+    def listener(kind):
+        def note(**data):
+            subject, = data.values()
+            # Level events are about the game -- they happen where the craft is.
+            if subject is game:
+                subject = game.spacecraft
+            happened.append(EVENT.pack(kind, subject.x, subject.y))
+        return note
+
+    listeners = [(name, listener(kind)) for kind, name in enumerate(EVENT_KINDS)]
+    for name, note in listeners:
+        asteroblast.EVENTS.subscribe(name, note)
+
+    loop = asteroblast.LOOP
+    controls = ReplayControls(load_inputs(session))
+    files = {table: open(os.path.join(parts, f"{session['name']}.{table}"), "wb") for table, _ in TABLES}
+    rocks = 0
+    events = 0
+    started = time.perf_counter()
+    try:
+        game = asteroblast.Gameplay(controls=controls, seed=session["seed"])
+        game.play()
+
+        for frame in range(session["frames"]):
+            loop.run(max_frames=1, throttle=False)
+
+            ship = game.spacecraft
+            files["frames"].write(FRAME.pack(
+                number,
+                frame,
+                ship.x,
+                ship.y,
+                ship.angle,
+                ship.dx,
+                ship.dy,
+                controls.mask,
+                game.score.value,
+                game.depth,
+                not game.over,
+                rocks,
+                len(game.belt),
+                events,
+                len(happened)
+            ))
+            for rock in game.belt:
+                files["belt"].write(ROCK.pack(rock.x, rock.y, rock.angle, rock.dx, rock.dy, rock.TIER, rock.size, rock.structure))
+            files["events"].write(b"".join(happened))
+            rocks += len(game.belt)
+            events += len(happened)
+            del happened[:]
+
+            controls.next_frame()
+    finally:
+        for name, note in listeners:
+            asteroblast.EVENTS.unsubscribe(name, note)
+        for file in files.values():
+            file.close()
+        asteroblast.PACER.leave_gameplay()
+
+    ended = {"over": game.over, "score": game.score.value, "depth": game.depth}
+    return number, {
+        "frames": session["frames"],
+        "rocks": rocks,
+        "events": events,
+        "replayed": ended,
+        "diverged": any(session[key] != value for key, value in ended.items()),
+        "frame_ms": 1000*(time.perf_counter() - started)/max(session["frames"], 1),
+    }
+
+
+# Main process side.
+def export(source, destination, workers):
+    """Replay every closed session in source into a dataset in destination."""
+    # Workers run from the game's directory.
+    source = os.path.abspath(source)
+    destination = os.path.abspath(destination)
+    sessions = list_sessions(source)
+    parts = os.path.join(destination, "parts")
+    os.makedirs(parts, exist_ok=True)
+
+    import events
+    kinds = event_kinds(events)
+
+    jobs = [(number, session, parts) for number, session in enumerate(sessions)]
+    log.info("%d sessions (%d frames) to replay on %d workers",
+             len(sessions), sum(session["frames"] for session in sessions), workers)
+
+    summaries = {}
+    if jobs:
+        context = multiprocessing.get_context("fork")
+        started = time.perf_counter()
+        with context.Pool(workers, initializer=init_worker) as pool:
+            try:
+                for done, (number, summary) in enumerate(pool.imap_unordered(replay, jobs), 1):
+                    summaries[number] = summary
+                    if summary["diverged"]:
+                        session = sessions[number]
+                        log.warning("%s: replay diverged -- recorded %s, replayed %s", session["name"],
+                                    {key: session[key] for key in summary["replayed"]}, summary["replayed"])
+                    if done % max(1, len(jobs)//10) == 0 or done == len(jobs):
+                        log.info("%d/%d sessions replayed (%.0f s)", done, len(jobs), time.perf_counter() - started)
+            finally:
+                # Let the workers finish on their own -- SDL turns SIGTERM into a quit event.
+                pool.close()
+                pool.join()
+
+    # One file per table, sessions in a row.
+    index = {
+        "formats": {table: record.format for table, record in TABLES},
+        "fields": {"frames": FRAME_FIELDS, "belt": ROCK_FIELDS, "events": EVENT_FIELDS},
+        "event_kinds": kinds,
+        "sessions": [],
+    }
+    bases = {"frames": 0, "belt": 0, "events": 0}
+    counts = {"frames": "frames", "belt": "rocks", "events": "events"}
+    outputs = {table: open(os.path.join(destination, f"{table}.bin"), "wb") for table, _ in TABLES}
+    try:
+        for number, session in enumerate(sessions):
+            summary = summaries[number]
+            index["sessions"].append({
+                "name": session["name"],
+                "seed": session["seed"],
+                "frames": session["frames"],
+                "score": session["score"],
+                "depth": session["depth"],
+                "diverged": summary["diverged"],
+                "bases": dict(bases),
+            })
+            for table, _ in TABLES:
+                part = os.path.join(parts, f"{session['name']}.{table}")
+                with open(part, "rb") as records:
+                    shutil.copyfileobj(records, outputs[table])
+                os.remove(part)
+                bases[table] += summary[counts[table]]
+    finally:
+        for output in outputs.values():
+            output.close()
+    os.rmdir(parts)
+
+    with open(os.path.join(destination, "index.json"), "w") as out:
+        json.dump(index, out, indent=2)
+
+    log.info("dataset: %d sessions, %d frames, %d rocks, %d events, %d diverged",
+             len(sessions), bases["frames"], bases["belt"], bases["events"],
+             sum(summary["diverged"] for summary in summaries.values()))
+    return index
+
+
+class Dataset(object):
+    """Random access to an exported dataset -- records are unpacked straight
+    from the memory-mapped files, only the ones asked for."""
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, "index.json")) as index:
+            self.index = json.load(index)
+        self.sessions = self.index["sessions"]
+        self.event_kinds = self.index["event_kinds"]
+
+        self.files = []
+        self.maps = {}
+        for table, _ in TABLES:
+            file = open(os.path.join(directory, f"{table}.bin"), "rb")
+            self.files.append(file)
+            # Empty files can't be mapped (and have nothing to read anyway).
+            if os.fstat(file.fileno()).st_size:
+                self.maps[table] = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.maps[table] = b""
+
+    def __len__(self):
+        """Frames of all sessions."""
+        return len(self.maps["frames"])//FRAME.size
+
+    def frame(self, session, number):
+        """Frame `number` of session `session` (index in self.sessions)."""
+        entry = self.sessions[session]
+        if not 0 <= number < entry["frames"]:
+            raise IndexError(f"session {session} has {entry['frames']} frames, not {number}")
+        offset = (entry["bases"]["frames"] + number)*FRAME.size
+        return Frame._make(FRAME.unpack_from(self.maps["frames"], offset))
+
+    def belt(self, session, number):
+        frame = self.frame(session, number)
+        start = self.sessions[session]["bases"]["belt"] + frame.belt_start
+        return [Rock._make(record) for record in self._records("belt", ROCK, start, frame.belt_count)]
+
+    def events(self, session, number):
+        frame = self.frame(session, number)
+        start = self.sessions[session]["bases"]["events"] + frame.event_start
+        return [Event._make(record) for record in self._records("events", EVENT, start, frame.event_count)]
+
+    def _records(self, table, record, start, count):
+        data = self.maps[table]
+        return [record.unpack_from(data, (start + index)*record.size) for index in range(count)]
+
+    def close(self):
+        for data in self.maps.values():
+            if isinstance(data, mmap.mmap):
+                data.close()
+        for file in self.files:
+            file.close()
+
+
+def show(directory, session, first, count):
+    dataset = Dataset(directory)
+    try:
+        entry = dataset.sessions[session]
+        log.info("%s: seed %d, %d frames, score %d, depth %d",
+                 entry["name"], entry["seed"], entry["frames"], entry["score"], entry["depth"])
+        for number in range(first, min(first + count, entry["frames"])):
+            frame = dataset.frame(session, number)
+            kinds = [dataset.event_kinds[event.kind] for event in dataset.events(session, number)]
+            log.info("%5d: ship (%6.1f, %6.1f) %5.1f deg, inputs %#06x, score %4d, depth %2d, %2d rocks%s",
+                     frame.frame, frame.x, frame.y, frame.angle, frame.inputs, frame.score, frame.depth,
+                     frame.belt_count, f", {' '.join(kinds)}" if kinds else "")
+    finally:
+        dataset.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="asteroblast trajectory datasets")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    exporting = commands.add_parser("export", help="replay recorded sessions into a dataset")
+    exporting.add_argument("sessions", help="directory of recorded sessions (see asteroblast.py --sessions)")
+    exporting.add_argument("dataset", help="directory the dataset is written into")
+    exporting.add_argument("--workers", type=int, default=multiprocessing.cpu_count(), help="worker processes")
+
+    showing = commands.add_parser("show", help="log frames of a session of a dataset")
+    showing.add_argument("dataset", help="dataset directory")
+    showing.add_argument("session", type=int, help="session number (order of the index)")
+    showing.add_argument("first", type=int, nargs="?", default=0, help="first frame")
+    showing.add_argument("count", type=int, nargs="?", default=60, help="frames to show")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(name)s: %(message)s")
+
+    if args.command == "export":
+        index = export(args.sessions, args.dataset, args.workers)
+        return 1 if any(session["diverged"] for session in index["sessions"]) else 0
+    show(args.dataset, args.session, args.first, args.count)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
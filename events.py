@@ -0,0 +1,53 @@
+# Include all necessary tools.
+import collections
+
+# What can happen in a game (and the keyword arguments subscribers get).
+DEBRIS_DESTROYED = "debris_destroyed"  # debris
+LEVEL_CLEARED = "level_cleared"  # game
+LEVEL_STARTED = "level_started"  # game
+SHOT_FIRED = "shot_fired"  # blast
+THRUST = "thrust"  # ship
+EXPLOSION = "explosion"  # sprite
+SHIP_DESTROYED = "ship_destroyed"  # ship
+
+
+class EventBus(object):
+    """Game event hub -- scoring, audio, HUD and metrics subscribe to what
+    happens instead of checking for it every frame.
+
+    publish() calls the subscribers right away. post() queues the event
+    until flush(), which the game loop calls after every frame -- for
+    reactions that mustn't run while sprites are being processed
+    (a new level spawning debris in the middle of a collision).
+    """
+
+    def __init__(self):
+        self.subscribers = {}
+        self.queue = []
+        self.counts = collections.Counter()
+
+    def subscribe(self, event, handler):
+        self.subscribers.setdefault(event, []).append(handler)
+
+    def unsubscribe(self, event, handler):
+        handlers = self.subscribers.get(event)
+        if handlers and handler in handlers:
+            handlers.remove(handler)
+
+    def publish(self, event, **data):
+        self.counts[event] += 1
+        for handler in self.subscribers.get(event, ()):
+            handler(**data)
+
+    def post(self, event, **data):
+        self.queue.append((event, data))
+
+    # Works as a GameLoop tick listener.
+    def flush(self):
+        while self.queue:
+            queue, self.queue = self.queue, []
+            for event, data in queue:
+                self.publish(event, **data)
+
+    def stats(self):
+        return dict(self.counts)
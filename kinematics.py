@@ -0,0 +1,32 @@
+"""Shared kinematics helpers.
+
+superwires measures angles in degrees, clockwise, with 0 pointing up, while
+the y axis grows downwards. Heading of a sprite is thus (sin(a), -cos(a)).
+Ship angles only ever change by whole degrees, so their unit vectors come
+from a table precomputed once instead of trigonometry in every frame.
+"""
+
+# Include all necessary tools.
+import math
+
+# Unit vectors for whole-degree angles 0..359.
+HEADINGS = tuple(
+    (math.sin(math.radians(angle)), -math.cos(math.radians(angle)))
+    for angle in range(360)
+)
+
+
+def heading(angle):
+    """Return the (x, y) unit vector a sprite rotated by angle faces."""
+    whole = int(angle)
+    if whole == angle:
+        return HEADINGS[whole % 360]
+
+    # Fractional angles are rare -- just compute those.
+    radians = math.radians(angle)
+    return math.sin(radians), -math.cos(radians)
+
+
+def ahead(x, y, direction, distance):
+    """Return the point distance pixels ahead of (x, y) along direction."""
+    return x + distance*direction[0], y + distance*direction[1]
@@ -0,0 +1,828 @@
+"""Local-loopback multiplayer for asteroblast.
+
+One authoritative server process simulates the belt, blasts and every ship.
+Clients send their key state each frame and render delta-compressed snapshots
+of the simulation. Transport is a datagram socket -- UDP on localhost or
+a Unix domain socket -- so everything runs on a single Linux box:
+
+    python netplay.py server
+    python netplay.py client
+    python netplay.py loopback --clients 2 --seconds 10
+"""
+
+# Include all necessary tools.
+import argparse
+import collections
+import itertools
+import logging
+import os
+import random
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+import weakref
+import zlib
+
+# The authoritative server never draws anything -- keep SDL away from
+# the display and the sound card before the game module initializes them.
+if __name__ == "__main__" and sys.argv[1:2] in (["server"], ["loopback"]):
+    os.environ.setdefault("ASTEROBLAST_HEADLESS", "1")
+
+# https://pythonhosted.org/SuperWires/index.html
+from superwires import games, color
+
+import asteroblast
+from controls import InputSnapshot
+from spatial import SpatialGrid
+
+log = logging.getLogger("asteroblast.netplay")
+
+DEFAULT_ADDRESS = "udp:127.0.0.1:47800"
+
+TICK_RATE = 60  # Simulation steps per second on the server.
+SNAPSHOT_INTERVAL = 3  # Simulation steps between two snapshots (20 Hz).
+CLIENT_TIMEOUT = 3.0  # Seconds of silence before the client gets dropped.
+HISTORY = 64  # Snapshots remembered for delta compression.
+MAX_DATAGRAM = 65507
+
+# Positions travel as 16-bit integers in quarter pixels,
+# angles as a single byte (1.4 degree steps).
+POSITION_SCALE = 4
+ANGLE_SCALE = 256/360
+
+# Packet types.
+INPUT = 1
+BYE = 2
+SNAPSHOT = 3
+
+# Snapshot flags.
+COMPRESSED = 1
+
+# Entity kinds.
+SHIP = 1
+DEBRIS = 2
+BLAST = 3
+
+# Changed entity field mask.
+F_KIND = 1
+F_X = 2
+F_Y = 4
+F_ANGLE = 8
+
+# Keys sent over the wire. Bit N of the action mask means NET_KEYS[N] is pressed.
+NET_KEYS = [
+    games.K_LEFT,
+    games.K_RIGHT,
+    games.K_UP,
+    games.K_DOWN,
+    games.K_t,
+    games.K_r,
+    games.K_SPACE,
+    games.K_f,
+    games.K_a,
+]
+
+INPUT_FORMAT = struct.Struct("<BIIdH")  # type, seq, ack tick, client time, actions
+SNAPSHOT_HEADER = struct.Struct("<IIdIHIHH")  # tick, baseline, echo time, score, depth, ship id, removed, changed
+ENTITY_HEADER = struct.Struct("<IB")  # id, field mask
+KIND_FORMAT = struct.Struct("<BB")  # kind, variant
+COORD_FORMAT = struct.Struct("<h")
+ANGLE_FORMAT = struct.Struct("<B")
+REMOVED_FORMAT = struct.Struct("<I")
+
+# Debris classes (and their images) in the order of their variant tier.
+DEBRIS_TIERS = [asteroblast.Debris, asteroblast.ToughDebris, asteroblast.SuperToughDebris]
+DEBRIS_IMAGES = [asteroblast.Debris.TIERS[debris.TIER].images for debris in DEBRIS_TIERS]
+
+
+def quantize_position(value):
+    return max(-32768, min(32767, int(round(value*POSITION_SCALE))))
+
+
+def quantize_angle(value):
+    return int(round(value*ANGLE_SCALE)) % 256
+
+
+def encode_actions(controls):
+    """Pack the state of NET_KEYS into an action bit mask."""
+    actions = 0
+    for bit, key in enumerate(NET_KEYS):
+        if controls.is_pressed(key):
+            actions |= 1 << bit
+
+    return actions
+
+
+def encode_snapshot(tick, baseline_tick, baseline, state, echo_time, score, depth, ship_id):
+    """Serialize state as a delta against baseline (an empty baseline gives a full snapshot).
+
+    Both state and baseline map entity id -> (kind, variant, x, y, angle) quantized tuples.
+    """
+    removed = [entity_id for entity_id in baseline if entity_id not in state]
+
+    changed = []
+    for entity_id, entity in state.items():
+        old = baseline.get(entity_id)
+        if old is None:
+            changed.append((entity_id, F_KIND | F_X | F_Y | F_ANGLE, entity))
+            continue
+
+        mask = 0
+        if old[0] != entity[0] or old[1] != entity[1]:
+            mask |= F_KIND
+        if old[2] != entity[2]:
+            mask |= F_X
+        if old[3] != entity[3]:
+            mask |= F_Y
+        if old[4] != entity[4]:
+            mask |= F_ANGLE
+        if mask:
+            changed.append((entity_id, mask, entity))
+
+    chunks = [SNAPSHOT_HEADER.pack(
+        tick, baseline_tick, echo_time, score, depth, ship_id, len(removed), len(changed)
+    )]
+    for entity_id in removed:
+        chunks.append(REMOVED_FORMAT.pack(entity_id))
+    for entity_id, mask, (kind, variant, x, y, angle) in changed:
+        chunks.append(ENTITY_HEADER.pack(entity_id, mask))
+        if mask & F_KIND:
+            chunks.append(KIND_FORMAT.pack(kind, variant))
+        if mask & F_X:
+            chunks.append(COORD_FORMAT.pack(x))
+        if mask & F_Y:
+            chunks.append(COORD_FORMAT.pack(y))
+        if mask & F_ANGLE:
+            chunks.append(ANGLE_FORMAT.pack(angle))
+
+    body = b"".join(chunks)
+    flags = 0
+    packed = zlib.compress(body, 1)
+    if len(packed) < len(body):
+        body = packed
+        flags |= COMPRESSED
+
+    return bytes((SNAPSHOT, flags)) + body
+
+
+def decode_snapshot(packet, baselines):
+    """Rebuild the full state from packet and the matching baseline.
+
+    Returns (header tuple, state, removed entities) or None if the baseline is unknown.
+    """
+    flags = packet[1]
+    body = packet[2:]
+    if flags & COMPRESSED:
+        body = zlib.decompress(body)
+
+    header = SNAPSHOT_HEADER.unpack_from(body, 0)
+    tick, baseline_tick, echo_time, score, depth, ship_id, n_removed, n_changed = header
+    offset = SNAPSHOT_HEADER.size
+
+    if baseline_tick:
+        if baseline_tick not in baselines:
+            return None
+        baseline = baselines[baseline_tick]
+    else:
+        baseline = {}
+    state = dict(baseline)
+
+    removed = {}
+    for _ in range(n_removed):
+        entity_id, = REMOVED_FORMAT.unpack_from(body, offset)
+        offset += REMOVED_FORMAT.size
+        entity = state.pop(entity_id, None)
+        if entity is not None:
+            removed[entity_id] = entity
+
+    for _ in range(n_changed):
+        entity_id, mask = ENTITY_HEADER.unpack_from(body, offset)
+        offset += ENTITY_HEADER.size
+        kind, variant, x, y, angle = state.get(entity_id, (0, 0, 0, 0, 0))
+        if mask & F_KIND:
+            kind, variant = KIND_FORMAT.unpack_from(body, offset)
+            offset += KIND_FORMAT.size
+        if mask & F_X:
+            x, = COORD_FORMAT.unpack_from(body, offset)
+            offset += COORD_FORMAT.size
+        if mask & F_Y:
+            y, = COORD_FORMAT.unpack_from(body, offset)
+            offset += COORD_FORMAT.size
+        if mask & F_ANGLE:
+            angle, = ANGLE_FORMAT.unpack_from(body, offset)
+            offset += ANGLE_FORMAT.size
+        state[entity_id] = (kind, variant, x, y, angle)
+
+    return header, state, removed
+
+
+def open_socket(address, server):
+    """Open a non-blocking datagram socket. Returns (socket, peer address, cleanup path)."""
+    scheme, _, rest = address.partition(":")
+
+    if scheme == "udp":
+        host, _, port = rest.rpartition(":")
+        peer = (host, int(port))
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        if server:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind(peer)
+        else:
+            sock.bind((host, 0))
+        cleanup = None
+    elif scheme == "unix":
+        peer = rest
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        # Unix datagram clients need an address of their own to get replies.
+        if server:
+            path = peer
+        else:
+            path = f"{peer}.client-{os.getpid()}"
+        if os.path.exists(path):
+            os.unlink(path)
+        sock.bind(path)
+        cleanup = path
+    else:
+        raise ValueError(f"Unknown address scheme: {address!r} (use udp:HOST:PORT or unix:PATH)")
+
+    sock.setblocking(False)
+    return sock, peer, cleanup
+
+
+class NetStats(object):
+    """Bandwidth and latency counters of one end of the connection."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.packets_sent = 0
+        self.packets_received = 0
+        self.full_snapshots = 0
+        self.delta_snapshots = 0
+        self.dropped_snapshots = 0
+        self.rtt = collections.deque(maxlen=512)
+        # Both ends run on one box and share the monotonic clock,
+        # so input packets can be timed one way too.
+        self.one_way = collections.deque(maxlen=512)
+
+    def sent(self, size):
+        self.bytes_sent += size
+        self.packets_sent += 1
+
+    def received(self, size):
+        self.bytes_received += size
+        self.packets_received += 1
+
+    @staticmethod
+    def percentile(samples, fraction):
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(fraction*len(ordered)))]
+
+    def summary(self):
+        elapsed = max(time.perf_counter() - self.started, 1e-6)
+        return {
+            "up_kBps": self.bytes_sent/elapsed/1024,
+            "down_kBps": self.bytes_received/elapsed/1024,
+            "packets_sent": self.packets_sent,
+            "packets_received": self.packets_received,
+            "full_snapshots": self.full_snapshots,
+            "delta_snapshots": self.delta_snapshots,
+            "dropped_snapshots": self.dropped_snapshots,
+            "rtt_p50_ms": 1000*self.percentile(self.rtt, 0.5),
+            "rtt_p95_ms": 1000*self.percentile(self.rtt, 0.95),
+            "one_way_p50_ms": 1000*self.percentile(self.one_way, 0.5),
+            "one_way_p95_ms": 1000*self.percentile(self.one_way, 0.95),
+        }
+
+
+class RemoteControls(object):
+    """Key state received from a client, exposed like games.keyboard."""
+
+    def __init__(self):
+        self.actions = 0
+
+    def is_pressed(self, key):
+        return bool(self.actions & (1 << NET_KEYS.index(key))) if key in NET_KEYS else False
+
+
+class NetSpacecraft(asteroblast.Spacecraft):
+    """Ship of a connected player. Its death does not end the shared game."""
+
+    def __init__(self, game, x, y, controls, player_id):
+        super(NetSpacecraft, self).__init__(game=game, x=x, y=y, controls=controls)
+        self.player_id = player_id
+
+    def die(self):
+        # Explode just like any other bumper, skip the ending screen.
+        super(asteroblast.Spacecraft, self).die()
+        self.remove_viewfinder()
+        self.remove_coordinates()
+        self.game.ships.pop(self.player_id, None)
+
+
+class SpawnPoint(object):
+    """Screen center -- debris spawn reference while no ship is alive."""
+
+    x = asteroblast.SCREEN_WIDTH_CENTER
+    y = asteroblast.SCREEN_HEIGHT_CENTER
+
+
+class SharedGameplay(asteroblast.Gameplay):
+    """Belt, score and depth shared by all connected ships."""
+
+    def __init__(self):
+        # Effects layer keeps explosions aging on the server too.
+        if asteroblast.PARTICLES.screen is None:
+            games.screen.add(asteroblast.PARTICLES)
+
+        self.depth = 0
+        # The shared game outlives any ship.
+        self.over = False
+        self.seed = random.randrange(2**31)
+        self.next_level = None
+        self.depth_txt = games.Text(value=None, size=0, color=color.gray)
+        self.belt = []
+        self.grid = SpatialGrid(asteroblast.WINDOW_WIDTH, asteroblast.WINDOW_HEIGHT)
+        self.score = games.Text(value=0, size=20, color=color.gray, is_collideable=False)
+
+        # Ships of the connected players, keyed by player id.
+        self.ships = {}
+
+    # Level layout is built around the first living ship.
+    @property
+    def spacecraft(self):
+        for ship in self.ships.values():
+            return ship
+        return SpawnPoint
+
+    def spawn_ship(self, player_id, controls):
+        ship = NetSpacecraft(
+            game=self,
+            x=asteroblast.SCREEN_WIDTH_CENTER,
+            y=asteroblast.SCREEN_HEIGHT_CENTER,
+            controls=controls,
+            player_id=player_id
+        )
+        games.screen.add(ship)
+        self.ships[player_id] = ship
+        return ship
+
+
+class ClientSession(object):
+    """Server side state of one connected client."""
+
+    def __init__(self, player_id, address):
+        self.player_id = player_id
+        self.address = address
+        self.controls = RemoteControls()
+        self.last_seq = 0
+        self.ack_tick = 0
+        self.echo_time = 0.0
+        self.last_heard = time.perf_counter()
+        self.stats = NetStats()
+
+
+class NetServer(object):
+    """Authoritative simulation of the shared belt."""
+
+    def __init__(self, address=DEFAULT_ADDRESS, tick_rate=TICK_RATE, snapshot_interval=SNAPSHOT_INTERVAL):
+        self.sock, _, self.cleanup = open_socket(address, server=True)
+        self.tick_rate = tick_rate
+        self.snapshot_interval = snapshot_interval
+
+        # The game's own loop simulates -- with every tick listener the game has.
+        # Nobody sits at the server's keyboard, ships read their client's keys.
+        self.loop = asteroblast.LOOP
+        self.loop.keyboard = InputSnapshot(source=RemoteControls())
+
+        self.game = SharedGameplay()
+        self.tick = 0
+        self.clients = {}
+        self.player_ids = itertools.count(1)
+
+        # Stable entity ids -- sprites are tagged the first time they are seen.
+        self.entity_ids = weakref.WeakKeyDictionary()
+        self.next_entity_id = itertools.count(1)
+
+        # Recently sent states, keyed by tick, serve as delta baselines.
+        self.history = collections.OrderedDict()
+
+        self.running = False
+
+    def entity_id(self, sprite):
+        entity_id = self.entity_ids.get(sprite)
+        if entity_id is None:
+            entity_id = next(self.next_entity_id)
+            self.entity_ids[sprite] = entity_id
+
+        return entity_id
+
+    def capture(self):
+        """Quantized state of all replicated sprites."""
+        state = {}
+        for sprite in games.screen.all_objects:
+            if isinstance(sprite, NetSpacecraft):
+                kind, variant = SHIP, sprite.player_id % 256
+            elif isinstance(sprite, asteroblast.Debris):
+                kind, variant = DEBRIS, DEBRIS_TIERS.index(type(sprite))*4 + sprite.size
+            elif isinstance(sprite, asteroblast.Blast):
+                kind, variant = BLAST, sprite.pos
+            else:
+                continue
+
+            state[self.entity_id(sprite)] = (
+                kind,
+                variant,
+                quantize_position(sprite.x),
+                quantize_position(sprite.y),
+                quantize_angle(sprite.angle)
+            )
+
+        return state
+
+    def receive(self):
+        while True:
+            try:
+                packet, address = self.sock.recvfrom(MAX_DATAGRAM)
+            except (BlockingIOError, InterruptedError):
+                return
+
+            client = self.clients.get(address)
+            if packet[0] == BYE:
+                if client:
+                    self.drop(client)
+                continue
+            if packet[0] != INPUT or len(packet) != INPUT_FORMAT.size:
+                continue
+
+            if client is None:
+                client = ClientSession(next(self.player_ids), address)
+                self.clients[address] = client
+                log.info("player %d joined from %s", client.player_id, address)
+            client.stats.received(len(packet))
+            client.last_heard = time.perf_counter()
+
+            _, seq, ack_tick, client_time, actions = INPUT_FORMAT.unpack(packet)
+            # Datagrams may come out of order -- only the newest input counts.
+            if seq <= client.last_seq:
+                continue
+            client.last_seq = seq
+            client.stats.one_way.append(time.perf_counter() - client_time)
+            client.ack_tick = max(client.ack_tick, ack_tick)
+            client.echo_time = client_time
+            client.controls.actions = actions
+
+            # Players without a ship get one as soon as they hit [a].
+            if client.player_id not in self.game.ships and client.controls.is_pressed(games.K_a):
+                self.game.spawn_ship(client.player_id, client.controls)
+
+    def drop(self, client):
+        log.info("player %d left: %s", client.player_id, client.stats.summary())
+        del self.clients[client.address]
+        ship = self.game.ships.pop(client.player_id, None)
+        if ship:
+            ship.remove_viewfinder()
+            ship.remove_coordinates()
+            ship.destroy()
+
+    def step(self):
+        """Advance the simulation by one tick. Nothing gets drawn.
+        Returns False if the screen has been quit in the meantime."""
+        if not self.loop.simulate():
+            return False
+
+        self.loop.frame += 1
+        self.tick += 1
+        return True
+
+    def broadcast(self):
+        state = self.capture()
+        self.history[self.tick] = state
+        while len(self.history) > HISTORY:
+            self.history.popitem(last=False)
+
+        for client in list(self.clients.values()):
+            baseline_tick = client.ack_tick if client.ack_tick in self.history else 0
+            baseline = self.history[baseline_tick] if baseline_tick else {}
+            ship = self.game.ships.get(client.player_id)
+
+            packet = encode_snapshot(
+                tick=self.tick,
+                baseline_tick=baseline_tick,
+                baseline=baseline,
+                state=state,
+                echo_time=client.echo_time,
+                score=self.game.score.value,
+                depth=self.game.depth,
+                ship_id=self.entity_id(ship) if ship else 0
+            )
+            if len(packet) > MAX_DATAGRAM:
+                log.warning("snapshot %d too big for a datagram (%d bytes)", self.tick, len(packet))
+                continue
+
+            try:
+                self.sock.sendto(packet, client.address)
+            except OSError:
+                # The peer went away -- the idle check will drop it.
+                continue
+
+            client.stats.sent(len(packet))
+            if baseline_tick:
+                client.stats.delta_snapshots += 1
+            else:
+                client.stats.full_snapshots += 1
+
+    def drop_idle(self):
+        now = time.perf_counter()
+        for client in list(self.clients.values()):
+            if now - client.last_heard > CLIENT_TIMEOUT:
+                self.drop(client)
+
+    def run(self, seconds=None, report_every=5.0):
+        """Serve at a fixed tick until stopped (or for given time)."""
+        self.running = True
+        games.screen.running = True
+        self.game.advance()
+
+        period = 1.0/self.tick_rate
+        started = next_tick = next_report = time.perf_counter()
+        try:
+            while self.running:
+                self.receive()
+                if not self.step():
+                    break
+                if self.tick % self.snapshot_interval == 0:
+                    self.broadcast()
+                self.drop_idle()
+
+                now = time.perf_counter()
+                if now >= next_report:
+                    for client in self.clients.values():
+                        log.info("player %d: %s", client.player_id, client.stats.summary())
+                    next_report = now + report_every
+                if seconds is not None and now - started >= seconds:
+                    break
+
+                next_tick += period
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    # Running late -- do not try to catch up in a burst.
+                    next_tick = time.perf_counter()
+        finally:
+            self.close()
+
+    def close(self):
+        self.running = False
+        self.sock.close()
+        if self.cleanup and os.path.exists(self.cleanup):
+            os.unlink(self.cleanup)
+
+
+class RandomControls(object):
+    """Random but sticky key presses. Lets loopback tests run unattended."""
+
+    def __init__(self, seed=None):
+        self.random = random.Random(seed)
+        self.held = set()
+
+    def is_pressed(self, key):
+        # Keep pressing [a], so the bot relaunches after every crash.
+        return key == games.K_a or key in self.held
+
+    def shuffle(self):
+        if self.random.random() < 0.1:
+            self.held = {key for key in NET_KEYS if self.random.random() < 0.3}
+
+
+class NetClient(games.Sprite):
+    """Sends local input to the server and mirrors the received snapshots."""
+
+    HUD_REFRESH = 30  # Frames between network stats display refreshes.
+
+    def __init__(self, address=DEFAULT_ADDRESS, random_input=False):
+        # The image parameter is necessary for games.Sprite creation,
+        # but it's totally unnecessary in such usage context.
+        super(NetClient, self).__init__(image=asteroblast.DUMMY_PXL, is_collideable=False)
+
+        self.sock, self.server, self.cleanup = open_socket(address, server=False)
+        self.random_input = random_input
+        if random_input:
+            self.controls = RandomControls(seed=os.getpid())
+        else:
+            self.controls = games.keyboard
+
+        self.seq = 0
+        self.server_tick = 0
+        self.baselines = collections.OrderedDict()
+        self.sprites = {}
+        self.ship_id = 0
+        self.stats = NetStats()
+        self.hud_cooldown = 0
+
+        # Images for every replicated entity kind and variant.
+        ship_image = asteroblast.Spacecraft.SPACECRAFT_IMG.get()
+        self.images = {(SHIP, variant): ship_image for variant in range(256)}
+        for tier, images in enumerate(DEBRIS_IMAGES):
+            for size, image in images.items():
+                self.images[(DEBRIS, tier*4 + size)] = image.get()
+        for frame, image in enumerate(asteroblast.Blast.ANIMATION_IMGS):
+            self.images[(BLAST, frame)] = image.get()
+
+        self.score_txt = games.Text(value=0, size=20, color=color.gray,
+                                    x=asteroblast.WINDOW_WIDTH-25, top=25, is_collideable=False)
+        self.depth_txt = games.Text(value="Depth: -", size=25, color=color.gray,
+                                    x=asteroblast.SCREEN_WIDTH_CENTER, y=asteroblast.Gameplay.TEXT_HEIGHT,
+                                    is_collideable=False)
+        self.net_txt = games.Text(value="connecting...", size=20, color=color.gray,
+                                  x=asteroblast.SCREEN_WIDTH_CENTER, y=575, is_collideable=False)
+        for item in (self.score_txt, self.depth_txt, self.net_txt):
+            games.screen.add(item)
+
+    def update(self):
+        if self.random_input:
+            self.controls.shuffle()
+        self.send_input()
+        self.receive()
+
+        if self.hud_cooldown == 0:
+            summary = self.stats.summary()
+            status = "" if self.ship_id else "[a] to launch   "
+            self.net_txt.value = (
+                f"{status}rtt {summary['rtt_p50_ms']:.1f} ms   "
+                f"down {summary['down_kBps']:.1f} kB/s   up {summary['up_kBps']:.1f} kB/s"
+            )
+            self.hud_cooldown = NetClient.HUD_REFRESH
+        self.hud_cooldown -= 1
+
+    def send_input(self):
+        self.seq += 1
+        packet = INPUT_FORMAT.pack(INPUT, self.seq, self.server_tick, time.perf_counter(), encode_actions(self.controls))
+        try:
+            self.sock.sendto(packet, self.server)
+        except OSError:
+            # Server is not up (yet) -- keep trying every frame.
+            return
+        self.stats.sent(len(packet))
+
+    def receive(self):
+        while True:
+            try:
+                packet = self.sock.recv(MAX_DATAGRAM)
+            except (BlockingIOError, InterruptedError, ConnectionRefusedError):
+                return
+
+            self.stats.received(len(packet))
+            if packet[0] != SNAPSHOT:
+                continue
+
+            decoded = decode_snapshot(packet, self.baselines)
+            if decoded is None:
+                self.stats.dropped_snapshots += 1
+                continue
+            header, state, removed = decoded
+            tick, baseline_tick, echo_time, score, depth, ship_id = header[:6]
+
+            # Late packets carry stale news.
+            if tick <= self.server_tick:
+                self.stats.dropped_snapshots += 1
+                continue
+
+            if baseline_tick:
+                self.stats.delta_snapshots += 1
+            else:
+                self.stats.full_snapshots += 1
+            if echo_time:
+                self.stats.rtt.append(time.perf_counter() - echo_time)
+
+            self.server_tick = tick
+            self.baselines[tick] = state
+            while len(self.baselines) > HISTORY:
+                self.baselines.popitem(last=False)
+
+            self.apply(state, removed, score, depth, ship_id)
+
+    def apply(self, state, removed, score, depth, ship_id):
+        # Sprites gone since the previous snapshot.
+        for entity_id in list(self.sprites):
+            if entity_id not in state:
+                sprite = self.sprites.pop(entity_id)
+                if entity_id in removed and removed[entity_id][0] in (SHIP, DEBRIS):
+                    asteroblast.PARTICLES.emit(asteroblast.Explosion.EFFECT, x=sprite.x, y=sprite.y)
+                games.screen.remove(sprite)
+
+        for entity_id, (kind, variant, x, y, angle) in state.items():
+            image = self.images.get((kind, variant), asteroblast.DUMMY_PXL)
+            x = x/POSITION_SCALE
+            y = y/POSITION_SCALE
+            angle = angle/ANGLE_SCALE
+
+            sprite = self.sprites.get(entity_id)
+            if sprite is None:
+                sprite = games.Sprite(image=image, x=x, y=y, angle=angle, is_collideable=False)
+                self.sprites[entity_id] = sprite
+                games.screen.add(sprite)
+                continue
+
+            # Touch only what has changed -- every setter re-rotates the image.
+            if sprite.image is not image:
+                sprite.image = image
+            if sprite.angle != angle:
+                sprite.angle = angle
+            if sprite.x != x:
+                sprite.x = x
+            if sprite.y != y:
+                sprite.y = y
+
+        if self.score_txt.value != score:
+            self.score_txt.value = score
+        if self.depth_txt.value != f"Depth: {depth}":
+            self.depth_txt.value = f"Depth: {depth}"
+        self.ship_id = ship_id
+
+    def close(self):
+        try:
+            self.sock.sendto(bytes((BYE,)), self.server)
+        except OSError:
+            pass
+        self.sock.close()
+        if self.cleanup and os.path.exists(self.cleanup):
+            os.unlink(self.cleanup)
+
+
+def run_client(args):
+    games.screen.background = asteroblast.ORBIT_BACKGROUND
+    games.screen.add(asteroblast.PARTICLES)
+
+    client = NetClient(address=args.address, random_input=args.random_input)
+    games.screen.add(client)
+
+    if args.seconds:
+        timer = threading.Timer(args.seconds, games.screen.quit)
+        timer.daemon = True
+        timer.start()
+
+    try:
+        games.screen.mainloop()
+    finally:
+        client.close()
+        log.info("client: %s", client.stats.summary())
+
+
+def run_loopback(args):
+    """Local server process plus a few headless bot clients."""
+    env = dict(os.environ, ASTEROBLAST_HEADLESS="1")
+    here = os.path.dirname(os.path.abspath(__file__))
+    script = os.path.abspath(__file__)
+
+    server = subprocess.Popen(
+        [sys.executable, script, "server", "--address", args.address, "--seconds", str(args.seconds + 2)],
+        cwd=here, env=env
+    )
+    time.sleep(1.0)
+    clients = [
+        subprocess.Popen(
+            [sys.executable, script, "client", "--address", args.address,
+             "--seconds", str(args.seconds), "--random-input"],
+            cwd=here, env=env
+        )
+        for _ in range(args.clients)
+    ]
+    for process in clients:
+        process.wait()
+    server.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="asteroblast local-loopback multiplayer")
+    parser.add_argument("mode", choices=["server", "client", "loopback"])
+    parser.add_argument("--address", default=DEFAULT_ADDRESS, help="udp:HOST:PORT or unix:PATH")
+    parser.add_argument("--seconds", type=float, default=None, help="stop after given time")
+    parser.add_argument("--tick-rate", type=int, default=TICK_RATE, help="server simulation steps per second")
+    parser.add_argument("--snapshot-interval", type=int, default=SNAPSHOT_INTERVAL,
+                        help="simulation steps between snapshots")
+    parser.add_argument("--clients", type=int, default=2, help="bot clients started by loopback mode")
+    parser.add_argument("--random-input", action="store_true", help="steer with random key presses")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(name)s: %(message)s")
+
+    if args.mode == "server":
+        NetServer(args.address, args.tick_rate, args.snapshot_interval).run(seconds=args.seconds)
+    elif args.mode == "client":
+        run_client(args)
+    else:
+        if args.seconds is None:
+            args.seconds = 10
+        run_loopback(args)
+
+
+if __name__ == "__main__":
+    main()
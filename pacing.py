@@ -0,0 +1,98 @@
+# Include all necessary tools.
+import time
+
+import pygame
+
+
+class FramePacer(object):
+    """Sleeps the main loop until the next frame deadline.
+
+    Frame rate depends on what is on: full rate while flying, a low one on
+    the intro and ending screens and even lower when the window has lost
+    focus. Deadlines are kept on a fixed grid so frames don't drift;
+    the last moments before a deadline are spun through instead of slept
+    (only at rates where a late frame would show). Wall and CPU time are
+    accounted per state.
+    """
+
+    GAMEPLAY = "gameplay"
+    MENU = "menu"
+    UNFOCUSED = "unfocused"
+
+    MENU_FPS = 15  # Static screens only need to notice key presses.
+    UNFOCUSED_FPS = 5  # Nobody is looking.
+    SPIN = 0.001  # Seconds before a deadline spent spinning instead of sleeping.
+    SPIN_MIN_FPS = 30  # Slower rates aren't worth the spinning.
+
+    def __init__(self, fps, watch_focus=True):
+        self.rates = {
+            FramePacer.GAMEPLAY: fps,
+            FramePacer.MENU: min(fps, FramePacer.MENU_FPS),
+            FramePacer.UNFOCUSED: min(fps, FramePacer.UNFOCUSED_FPS),
+        }
+        self.watch_focus = watch_focus
+        self.gameplay = False
+
+        self.deadline = None
+
+        # Per state: [frames, wall seconds, CPU seconds].
+        self.usage = {state: [0, 0.0, 0.0] for state in self.rates}
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+
+    def enter_gameplay(self):
+        self.gameplay = True
+
+    def leave_gameplay(self):
+        self.gameplay = False
+
+    @property
+    def state(self):
+        if self.watch_focus and not pygame.key.get_focused():
+            return FramePacer.UNFOCUSED
+        if self.gameplay:
+            return FramePacer.GAMEPLAY
+        return FramePacer.MENU
+
+    def wait(self):
+        """Called after a frame is presented -- returns when the next one is due."""
+        state = self.state
+        fps = self.rates[state]
+        period = 1.0/fps
+
+        now = time.perf_counter()
+        if self.deadline is None:
+            # Nothing to account before the first frame.
+            self._wall = now
+            self._cpu = time.process_time()
+        if self.deadline is None or now - self.deadline > period:
+            # First frame, a state change or a long hitch -- start a new grid.
+            self.deadline = now
+        self.deadline += period
+
+        spin = FramePacer.SPIN if fps >= FramePacer.SPIN_MIN_FPS else 0.0
+        remaining = self.deadline - time.perf_counter()
+        if remaining > spin:
+            time.sleep(remaining - spin)
+        while time.perf_counter() < self.deadline:
+            pass
+
+        # Whole frame (work plus waiting) goes to the state it was paced in.
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        usage = self.usage[state]
+        usage[0] += 1
+        usage[1] += wall - self._wall
+        usage[2] += cpu - self._cpu
+        self._wall = wall
+        self._cpu = cpu
+
+    def stats(self):
+        return {
+            state: {
+                "frames": frames,
+                "fps": frames/wall if wall else 0.0,
+                "cpu_percent": 100*cpu/wall if wall else 0.0,
+            }
+            for state, (frames, wall, cpu) in self.usage.items() if frames
+        }
@@ -0,0 +1,181 @@
+# Include all necessary tools.
+import time
+from array import array
+
+import pygame
+# https://pythonhosted.org/SuperWires/index.html
+from superwires import games
+
+
+class ParticleEffect(object):
+    """Frames and timing of a single visual effect (exhaust, explosion etc.)."""
+
+    def __init__(self, images, repeat_interval=1):
+        # Surfaces (or asset handles) -- they are shared by every instance of the effect.
+        self.images = list(images)
+        # Number of frames each image is displayed for.
+        self.repeat_interval = repeat_interval
+        # How long does the whole sequence last (in frames).
+        self.lifetime = len(self.images) * repeat_interval
+
+        # Rotated copies of the frames, keyed by (image index, angle).
+        # Ship angles are quantized by the turn factor, so this stays small.
+        self._rotations = {}
+
+    def frame(self, index, angle):
+        """Return (surface, half width, half height) of rotated frame."""
+        key = (index, angle)
+        rotated = self._rotations.get(key)
+        if rotated is None:
+            image = self.images[index]
+            # Asset handles get resolved once the frame is needed for the first time.
+            if hasattr(image, "get"):
+                image = image.get()
+            surface = pygame.transform.rotate(image, -angle)
+            rotated = (surface, surface.get_width()/2, surface.get_height()/2)
+            self._rotations[key] = rotated
+
+        return rotated
+
+
+class ParticleSystem(games.Sprite):
+    """Batched effects layer. All effect instances live in flat arrays."""
+
+    MAX_PARTICLES = 256  # Default cap of simultaneously displayed effects.
+
+    def __init__(self, max_particles=None):
+        # The image parameter is necessary for games.Sprite creation,
+        # but the layer draws its particles on its own.
+        super(ParticleSystem, self).__init__(
+            image=pygame.Surface((1, 1)),
+            is_collideable=False
+        )
+
+        if max_particles is None:
+            max_particles = ParticleSystem.MAX_PARTICLES
+        self.max_particles = max_particles
+
+        # Registered effects -- particles refer to them by index.
+        self.effects = []
+
+        # Particle state, one slot per active effect instance.
+        self.px = array('d')
+        self.py = array('d')
+        self.pdx = array('d')
+        self.pdy = array('d')
+        self.pangle = array('i')
+        self.peffect = array('i')
+        self.page = array('i')  # Frames elapsed since spawn.
+        self.plifetime = array('i')  # Frames until removal.
+
+        # Statistics.
+        self.spawned = 0
+        self.dropped = 0
+        self.peak = 0
+        self.frames = 0
+        self.update_time = 0.0
+        self.draw_time = 0.0
+
+    def __len__(self):
+        return len(self.px)
+
+    def register(self, effect):
+        """Make the effect known to the system and return its index."""
+        if effect not in self.effects:
+            self.effects.append(effect)
+
+        return self.effects.index(effect)
+
+    def emit(self, effect, x, y, angle=0, dx=0, dy=0):
+        """Spawn new effect instance. Returns False if the cap has been hit."""
+        # Effects are eye candy -- rather skip them than let them eat the frame.
+        if len(self.px) >= self.max_particles:
+            self.dropped += 1
+            return False
+
+        self.px.append(x)
+        self.py.append(y)
+        self.pdx.append(dx)
+        self.pdy.append(dy)
+        self.pangle.append(int(angle) % 360)
+        self.peffect.append(self.register(effect))
+        self.page.append(0)
+        self.plifetime.append(effect.lifetime)
+
+        self.spawned += 1
+        self.peak = max(self.peak, len(self.px))
+        return True
+
+    def clear(self):
+        """Remove all active particles."""
+        for column in (self.px, self.py, self.pdx, self.pdy,
+                       self.pangle, self.peffect, self.page, self.plifetime):
+            del column[:]
+
+    # (surface, position) pairs of every particle, ready for Surface.blits().
+    def blits(self):
+        effects = self.effects
+        px, py = self.px, self.py
+        pangle, peffect, page = self.pangle, self.peffect, self.page
+
+        batch = []
+        for i in range(len(px)):
+            effect = effects[peffect[i]]
+            surface, half_w, half_h = effect.frame(page[i] // effect.repeat_interval, pangle[i])
+            batch.append((surface, (px[i] - half_w, py[i] - half_h)))
+        return batch
+
+    # Draw every particle with a single blits() call.
+    def _draw(self):
+        if not self.screen or not self.px:
+            return
+
+        start = time.perf_counter()
+        self.screen.buffer.blits(self.blits(), doreturn=False)
+        self.draw_time += time.perf_counter() - start
+
+    # Advance all particles in one pass.
+    def update(self):
+        self.frames += 1
+        if not self.px:
+            return
+
+        start = time.perf_counter()
+
+        px, py, pdx, pdy = self.px, self.py, self.pdx, self.pdy
+        page, plifetime = self.page, self.plifetime
+
+        # Move and age the particles. Expired slots are filled with the last
+        # active particle, so the arrays stay densely packed.
+        i = 0
+        while i < len(px):
+            plifetime[i] -= 1
+            if plifetime[i] <= 0:
+                self._swap_remove(i)
+                continue
+
+            px[i] += pdx[i]
+            py[i] += pdy[i]
+            page[i] += 1
+            i += 1
+
+        self.update_time += time.perf_counter() - start
+
+    def _swap_remove(self, i):
+        for column in (self.px, self.py, self.pdx, self.pdy,
+                       self.pangle, self.peffect, self.page, self.plifetime):
+            column[i] = column[-1]
+            column.pop()
+
+    def stats(self):
+        """Return particle counters and average cost per frame (ms)."""
+        frames = max(self.frames, 1)
+        return {
+            "active": len(self.px),
+            "peak": self.peak,
+            "cap": self.max_particles,
+            "spawned": self.spawned,
+            "dropped": self.dropped,
+            "update_ms": 1000 * self.update_time / frames,
+            "draw_ms": 1000 * self.draw_time / frames,
+        }
@@ -0,0 +1,122 @@
+# Include all necessary tools.
+import time
+
+
+class Prefetch(object):
+    """Items of an iterator, prepared ahead of time a few at a time."""
+
+    def __init__(self, items):
+        self.items = iter(items)
+        self.ready = []
+        self.done = False
+
+    def prepare(self, deadline):
+        """Prepare items until the deadline (perf_counter seconds) -- True once all are."""
+        ready = self.ready
+        for item in self.items:
+            ready.append(item)
+            if time.perf_counter() >= deadline:
+                break
+        else:
+            self.done = True
+        return self.done
+
+    def finish(self):
+        """All items -- whatever hasn't been prepared yet is prepared now."""
+        if not self.done:
+            self.ready.extend(self.items)
+            self.done = True
+        return self.ready
+
+
+class Prefetcher(object):
+    """Works on prefetches in the idle tail of frames.
+
+    After every simulated frame that came in under budget, the pending
+    prefetches get a slice of the frame time that is left. Detached, it
+    doesn't work in the background at all -- prefetches are then prepared
+    in one go when taken, which gives the same items, only later.
+    """
+
+    SHARE = 0.5  # Frames that took longer than this share of the budget have no idle tail.
+    SLICE = 0.002  # Most seconds of a frame spent prefetching.
+
+    def __init__(self, fps):
+        self.budget = 1.0/fps
+        self.loop = None
+        self.pending = []
+
+        # Statistics.
+        self.started = 0
+        self.complete = 0
+        self.partial = 0
+        self.cancelled = 0
+        self.background_time = 0.0
+        self.finish_time = 0.0
+
+    @property
+    def enabled(self):
+        return self.loop is not None
+
+    def attach(self, loop):
+        """Prefetch after simulated frames of given GameLoop."""
+        self.loop = loop
+        loop.tick_listeners.append(self.on_tick)
+
+    def detach(self):
+        if not self.enabled:
+            return
+        self.loop.tick_listeners.remove(self.on_tick)
+        self.loop = None
+
+    def start(self, items):
+        self.started += 1
+        prefetch = Prefetch(items)
+        if self.enabled:
+            self.pending.append(prefetch)
+        return prefetch
+
+    def take(self, prefetch):
+        """Everything the prefetch holds, ready to use."""
+        if prefetch in self.pending:
+            self.pending.remove(prefetch)
+        if prefetch.done:
+            self.complete += 1
+        else:
+            self.partial += 1
+        start = time.perf_counter()
+        items = prefetch.finish()
+        self.finish_time += time.perf_counter() - start
+        return items
+
+    def cancel(self, prefetch):
+        if prefetch in self.pending:
+            self.pending.remove(prefetch)
+        self.cancelled += 1
+
+    # Called after every simulated frame.
+    def on_tick(self):
+        if not self.pending:
+            return
+        # Measured from the start of the simulation -- with a SimulationThread,
+        # that's on this thread, while the main thread renders on its own.
+        now = time.perf_counter()
+        left = self.budget - (now - self.loop.sim_started)
+        if left < self.budget*(1 - Prefetcher.SHARE):
+            return
+
+        deadline = now + min(Prefetcher.SLICE, left - self.budget*(1 - Prefetcher.SHARE))
+        prefetch = self.pending[0]
+        if prefetch.prepare(deadline):
+            self.pending.pop(0)
+        self.background_time += time.perf_counter() - now
+
+    def stats(self):
+        return {
+            "started": self.started,
+            "complete": self.complete,
+            "partial": self.partial,
+            "cancelled": self.cancelled,
+            "background_ms": 1000*self.background_time,
+            "finish_ms": 1000*self.finish_time,
+        }
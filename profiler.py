@@ -0,0 +1,177 @@
+# Include all necessary tools.
+import collections
+import logging
+import os
+import sys
+import threading
+import time
+
+# https://pythonhosted.org/SuperWires/index.html
+from superwires import games
+
+log = logging.getLogger("asteroblast.profiler")
+
+
+class HitchProfiler(object):
+    """Sampling profiler of the main loop that only speaks up about slow frames.
+
+    A background thread samples the main thread's stack every INTERVAL
+    seconds. The samples of each frame are thrown away unless the frame took
+    longer than the threshold -- then they are saved as folded stacks
+    ("outer;inner;innermost count" lines, the input format of flamegraph.pl
+    and speedscope), one file per hitch. The hotkey records the next
+    CAPTURE_FRAMES frames into a single file no matter how fast they are.
+
+    With a SimulationThread, its thread is sampled too and every stack
+    starts with the name of its thread. A frame then keeps the samples of
+    the slowest simulation behind it besides its own.
+    """
+
+    INTERVAL = 0.001  # Seconds between two stack samples.
+    CAPTURE_FRAMES = 60  # Frames recorded after the hotkey.
+    HOTKEY = games.K_F9
+
+    def __init__(self, directory, threshold, controls=None):
+        self.directory = directory
+        self.threshold = threshold
+        self.controls = controls or games.keyboard
+        self.loop = None
+        self.simulation = None
+
+        self.samples = []
+        # Samples of the simulation thread not yet matched with a presented frame.
+        self.sim_samples = []
+        self.running = False
+        self.thread = None
+
+        # Hotkey capture in progress.
+        self.capture = None
+        self.capture_left = 0
+        self.capture_frame = 0
+        self.hotkey_down = False
+
+        # Statistics.
+        self.sampled = 0
+        self.hitches = 0
+        self.files = 0
+
+    @property
+    def enabled(self):
+        return self.loop is not None
+
+    def attach(self, loop, simulation=None):
+        """Start sampling and watching frames of given GameLoop (and its SimulationThread)."""
+        os.makedirs(self.directory, exist_ok=True)
+        self.loop = loop
+        self.simulation = simulation
+        loop.frame_listeners.append(self.on_frame)
+
+        self.running = True
+        self.thread = threading.Thread(target=self._sample, name="hitch-profiler", daemon=True)
+        self.thread.start()
+
+    def detach(self):
+        if not self.enabled:
+            return
+        self.running = False
+        self.thread.join()
+        self.loop.frame_listeners.remove(self.on_frame)
+        self.loop = None
+        self.simulation = None
+
+    # Sampler thread.
+    def _sample(self):
+        main = threading.main_thread().ident
+        while self.running:
+            frames = sys._current_frames()
+            taken = time.perf_counter()
+            if self.simulation is None:
+                stack = self._stack(frames.get(main))
+                if stack:
+                    # Swapping lists on the main thread is atomic -- appending to either is fine.
+                    self.samples.append((taken, stack))
+            else:
+                stack = self._stack(frames.get(main), "thread:main")
+                if stack:
+                    self.samples.append((taken, stack))
+                worker = self.simulation.thread
+                if worker is not None:
+                    stack = self._stack(frames.get(worker.ident), "thread:simulation")
+                    if stack:
+                        self.sim_samples.append((taken, stack))
+            del frames
+            time.sleep(HitchProfiler.INTERVAL)
+
+    @staticmethod
+    def _stack(frame, *root):
+        """Outermost first "module:function" names of a stack (empty without a frame)."""
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            module = os.path.splitext(os.path.basename(code.co_filename))[0]
+            stack.append(f"{module}:{getattr(code, 'co_qualname', code.co_name)}")
+            frame = frame.f_back
+        if not stack:
+            return ()
+        return root + tuple(reversed(stack))
+
+    # Called after every presented frame.
+    def on_frame(self, buffer):
+        loop = self.loop
+        started = loop.frame_started
+        elapsed = loop.frame_elapsed()
+        samples, self.samples = self.samples, []
+
+        # Samples taken while pacing waited for this frame belong to nobody.
+        samples = [stack for taken, stack in samples if taken >= started]
+        if self.simulation is not None:
+            samples.extend(self._slowest_simulation())
+        self.sampled += len(samples)
+
+        if self.capture is not None:
+            self.capture.extend(samples)
+            self.capture_left -= 1
+            if self.capture_left == 0:
+                self._save(f"capture-{self.capture_frame:07d}.folded", self.capture)
+                log.info("captured %d frames into %s", HitchProfiler.CAPTURE_FRAMES, self.directory)
+                self.capture = None
+        elif elapsed > self.threshold:
+            self.hitches += 1
+            self._save(f"hitch-{loop.frame:07d}-{1000*elapsed:.0f}ms.folded", samples)
+
+        # Hotkey starts a capture (once per press).
+        pressed = self.controls.is_pressed(HitchProfiler.HOTKEY)
+        if pressed and not self.hotkey_down and self.capture is None:
+            self.capture = []
+            self.capture_left = HitchProfiler.CAPTURE_FRAMES
+            self.capture_frame = loop.frame
+        self.hotkey_down = pressed
+
+    def _slowest_simulation(self):
+        """Simulation samples of the slowest simulated frame behind the presented one."""
+        loop = self.loop
+        if not loop.sim_time:
+            return []
+        start = loop.slow_sim_started
+        end = start + loop.sim_time
+        samples, self.sim_samples = self.sim_samples, []
+        # The worker simulates one frame after the other -- whatever it
+        # sampled after the end of this one belongs to frames still to be presented.
+        self.sim_samples[:0] = [(taken, stack) for taken, stack in samples if taken > end]
+        return [stack for taken, stack in samples if start <= taken <= end]
+
+    def _save(self, name, samples):
+        if not samples:
+            return
+        folded = collections.Counter(";".join(stack) for stack in samples)
+        with open(os.path.join(self.directory, name), "w") as out:
+            for stack, count in folded.most_common():
+                out.write(f"{stack} {count}\n")
+        self.files += 1
+
+    def stats(self):
+        return {
+            "samples": self.sampled,
+            "hitches": self.hitches,
+            "files": self.files,
+        }
@@ -0,0 +1,106 @@
+# Include all necessary tools.
+import logging
+
+log = logging.getLogger("asteroblast.quality")
+
+
+class QualityGovernor(object):
+    """Trades eye candy for smooth frames.
+
+    Watches a rolling average of frame time (work only, pacing sleeps
+    excluded). While it stays over budget, quality drops a level at a time;
+    once there is plenty of headroom again, levels come back one by one.
+
+    Levels and what each sheds on top of the previous ones:
+        0 -- nothing, full quality
+        1 -- spacecraft exhaust
+        2 -- half of the explosion animation frames
+        3 -- slower coordinates display refresh
+        4 -- blaster viewfinder
+    """
+
+    LEVELS = 4  # Lowest quality level.
+    WINDOW = 30  # Frames in the rolling average.
+    DEGRADE_AT = 0.9  # Average over this share of the budget sheds a level...
+    RESTORE_AT = 0.5  # ... under this one brings one back.
+    HOLD = 60  # Frames to wait after a change before judging again.
+    HUD_SLOWDOWN = 4  # Coordinates display refresh delay multiplier at level 3+.
+
+    def __init__(self, fps):
+        self.budget = 1.0/fps
+        self.loop = None
+        self.level = 0
+
+        self.samples = [0.0]*QualityGovernor.WINDOW
+        self.total = 0.0
+        self.index = 0
+        self.filled = 0
+        self.hold = 0
+
+        # Statistics.
+        self.changes = 0
+        self.worst_level = 0
+        self.frames_at = [0]*(QualityGovernor.LEVELS + 1)
+
+    @property
+    def enabled(self):
+        return self.loop is not None
+
+    def attach(self, loop):
+        """Start watching frames of given GameLoop."""
+        self.loop = loop
+        loop.frame_listeners.append(self.on_frame)
+
+    # What the game asks before spending time on eye candy.
+    @property
+    def exhaust(self):
+        return self.level < 1
+
+    @property
+    def short_explosions(self):
+        return self.level >= 2
+
+    @property
+    def hud_slowdown(self):
+        return QualityGovernor.HUD_SLOWDOWN if self.level >= 3 else 1
+
+    @property
+    def viewfinder(self):
+        return self.level < 4
+
+    # Called after every presented frame.
+    def on_frame(self, buffer):
+        elapsed = self.loop.frame_elapsed()
+        self.frames_at[self.level] += 1
+
+        self.total += elapsed - self.samples[self.index]
+        self.samples[self.index] = elapsed
+        self.index = (self.index + 1) % QualityGovernor.WINDOW
+        self.filled = min(self.filled + 1, QualityGovernor.WINDOW)
+
+        if self.hold:
+            self.hold -= 1
+            return
+        if self.filled < QualityGovernor.WINDOW:
+            return
+
+        average = self.total/QualityGovernor.WINDOW
+        if average > self.budget*QualityGovernor.DEGRADE_AT and self.level < QualityGovernor.LEVELS:
+            self._set_level(self.level + 1, average)
+        elif average < self.budget*QualityGovernor.RESTORE_AT and self.level > 0:
+            self._set_level(self.level - 1, average)
+
+    def _set_level(self, level, average):
+        log.info("quality level %d -> %d (frames avg %.1f ms)", self.level, level, 1000*average)
+        self.level = level
+        self.changes += 1
+        self.worst_level = max(self.worst_level, level)
+        self.hold = QualityGovernor.HOLD
+
+    def stats(self):
+        return {
+            "level": self.level,
+            "worst_level": self.worst_level,
+            "changes": self.changes,
+            "frames_at_level": list(self.frames_at),
+        }
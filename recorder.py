@@ -0,0 +1,177 @@
+# Include all necessary tools.
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import pygame
+
+
+def _encode_frames(directory, image_format, size, names, todo, done):
+    """Writer process -- saves frames from shared memory slots as images."""
+    blocks = [shared_memory.SharedMemory(name=name) for name in names]
+    surfaces = [pygame.image.frombuffer(block.buf, size, "RGB") for block in blocks]
+
+    while True:
+        item = todo.get()
+        if item is None:
+            break
+
+        frame, slot = item
+        pygame.image.save(surfaces[slot], os.path.join(directory, f"frame-{frame:07d}.{image_format}"))
+        # Hand the slot back for reuse.
+        done.put(slot)
+
+    # Surfaces keep the shared buffers exported -- let go of them first.
+    del surfaces
+    for block in blocks:
+        block.close()
+
+
+class FrameRecorder(object):
+    """Gameplay footage capture. Frames are copied into a pool of reusable
+    buffers on the main thread and written to disk in the background:
+    raw frames by a thread (file writes release the GIL), compressed images
+    by a separate process reading the buffers from shared memory.
+    If the writer falls behind, frames are dropped instead of stalling the game."""
+
+    FORMATS = ("raw", "png", "jpg")
+    POOL_SIZE = 8  # Number of reusable frame buffers.
+
+    def __init__(self, directory, size, image_format="raw", every=1, pool_size=None):
+        if image_format not in FrameRecorder.FORMATS:
+            raise ValueError(f"Unknown recording format: {image_format!r}")
+
+        self.directory = directory
+        self.size = tuple(size)
+        self.image_format = image_format
+        self.every = max(1, every)
+        if pool_size is None:
+            pool_size = FrameRecorder.POOL_SIZE
+
+        os.makedirs(directory, exist_ok=True)
+
+        self.frame = 0
+        self.captured = 0
+        self.written = 0
+        self.dropped = 0
+        self.capture_time = 0.0
+
+        # Indices of buffers ready to be filled.
+        self.free = queue.Queue()
+        for slot in range(pool_size):
+            self.free.put(slot)
+
+        if image_format == "raw":
+            self.blocks = []
+            self.surfaces = [pygame.Surface(self.size) for _ in range(pool_size)]
+
+            self.raw_file = open(os.path.join(directory, "frames.raw"), "wb")
+            self.pending = queue.Queue()
+            self.writer = threading.Thread(target=self._write_raw_frames, name="frame-recorder", daemon=True)
+        else:
+            width, height = self.size
+            self.blocks = [shared_memory.SharedMemory(create=True, size=width*height*3) for _ in range(pool_size)]
+            self.surfaces = [pygame.image.frombuffer(block.buf, self.size, "RGB") for block in self.blocks]
+
+            # Forked writer only touches pygame.image, never the display. Spawned,
+            # it would import the game's main module again (and open a window),
+            # so create the recorder before starting any threads instead.
+            context = multiprocessing.get_context("fork")
+            self.pending = context.Queue()
+            self.done = context.Queue()
+            self.writer = context.Process(
+                target=_encode_frames,
+                args=(directory, image_format, self.size, [block.name for block in self.blocks],
+                      self.pending, self.done),
+                name="frame-recorder",
+                daemon=True
+            )
+
+        self.writer.start()
+
+    # Collect buffers the writer process is finished with.
+    def _reclaim(self):
+        if self.image_format == "raw":
+            return
+
+        while True:
+            try:
+                slot = self.done.get_nowait()
+            except queue.Empty:
+                return
+            self.written += 1
+            self.free.put(slot)
+
+    # Called on the main thread after each presented frame.
+    def capture(self, surface):
+        self.frame += 1
+        if self.frame % self.every:
+            return
+
+        start = time.perf_counter()
+
+        self._reclaim()
+        try:
+            slot = self.free.get_nowait()
+        except queue.Empty:
+            # Writer is behind -- skip the frame, never block the game.
+            self.dropped += 1
+            return
+
+        self.surfaces[slot].blit(surface, (0, 0))
+        self.pending.put((self.frame, slot))
+        self.captured += 1
+
+        self.capture_time += time.perf_counter() - start
+
+    def _write_raw_frames(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                return
+
+            frame, slot = item
+            self.raw_file.write(pygame.image.tobytes(self.surfaces[slot], "RGB"))
+            self.written += 1
+
+            # Hand the buffer back for reuse.
+            self.free.put(slot)
+
+    def close(self):
+        """Flush queued frames and stop the writer."""
+        self.pending.put(None)
+        self.writer.join()
+        self._reclaim()
+
+        if self.image_format == "raw":
+            self.raw_file.close()
+        else:
+            del self.surfaces[:]
+            for block in self.blocks:
+                block.close()
+                block.unlink()
+
+        # Describe the footage so raw frames can be decoded later.
+        width, height = self.size
+        with open(os.path.join(self.directory, "recording.json"), "w") as meta:
+            json.dump({
+                "format": self.image_format,
+                "pixel_format": "RGB",
+                "width": width,
+                "height": height,
+                "every": self.every,
+                "frames": self.written,
+                "dropped": self.dropped,
+            }, meta, indent=2)
+
+    def stats(self):
+        return {
+            "captured": self.captured,
+            "written": self.written,
+            "dropped": self.dropped,
+            "capture_ms": 1000*self.capture_time/max(self.captured, 1),
+        }
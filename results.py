@@ -0,0 +1,222 @@
+"""Append-only columnar store of finished game runs.
+
+Every column lives in its own file of fixed-size binary values, so adding
+a run is a handful of small appends and a reader can stream any column
+in big chunks without touching the others:
+
+    python results.py runs/ --top 10 --by score
+    python results.py runs/ --group-by depth --column score
+"""
+
+# Include all necessary tools.
+import argparse
+import array
+import heapq
+import json
+import logging
+import math
+import os
+import sys
+
+log = logging.getLogger("asteroblast.results")
+
+# Column name -> array typecode. Fixed-width typecodes only -- stores move
+# between platforms and the schema file records nothing but typecodes.
+COLUMNS = (
+    ("seed", "q"),
+    ("score", "q"),
+    ("depth", "q"),
+    ("frames", "q"),
+    ("duration_s", "d"),
+    ("mean_frame_ms", "d"),
+    ("debris_left_tier1", "q"),
+    ("debris_left_tier2", "q"),
+    ("debris_left_tier3", "q"),
+    ("finished_at", "d"),
+)
+
+CHUNK = 65536  # Values read at once while streaming.
+
+
+class ResultsStore(object):
+    """Directory of column files plus a schema.json describing them."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+        schema_file = os.path.join(directory, "schema.json")
+        if os.path.exists(schema_file):
+            with open(schema_file) as schema:
+                self.columns = [tuple(column) for column in json.load(schema)["columns"]]
+        else:
+            self.columns = list(COLUMNS)
+            with open(schema_file, "w") as schema:
+                json.dump({"columns": self.columns}, schema, indent=2)
+
+        self.typecodes = dict(self.columns)
+        self.files = {}
+
+    def _path(self, name):
+        return os.path.join(self.directory, f"{name}.col")
+
+    def append(self, **row):
+        """Add one run. Missing columns are stored as zeros, unknown ones are an error."""
+        unknown = set(row) - set(self.typecodes)
+        if unknown:
+            raise ValueError(f"Unknown result columns: {', '.join(sorted(unknown))}")
+
+        if not self.files:
+            self._open()
+        for name, typecode in self.columns:
+            array.array(typecode, [row.get(name, 0)]).tofile(self.files[name])
+
+        # A run is tiny and rare -- make it durable right away.
+        for out in self.files.values():
+            out.flush()
+
+    def _open(self):
+        """Open every column for appending. A row torn by a crash is cut off
+        first -- appended after it, the columns that got part of it would
+        be off by one for good."""
+        rows = len(self)
+        for name, typecode in self.columns:
+            out = self.files[name] = open(self._path(name), "ab")
+            out.truncate(rows*array.array(typecode).itemsize)
+
+    def close(self):
+        for out in self.files.values():
+            out.close()
+        self.files.clear()
+
+    def __len__(self):
+        """Complete rows only -- a run cut short by a crash is ignored."""
+        counts = []
+        for name, typecode in self.columns:
+            try:
+                size = os.path.getsize(self._path(name))
+            except OSError:
+                size = 0
+            counts.append(size//array.array(typecode).itemsize)
+        return min(counts) if counts else 0
+
+    def column(self, name, chunk=CHUNK):
+        """Stream values of one column, `chunk` at a time."""
+        typecode = self.typecodes[name]
+        rows = len(self)
+        try:
+            source = open(self._path(name), "rb")
+        except FileNotFoundError:
+            return
+
+        with source:
+            while rows > 0:
+                values = array.array(typecode)
+                try:
+                    values.fromfile(source, min(chunk, rows))
+                except EOFError:
+                    pass
+                if not values:
+                    return
+                rows -= len(values)
+                yield from values
+
+    def value(self, name, row):
+        """Random access to a single value."""
+        typecode = self.typecodes[name]
+        itemsize = array.array(typecode).itemsize
+        with open(self._path(name), "rb") as source:
+            source.seek(row*itemsize)
+            values = array.array(typecode)
+            values.fromfile(source, 1)
+        return values[0]
+
+    def row(self, index):
+        return {name: self.value(name, index) for name, _ in self.columns}
+
+    def top(self, k, by="score"):
+        """Leaderboard -- the k best rows by given column, best first."""
+        best = heapq.nlargest(k, ((value, index) for index, value in enumerate(self.column(by))))
+        return [self.row(index) for _, index in best]
+
+    def aggregate(self, name):
+        """Count, min, max, mean and standard deviation of a column in one pass."""
+        return _summary(self.column(name))
+
+    def group_by(self, key, name):
+        """aggregate() of `name` for every distinct value of `key` column."""
+        groups = {}
+        for group, value in zip(self.column(key), self.column(name)):
+            stats = groups.get(group)
+            if stats is None:
+                stats = groups[group] = _Running()
+            stats.add(value)
+        return {group: groups[group].summary() for group in sorted(groups)}
+
+
+class _Running(object):
+    """Welford's running mean and variance."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.low = None
+        self.high = None
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta/self.count
+        self.m2 += delta*(value - self.mean)
+        if self.low is None or value < self.low:
+            self.low = value
+        if self.high is None or value > self.high:
+            self.high = value
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "min": self.low,
+            "max": self.high,
+            "mean": self.mean,
+            "stddev": math.sqrt(self.m2/self.count) if self.count else 0.0,
+        }
+
+
+def _summary(values):
+    stats = _Running()
+    for value in values:
+        stats.add(value)
+    return stats.summary()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="asteroblast run results")
+    parser.add_argument("directory")
+    parser.add_argument("--top", type=int, default=10, help="leaderboard size")
+    parser.add_argument("--by", default="score", help="leaderboard column")
+    parser.add_argument("--group-by", help="aggregate --column per distinct value of this column")
+    parser.add_argument("--column", default="score", help="column to aggregate per group")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(name)s: %(message)s")
+
+    store = ResultsStore(args.directory)
+    log.info("%d runs", len(store))
+
+    for place, row in enumerate(store.top(args.top, by=args.by), 1):
+        log.info("#%d %s", place, row)
+
+    for name, _ in store.columns:
+        log.info("%s: %s", name, store.aggregate(name))
+
+    if args.group_by:
+        for group, stats in store.group_by(args.group_by, args.column).items():
+            log.info("%s=%s: %s %s", args.group_by, group, args.column, stats)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
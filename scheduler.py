@@ -0,0 +1,152 @@
+# Include all necessary tools.
+import gc
+import logging
+import time
+
+log = logging.getLogger("asteroblast.scheduler")
+
+
+class FrameScheduler(object):
+    """Keeps Python's cyclic garbage collector out of the way of frames.
+
+    During gameplay automatic collection is off. Young generations are
+    collected in the slack left after a frame is done, full collections
+    happen at level transitions. Frames over budget are logged, together
+    with the collections that ran inside them -- frames that took long
+    because of a full collection asked for only at debug level.
+    """
+
+    SLACK_MIN = 0.002  # Seconds of slack needed to squeeze a collection in.
+    GEN1_EVERY = 30  # Slack collections between two generation-1 passes.
+    BACKLOG_FACTOR = 20  # Collect regardless of slack once generation 0 grows that many times its threshold.
+
+    def __init__(self, fps):
+        self.budget = 1.0/fps
+        self.loop = None
+        self.gameplay = False
+
+        self.frame = 0
+        self.slack_collections = 0
+
+        # Collections (generation numbers) that ran during current frame,
+        # and whether one of them was a full collection asked for.
+        self.frame_collections = []
+        self.frame_full_collect = False
+        self._gc_started = None
+        self.gc_time = 0.0
+
+        # Statistics.
+        self.hitches = 0
+        self.hitches_with_gc = 0
+        self.forced_collections = 0
+        self.full_collections = 0
+        self.full_collect_frames = 0
+        self.slack_time = 0.0
+        self.full_time = 0.0
+        self.worst_frame = 0.0
+
+    @property
+    def enabled(self):
+        return self.loop is not None
+
+    def attach(self, loop):
+        """Start watching frames of given GameLoop."""
+        self.loop = loop
+        loop.frame_listeners.append(self.on_frame)
+        gc.callbacks.append(self._gc_callback)
+
+    def detach(self):
+        if not self.enabled:
+            return
+        self.leave_gameplay()
+        self.loop.frame_listeners.remove(self.on_frame)
+        gc.callbacks.remove(self._gc_callback)
+        self.loop = None
+
+    def _gc_callback(self, phase, info):
+        if phase == "start":
+            self._gc_started = time.perf_counter()
+            self.frame_collections.append(info["generation"])
+        elif self._gc_started is not None:
+            self.gc_time += time.perf_counter() - self._gc_started
+            self._gc_started = None
+
+    def enter_gameplay(self):
+        if self.enabled and not self.gameplay:
+            self.gameplay = True
+            gc.disable()
+
+    def leave_gameplay(self):
+        if self.gameplay:
+            self.gameplay = False
+            gc.enable()
+
+    def full_collect(self):
+        """Collect everything -- the moment is a good one (a level transition)."""
+        if self.gameplay:
+            start = time.perf_counter()
+            gc.collect()
+            self.full_time += time.perf_counter() - start
+            self.full_collections += 1
+            self.frame_full_collect = True
+
+    # Called after every presented frame.
+    def on_frame(self, buffer):
+        self.frame += 1
+        elapsed = self.loop.frame_elapsed()
+        self.worst_frame = max(self.worst_frame, elapsed)
+
+        if elapsed > self.budget:
+            collections = ", ".join(f"gen{generation}" for generation in self.frame_collections) or "none"
+            if self.frame_full_collect:
+                # Paid for on purpose at a level transition -- not a hitch.
+                self.full_collect_frames += 1
+                log.debug("frame %d took %.1f ms (budget %.1f ms) with a full collection, gc: %s",
+                          self.frame, 1000*elapsed, 1000*self.budget, collections)
+            else:
+                self.hitches += 1
+                if self.frame_collections:
+                    self.hitches_with_gc += 1
+                log.warning(
+                    "frame %d took %.1f ms (budget %.1f ms), gc: %s",
+                    self.frame,
+                    1000*elapsed,
+                    1000*self.budget,
+                    collections
+                )
+        self.frame_collections = []
+        self.frame_full_collect = False
+
+        if not self.gameplay:
+            return
+
+        # Spend the rest of the frame time on young garbage.
+        slack = self.budget - elapsed
+        backlog = gc.get_count()[0] > gc.get_threshold()[0]*FrameScheduler.BACKLOG_FACTOR
+        if slack > FrameScheduler.SLACK_MIN or backlog:
+            if backlog and slack <= FrameScheduler.SLACK_MIN:
+                self.forced_collections += 1
+
+            start = time.perf_counter()
+            self.slack_collections += 1
+            generation = 1 if self.slack_collections % FrameScheduler.GEN1_EVERY == 0 else 0
+            gc.collect(generation)
+            self.slack_time += time.perf_counter() - start
+
+            # Those ran between frames, don't blame the next one.
+            self.frame_collections = []
+
+    def stats(self):
+        return {
+            "frames": self.frame,
+            "hitches": self.hitches,
+            "hitches_with_gc": self.hitches_with_gc,
+            "slack_collections": self.slack_collections,
+            "forced_collections": self.forced_collections,
+            "full_collections": self.full_collections,
+            "full_collect_frames": self.full_collect_frames,
+            "slack_gc_ms": 1000*self.slack_time,
+            "full_gc_ms": 1000*self.full_time,
+            "gc_ms": 1000*self.gc_time,
+            "worst_frame_ms": 1000*self.worst_frame,
+        }
@@ -0,0 +1,166 @@
+# Include all necessary tools.
+import array
+import json
+import os
+import time
+
+from controls import BITS, InputSnapshot
+
+INPUT_TYPECODE = "I"  # One action bit mask (see controls.BITS) per frame.
+
+
+class SessionRecorder(object):
+    """Logs every game played as a replayable session.
+
+    A game is deterministic given its seed and what its controls answered
+    frame by frame, so that is all a session holds: NAME.inputs with one
+    action mask per frame and NAME.json with the seed and, once the game is
+    over, how it ended (for replays to check against). Replaying sessions
+    into datasets is up to the dataset module.
+
+    Masks are sampled after every simulated frame, before anything else
+    reacts to it -- the autopilot picks its next keys in a tick listener too.
+    """
+
+    FLUSH_EVERY = 600  # Frames kept in memory between file writes.
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.loop = None
+
+        self.game = None
+        self.controls = None
+        self.meta = None
+        self.inputs = None
+        self.masks = array.array(INPUT_TYPECODE)
+        self.frames = 0
+        self.ending = False
+
+        # Statistics.
+        self.sessions = 0
+        self.logged = 0
+
+    @property
+    def enabled(self):
+        return self.loop is not None
+
+    def attach(self, loop):
+        """Sample controls after every simulated frame of given GameLoop."""
+        self.loop = loop
+        loop.tick_listeners.insert(0, self.on_tick)
+
+    def begin(self, game, controls, invulnerable=False):
+        """A new game starts -- the previous one (if unfinished) is closed as it stands."""
+        if self.game is not None:
+            self._close()
+
+        name = f"session-{time.strftime('%Y%m%d-%H%M%S')}-{game.seed}"
+        self.meta = {
+            "name": name,
+            "seed": game.seed,
+            "invulnerable": invulnerable,
+            "started_at": time.time(),
+        }
+        self.inputs = open(os.path.join(self.directory, f"{name}.inputs"), "wb")
+        self.game = game
+        self.controls = controls
+        self.frames = 0
+        self.ending = False
+        self.sessions += 1
+        self._write_meta()
+
+    def end(self, game):
+        """Game over -- closed once the frame it happened in has been logged."""
+        if game is self.game:
+            self.ending = True
+
+    def mask(self):
+        controls = self.controls
+        if isinstance(controls, InputSnapshot):
+            return controls.mask
+        mask = 0
+        for key, bit in BITS.items():
+            if controls.is_pressed(key):
+                mask |= bit
+        return mask
+
+    # Called after every simulated frame.
+    def on_tick(self):
+        if self.game is None:
+            return
+        self.masks.append(self.mask())
+        self.frames += 1
+        self.logged += 1
+        if len(self.masks) >= SessionRecorder.FLUSH_EVERY:
+            self._flush()
+        if self.ending:
+            self._close()
+
+    def _flush(self):
+        self.masks.tofile(self.inputs)
+        del self.masks[:]
+
+    def _write_meta(self):
+        with open(os.path.join(self.directory, f"{self.meta['name']}.json"), "w") as meta:
+            json.dump(self.meta, meta, indent=2)
+
+    def _close(self):
+        self._flush()
+        self.inputs.close()
+        self.meta.update(
+            frames=self.frames,
+            over=self.game.over,
+            score=self.game.score.value,
+            depth=self.game.depth
+        )
+        self._write_meta()
+        self.game = None
+        self.controls = None
+
+    def close(self):
+        if self.game is not None:
+            self._close()
+
+    def stats(self):
+        return {"sessions": self.sessions, "frames": self.logged}
+
+
+def list_sessions(directory):
+    """Metadata of every session in the directory, oldest first."""
+    sessions = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".json"):
+            with open(os.path.join(directory, name)) as meta:
+                session = json.load(meta)
+            # Only closed sessions know how many frames they have.
+            if "frames" in session:
+                session["inputs"] = os.path.join(directory, f"{session['name']}.inputs")
+                sessions.append(session)
+    return sessions
+
+
+def load_inputs(session):
+    masks = array.array(INPUT_TYPECODE)
+    with open(session["inputs"], "rb") as inputs:
+        masks.fromfile(inputs, session["frames"])
+    return masks
+
+
+class ReplayControls(object):
+    """Answers is_pressed() from a session's logged masks, frame after frame."""
+
+    def __init__(self, masks):
+        self.masks = masks
+        self.frame = 0
+
+    @property
+    def mask(self):
+        return self.masks[self.frame] if self.frame < len(self.masks) else 0
+
+    def is_pressed(self, key):
+        bit = BITS.get(key)
+        return bit is not None and bool(self.mask & bit)
+
+    def next_frame(self):
+        self.frame += 1
@@ -0,0 +1,305 @@
+"""Sharded multi-process debris physics for stress research.
+
+The playfield is split into vertical strips, one per worker process. Rock
+state lives in a single multiprocessing.shared_memory block; every worker
+advances and wraps the rocks of its own strip, then -- past a barrier --
+adopts the rocks other workers handed off because they crossed into its
+strip. The main process only starts batches of ticks and waits for them.
+
+    python shardphysics.py --rocks 100000 --workers 1,2,4,8 --ticks 200
+
+reports ticks per second and scaling efficiency for every worker count
+(1 worker is always measured first -- it is the baseline).
+
+This is a research backend on its own, not a switch of the game: the
+game's rocks are superwires sprites, moved and drawn one by one on the
+main thread, and a belt of this size couldn't be drawn anyway. The
+strips, shared state and handoffs are what a game backend would build on.
+"""
+
+# Include all necessary tools.
+import argparse
+import logging
+import multiprocessing
+import random
+import sys
+import time
+from multiprocessing import shared_memory
+
+log = logging.getLogger("asteroblast.shardphysics")
+
+FIELDS = 4  # x, y, dx, dy
+
+
+class ShardLayout(object):
+    """Views of the shared block.
+
+    Every shard owns a segment of `capacity` rocks (any shard can hold the
+    whole belt, so a handoff never overflows) plus an outbox segment of the
+    same size. Per shard counters sit in a small integer area at the end.
+    """
+
+    def __init__(self, buf, shards, capacity):
+        self.shards = shards
+        self.capacity = capacity
+
+        size = shards*capacity
+        floats = buf[:2*FIELDS*size*8].cast("d")
+        self.x, self.y, self.dx, self.dy, self.out_x, self.out_y, self.out_dx, self.out_dy = (
+            floats[field*size:(field + 1)*size] for field in range(2*FIELDS)
+        )
+        counters = buf[2*FIELDS*size*8:].cast("q")
+        self.counts = counters[:shards]
+        self.out_counts = counters[shards:2*shards]
+
+        self._views = [floats, counters]
+
+    @staticmethod
+    def nbytes(shards, capacity):
+        return 2*FIELDS*shards*capacity*8 + 2*shards*8
+
+    def release(self):
+        """Let go of the views so the block can be closed."""
+        for view in (self.x, self.y, self.dx, self.dy, self.out_x, self.out_y, self.out_dx, self.out_dy,
+                     self.counts, self.out_counts, *self._views):
+            view.release()
+
+
+def shard_of(x, width, shards):
+    return min(int(x*shards/width), shards - 1)
+
+
+def advance_shard(layout, shard, width, height):
+    """Move the rocks of given shard by one tick, hand off those leaving its strip."""
+    x, y, dx, dy = layout.x, layout.y, layout.dx, layout.dy
+    out_x, out_y, out_dx, out_dy = layout.out_x, layout.out_y, layout.out_dx, layout.out_dy
+    shards = layout.shards
+    base = shard*layout.capacity
+    low = width*shard/shards
+    high = width*(shard + 1)/shards
+
+    end = base + layout.counts[shard]
+    out = base
+    i = base
+    while i < end:
+        new_x = (x[i] + dx[i]) % width
+        new_y = (y[i] + dy[i]) % height
+        if low <= new_x < high:
+            x[i] = new_x
+            y[i] = new_y
+            i += 1
+            continue
+
+        # Crossed into another strip -- into the outbox, swap-remove from the segment.
+        out_x[out] = new_x
+        out_y[out] = new_y
+        out_dx[out] = dx[i]
+        out_dy[out] = dy[i]
+        out += 1
+
+        end -= 1
+        x[i] = x[end]
+        y[i] = y[end]
+        dx[i] = dx[end]
+        dy[i] = dy[end]
+
+    layout.counts[shard] = end - base
+    layout.out_counts[shard] = out - base
+
+
+def adopt_shard(layout, shard, width):
+    """Take over the rocks other shards handed off into this one's strip."""
+    x, y, dx, dy = layout.x, layout.y, layout.dx, layout.dy
+    out_x, out_y, out_dx, out_dy = layout.out_x, layout.out_y, layout.out_dx, layout.out_dy
+    shards = layout.shards
+    capacity = layout.capacity
+
+    end = shard*capacity + layout.counts[shard]
+    for other in range(shards):
+        if other == shard:
+            continue
+        start = other*capacity
+        for o in range(start, start + layout.out_counts[other]):
+            if shard_of(out_x[o], width, shards) == shard:
+                x[end] = out_x[o]
+                y[end] = out_y[o]
+                dx[end] = out_dx[o]
+                dy[end] = out_dy[o]
+                end += 1
+
+    layout.counts[shard] = end - shard*capacity
+
+
+def _run_shard(name, shard, shards, capacity, width, height, barrier, commands, done):
+    """Worker process -- advances one shard in lockstep with the others."""
+    block = shared_memory.SharedMemory(name=name)
+    layout = ShardLayout(block.buf, shards, capacity)
+
+    while True:
+        ticks = commands.get()
+        if ticks is None:
+            break
+
+        for _ in range(ticks):
+            advance_shard(layout, shard, width, height)
+            # Every outbox is complete...
+            barrier.wait()
+            adopt_shard(layout, shard, width)
+            # ... and nobody reads them anymore.
+            barrier.wait()
+
+        done.put(shard)
+
+    layout.release()
+    block.close()
+
+
+class ShardedBelt(object):
+    """Debris field advanced by a pool of worker processes, one per strip."""
+
+    def __init__(self, rocks, workers, width=800, height=600):
+        self.width = width
+        self.height = height
+        self.shards = max(1, workers)
+        self.capacity = max(1, rocks)
+
+        self.block = shared_memory.SharedMemory(
+            create=True,
+            size=ShardLayout.nbytes(self.shards, self.capacity)
+        )
+        self.layout = ShardLayout(self.block.buf, self.shards, self.capacity)
+
+        context = multiprocessing.get_context("fork")
+        self.barrier = context.Barrier(self.shards)
+        self.done = context.Queue()
+        self.commands = []
+        self.workers = []
+        for shard in range(self.shards):
+            commands = context.Queue()
+            worker = context.Process(
+                target=_run_shard,
+                args=(self.block.name, shard, self.shards, self.capacity, width, height,
+                      self.barrier, commands, self.done),
+                name=f"shard-{shard}",
+                daemon=True
+            )
+            worker.start()
+            self.commands.append(commands)
+            self.workers.append(worker)
+
+        self.ticks = 0
+
+    def scatter(self, count, speed=2.0, seed=None):
+        """Fill the belt with randomly placed and moving rocks (workers must be idle)."""
+        rand = random.Random(seed)
+        layout = self.layout
+        for shard in range(self.shards):
+            layout.counts[shard] = 0
+            layout.out_counts[shard] = 0
+
+        for _ in range(min(count, self.capacity)):
+            x = rand.uniform(0, self.width)
+            shard = shard_of(x, self.width, self.shards)
+            i = shard*self.capacity + layout.counts[shard]
+            layout.x[i] = x
+            layout.y[i] = rand.uniform(0, self.height)
+            layout.dx[i] = rand.uniform(-speed, speed)
+            layout.dy[i] = rand.uniform(-speed, speed)
+            layout.counts[shard] += 1
+
+    def step(self, ticks=1):
+        """Advance the whole belt, block until every shard is done."""
+        for commands in self.commands:
+            commands.put(ticks)
+        for _ in self.workers:
+            self.done.get()
+        self.ticks += ticks
+
+    def __len__(self):
+        return sum(self.layout.counts)
+
+    def positions(self):
+        """Yield (x, y) of every rock -- for drawing or checking (workers must be idle)."""
+        layout = self.layout
+        for shard in range(self.shards):
+            base = shard*self.capacity
+            for i in range(base, base + layout.counts[shard]):
+                yield layout.x[i], layout.y[i]
+
+    def close(self):
+        for commands in self.commands:
+            commands.put(None)
+        for worker in self.workers:
+            worker.join()
+
+        self.layout.release()
+        self.block.close()
+        self.block.unlink()
+
+
+def measure(rocks, workers, ticks, seed):
+    """Return wall seconds ShardedBelt with given number of workers needs for `ticks` ticks."""
+    belt = ShardedBelt(rocks, workers)
+    try:
+        belt.scatter(rocks, seed=seed)
+        # Warm up -- forks done, pages touched.
+        belt.step(1)
+
+        start = time.perf_counter()
+        belt.step(ticks)
+        elapsed = time.perf_counter() - start
+
+        # Every rock still there, each within the playfield.
+        left = 0
+        for x, y in belt.positions():
+            if not (0 <= x < belt.width and 0 <= y < belt.height):
+                raise RuntimeError(f"Rock off the playfield at ({x}, {y})")
+            left += 1
+        if left != rocks:
+            raise RuntimeError(f"Handoff lost rocks: {left} of {rocks} left")
+    finally:
+        belt.close()
+    return elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="asteroblast sharded physics scaling report")
+    parser.add_argument("--rocks", type=int, default=100000)
+    parser.add_argument("--workers", default=None,
+                        help="comma separated worker counts (default: 1, 2, 4 ... up to the CPU count)")
+    parser.add_argument("--ticks", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(name)s: %(message)s")
+
+    if args.workers:
+        counts = [int(count) for count in args.workers.split(",")]
+    else:
+        cpus = multiprocessing.cpu_count()
+        counts = [1]
+        while counts[-1]*2 <= cpus:
+            counts.append(counts[-1]*2)
+        if counts[-1] != cpus:
+            counts.append(cpus)
+
+    # Speedups are relative to a real single worker run.
+    counts = [1] + [count for count in counts if count != 1]
+
+    log.info("%d rocks, %d ticks, %d CPUs", args.rocks, args.ticks, multiprocessing.cpu_count())
+    baseline = None
+    for workers in counts:
+        elapsed = measure(args.rocks, workers, args.ticks, args.seed)
+        if baseline is None:
+            baseline = elapsed
+        speedup = baseline/elapsed
+        log.info(
+            "%2d workers: %7.1f ticks/s, %6.2f ms/tick, speedup %.2fx, efficiency %3.0f%%",
+            workers, args.ticks/elapsed, 1000*elapsed/args.ticks, speedup, 100*speedup/workers
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+# Include all necessary tools.
+import collections
+import threading
+import time
+
+from render import SPRITE_DRAW
+
+# What a simulated frame looks like: its number and (surface, position)
+# pairs in z-order, ready for Surface.blits(). Surfaces stand for the
+# image and angle of a sprite -- rotated images are shared and never
+# drawn onto, so holding on to them is safe.
+FrameSnapshot = collections.namedtuple("FrameSnapshot", "frame blits")
+
+
+def take_snapshot(screen, frame):
+    """Freeze what the screen's sprites would draw right now."""
+    blits = []
+    for sprite in screen.all_objects:
+        if type(sprite)._draw is SPRITE_DRAW:
+            blits.append((sprite._rot_image, sprite._rect.topleft))
+        else:
+            # Sprites with their own drawing code (the particle system) list their blits.
+            blits.extend(sprite.blits())
+    return FrameSnapshot(frame, tuple(blits))
+
+
+class SimulationThread(object):
+    """Runs GameLoop.simulate() on a worker thread, the main thread only renders.
+
+    The worker simulates, paced by the loop's pacer, and publishes a
+    snapshot of every frame into the back one of two slots, then flips them.
+    The main thread handles window events, draws the front snapshot and
+    presents it, so display waits and blits overlap with simulation and
+    the window keeps responding while a frame takes long to simulate.
+    Frame listeners run on the main thread, tick listeners on the worker;
+    GameLoop.frame_elapsed() covers the simulation of the presented frames.
+
+    superwires quits the display from screen.quit(), which sprites call
+    whenever they like. While running, the worker's calls are handed over
+    to the main thread.
+    """
+
+    POLL = 0.05  # Longest wait for a snapshot before checking the window again.
+
+    def __init__(self, loop):
+        self.loop = loop
+
+        # Double buffer -- the worker fills the back slot, the renderer reads the front one.
+        self.slots = [None, None]
+        self.front = 0
+        self.published = threading.Condition()
+        self.shown = None
+
+        self.running = False
+        self.quit_requested = False
+        self.error = None
+        self.thread = None
+
+        # Statistics.
+        self.simulated = 0
+        self.presented = 0
+        self.skipped = 0
+        self.sim_time = 0.0
+        self.render_time = 0.0
+        # Longest simulated frame since the last presented one and when it started.
+        self.slowest = (0.0, 0.0)
+
+    # Worker side.
+    def _simulate(self):
+        loop = self.loop
+        try:
+            while self.running:
+                loop.sim_started = start = time.perf_counter()
+                if not loop.simulate():
+                    break
+                elapsed = time.perf_counter() - start
+                if elapsed > self.slowest[0]:
+                    self.slowest = (elapsed, start)
+                self.publish(take_snapshot(loop.screen, loop.frame))
+                loop.frame += 1
+                self.simulated += 1
+                self.sim_time += elapsed
+
+                loop.pacer.wait()
+        except BaseException as error:
+            self.error = error
+        finally:
+            self.running = False
+            with self.published:
+                self.published.notify()
+
+    def publish(self, snapshot):
+        back = 1 - self.front
+        self.slots[back] = snapshot
+        with self.published:
+            self.front = back
+            self.published.notify()
+
+    def request_quit(self):
+        self.quit_requested = True
+        self.running = False
+
+    # Main thread side.
+    def latest(self, timeout):
+        """Snapshot to draw next -- None if there is no new one in time."""
+        with self.published:
+            if self.slots[self.front] is self.shown and self.running:
+                self.published.wait(timeout)
+            snapshot = self.slots[self.front]
+
+        if snapshot is None or snapshot is self.shown:
+            return None
+        if self.shown is not None:
+            self.skipped += snapshot.frame - self.shown.frame - 1
+        self.shown = snapshot
+        return snapshot
+
+    def run(self, max_frames=None):
+        """Keep the screen running until quit (or given number of presented frames)."""
+        loop = self.loop
+        screen = loop.screen
+        screen.running = True
+
+        # Quits from the worker wait for the main thread (see above).
+        screen.quit = self.request_quit
+
+        self.running = True
+        self.thread = threading.Thread(target=self._simulate, name="simulation", daemon=True)
+        self.thread.start()
+        try:
+            while self.running:
+                if not loop.pump_events():
+                    break
+
+                snapshot = self.latest(SimulationThread.POLL)
+                if snapshot is None:
+                    continue
+
+                loop.frame_started = start = time.perf_counter()
+                # Frame budget consumers see the simulation cost of what's shown too.
+                (loop.sim_time, loop.slow_sim_started), self.slowest = self.slowest, (0.0, 0.0)
+                loop.clear()
+                screen.buffer.blits(snapshot.blits, doreturn=False)
+                loop.present(snapshot.frame)
+                self.presented += 1
+                self.render_time += time.perf_counter() - start
+
+                # Listeners may remove themselves (note_first_frame does).
+                for listener in list(loop.frame_listeners):
+                    listener(screen.buffer)
+
+                if max_frames is not None and self.presented >= max_frames:
+                    break
+        finally:
+            self.running = False
+            self.thread.join()
+            del screen.quit
+            if self.quit_requested and screen.running:
+                screen.quit()
+
+        if self.error is not None:
+            raise self.error
+
+    def stats(self):
+        return {
+            "simulated": self.simulated,
+            "presented": self.presented,
+            "skipped": self.skipped,
+            "sim_ms": 1000*self.sim_time/max(self.simulated, 1),
+            "render_ms": 1000*self.render_time/max(self.presented, 1),
+        }
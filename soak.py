@@ -0,0 +1,295 @@
+"""Long-session soak test for asteroblast.
+
+Runs the game headless and as fast as possible with a scripted pilot, restarting
+after every crash (and every --restart-every frames), and samples memory
+use along the way: process RSS, live objects per class of the game's
+modules, traced Python allocations, sprites on games.screen and the size of
+bounded caches. Any series that keeps growing is flagged and the program
+exits with status 1. Memory is only checked once the rotation cache has
+(nearly) stopped filling up -- until then it is expected to grow with it.
+
+    python soak.py --hours 8 --csv soak.csv
+"""
+
+# Include all necessary tools.
+import argparse
+import collections
+import csv
+import gc
+import logging
+import os
+import random
+import resource
+import sys
+import time
+import tracemalloc
+
+# No window, no sound card -- this is a batch job.
+os.environ.setdefault("ASTEROBLAST_HEADLESS", "1")
+
+# https://pythonhosted.org/SuperWires/index.html
+from superwires import games
+
+import asteroblast
+from render import SharedRotation
+
+log = logging.getLogger("asteroblast.soak")
+
+FPS = 60  # Simulated frames per second of game time.
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Series that grow along with the caches (and are checked once those are full).
+MEMORY = ("rss_kb", "traced_kb")
+
+# Keys the scripted pilot plays with.
+PILOT_KEYS = [
+    games.K_LEFT,
+    games.K_RIGHT,
+    games.K_UP,
+    games.K_DOWN,
+    games.K_t,
+    games.K_r,
+    games.K_SPACE,
+    games.K_v,
+]
+
+
+class ScriptedControls(object):
+    """Random but sticky key presses, always ready to play again."""
+
+    def __init__(self, seed=None):
+        self.random = random.Random(seed)
+        self.held = set()
+
+    def is_pressed(self, key):
+        return key == games.K_a or key in self.held
+
+    def shuffle(self):
+        if self.random.random() < 0.05:
+            self.held = {key for key in PILOT_KEYS if self.random.random() < 0.3}
+
+
+def rss_bytes():
+    """Current resident set size of this process -- None if not on Linux."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1])*resource.getpagesize()
+    except OSError:
+        return None
+
+
+def peak_rss_bytes():
+    """Peak resident set size -- it never goes down, so no use for growth checks."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere.
+    return peak if sys.platform == "darwin" else peak*1024
+
+
+def package_modules():
+    """Names of the loaded modules of the game (and of superwires.games)."""
+    modules = {"superwires.games"}
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, "__file__", None)
+        if path and os.path.dirname(os.path.abspath(path)) == HERE:
+            modules.add(name)
+    return modules
+
+
+def live_objects(modules):
+    """Count live instances of every class defined in given modules."""
+    counts = collections.Counter()
+    for obj in gc.get_objects():
+        cls = type(obj)
+        if cls.__module__ in modules:
+            counts[cls.__name__] += 1
+    return counts
+
+
+def flag_growth(series, warmup, tolerance):
+    """Tell if the samples keep on growing after warmup.
+
+    A series is flagged when nearly every step is non-decreasing, it goes up
+    in a good share of them (a single jump is just a change of game state)
+    and its last third sits clearly above its first third.
+    """
+    samples = series[warmup:]
+    if len(samples) < 6:
+        return False
+
+    steps = [b - a for a, b in zip(samples, samples[1:])]
+    not_falling = sum(1 for step in steps if step >= 0)/len(steps)
+    rising = sum(1 for step in steps if step > 0)/len(steps)
+
+    third = len(samples)//3
+    head = sorted(samples[:third])[third//2]
+    tail = sorted(samples[-third:])[third//2]
+
+    return not_falling >= 0.9 and rising >= 0.3 and tail > head*(1 + tolerance)
+
+
+def filled_at(series, tolerance):
+    """First sample from which a cache grows by no more than tolerance to the end."""
+    last = series[-1]
+    for index, value in enumerate(series):
+        if last <= value*(1 + tolerance):
+            return index
+    return len(series)
+
+
+class SoakTest(object):
+    """Headless game session with periodic memory samples."""
+
+    def __init__(self, seed, restart_every, trace):
+        random.seed(seed)
+        self.controls = ScriptedControls(seed)
+        self.restart_every = restart_every
+        self.trace = trace
+
+        self.frames = 0
+        self.restarts = 0
+        self.samples = []
+
+        if trace:
+            tracemalloc.start()
+
+        # Shuffle the pilot's keys before every frame.
+        asteroblast.LOOP.frame_listeners.append(self.on_frame)
+
+        # Same garbage collection regime as in the real game.
+        asteroblast.SCHEDULER.attach(asteroblast.LOOP)
+
+        self.game = asteroblast.Gameplay(controls=self.controls)
+        self.game.play()
+
+    def on_frame(self, buffer):
+        self.frames += 1
+        self.controls.shuffle()
+
+        # Crash the ship on purpose every now and then -- we are here for restarts.
+        ship = self.game.spacecraft
+        if self.restart_every and self.frames % self.restart_every == 0 and ship.screen:
+            ship.die()
+
+        # A new game started from the ending screen.
+        for sprite in games.screen.all_objects:
+            if isinstance(sprite, asteroblast.Spacecraft) and sprite.game is not self.game:
+                self.game = sprite.game
+                self.restarts += 1
+                break
+
+    def sample(self):
+        # The frame scheduler sees this collection too -- it runs between
+        # frames and is ours, don't let it be blamed on the next frame.
+        scheduler = asteroblast.SCHEDULER
+        gc_time = scheduler.gc_time
+        gc.collect()
+        scheduler.frame_collections = []
+        scheduler.gc_time = gc_time
+
+        row = collections.OrderedDict()
+        row["frame"] = self.frames
+        row["game_minutes"] = self.frames/FPS/60
+        row["restarts"] = self.restarts
+        rss = rss_bytes()
+        if rss is not None:
+            row["rss_kb"] = rss//1024
+        else:
+            row["peak_rss_kb"] = peak_rss_bytes()//1024
+        row["cache:rotations"] = len(SharedRotation._rotations)
+        row["gc_objects"] = len(gc.get_objects())
+        row["sprites"] = len(games.screen.all_objects)
+        row["belt"] = len(self.game.belt)
+        row["particles"] = len(asteroblast.PARTICLES)
+        if self.trace:
+            row["traced_kb"] = tracemalloc.get_traced_memory()[0]//1024
+        for name, count in sorted(live_objects(package_modules()).items()):
+            row[f"live:{name}"] = count
+
+        self.samples.append(row)
+        return row
+
+    def run(self, frames, sample_every):
+        self.sample()
+        while self.frames < frames:
+            asteroblast.LOOP.run(max_frames=sample_every, throttle=False)
+            row = self.sample()
+            log.info(
+                "%.1f min of play, %d restarts, rss %d kB%s, %d rotations cached, %d sprites, %d gc objects",
+                row["game_minutes"],
+                row["restarts"],
+                row.get("rss_kb", row.get("peak_rss_kb")),
+                "" if "rss_kb" in row else " (peak)",
+                row["cache:rotations"],
+                row["sprites"],
+                row["gc_objects"]
+            )
+
+    def series(self):
+        names = []
+        for row in self.samples:
+            for name in row:
+                if name not in names and name not in ("frame", "game_minutes", "restarts"):
+                    names.append(name)
+        return {name: [row.get(name, 0) for row in self.samples] for name in names}
+
+    def write_csv(self, filename):
+        names = ["frame", "game_minutes", "restarts"] + list(self.series())
+        with open(filename, "w", newline="") as out:
+            writer = csv.DictWriter(out, fieldnames=names, restval=0)
+            writer.writeheader()
+            writer.writerows(self.samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="asteroblast long-session soak test")
+    parser.add_argument("--hours", type=float, default=1.0, help="simulated hours of play")
+    parser.add_argument("--sample-every", type=int, default=FPS*60, help="frames between memory samples")
+    parser.add_argument("--restart-every", type=int, default=FPS*90,
+                        help="force a crash and restart after that many frames (0 = only real crashes)")
+    parser.add_argument("--warmup", type=int, default=3,
+                        help="samples ignored by the growth check (memory: at least until the rotation cache is filled)")
+    parser.add_argument("--tolerance", type=float, default=0.05, help="allowed relative growth")
+    parser.add_argument("--tracemalloc", action="store_true", help="also sample traced Python allocations (slow)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", help="write all samples into given file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(name)s: %(message)s")
+
+    soak = SoakTest(seed=args.seed, restart_every=args.restart_every, trace=args.tracemalloc)
+    started = time.perf_counter()
+    soak.run(frames=int(args.hours*3600*FPS), sample_every=args.sample_every)
+    log.info("%d frames in %.0f s of wall time", soak.frames, time.perf_counter() - started)
+
+    if args.csv:
+        soak.write_csv(args.csv)
+
+    series = soak.series()
+    # Memory grows with the rotation cache until it's filled, the cache itself is bounded.
+    filled = max(args.warmup, filled_at(series["cache:rotations"], args.tolerance))
+    if any(name in series for name in MEMORY):
+        if len(soak.samples) - filled < 6:
+            log.warning("rotation cache still filling up at sample %d of %d -- run longer to check memory",
+                        filled, len(soak.samples))
+        else:
+            log.info("memory checked from sample %d of %d on (rotation cache filled)", filled, len(soak.samples))
+
+    growing = []
+    for name, values in series.items():
+        # Peak RSS only ever rises.
+        if name.startswith("cache:") or name == "peak_rss_kb":
+            continue
+        warmup = filled if name in MEMORY else args.warmup
+        if flag_growth(values, warmup, args.tolerance):
+            growing.append((name, warmup))
+    for name, warmup in growing:
+        values = series[name]
+        log.warning("monotonic growth: %s %s -> %s", name, values[warmup], values[-1])
+    if not growing:
+        log.info("nothing keeps growing over %d samples", len(soak.samples))
+
+    return 1 if growing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+# Include all necessary tools.
+import math
+
+
+def wrapped_delta(origin, target, span):
+    """Shortest signed distance from origin to target on a wrapping axis."""
+    delta = target - origin
+    if delta > span/2:
+        delta -= span
+    elif delta < -span/2:
+        delta += span
+    return delta
+
+
+class SpatialGrid(object):
+    """Uniform grid over the wrapping playfield.
+
+    Items are anything with x and y (debris sprites); they are re-bucketed
+    by move() as they fly, which costs nothing unless they cross a cell
+    border. Queries look at nearby cells only and measure distances
+    across the screen edges, the way ScreenWrapper moves things.
+    """
+
+    CELL = 64  # Preferred cell size; should be at least the radius of the biggest item.
+
+    def __init__(self, width, height, cell=None):
+        cell = cell or SpatialGrid.CELL
+        self.width = width
+        self.height = height
+
+        # Whole number of cells per axis, so wrapping stays exact.
+        self.cols = max(1, round(width/cell))
+        self.rows = max(1, round(height/cell))
+        self.cell_w = width/self.cols
+        self.cell_h = height/self.rows
+
+        self.cells = {}
+        self.where = {}
+
+        # Counters for the curious.
+        self.queries = 0
+        self.checked = 0
+
+    def __len__(self):
+        return len(self.where)
+
+    def __contains__(self, item):
+        return item in self.where
+
+    def _key(self, x, y):
+        col = int(x % self.width // self.cell_w) % self.cols
+        row = int(y % self.height // self.cell_h) % self.rows
+        return row*self.cols + col
+
+    def insert(self, item):
+        key = self._key(item.x, item.y)
+        self.where[item] = key
+        self.cells.setdefault(key, []).append(item)
+
+    def remove(self, item):
+        key = self.where.pop(item, None)
+        if key is None:
+            return
+        cell = self.cells[key]
+        cell.remove(item)
+        if not cell:
+            del self.cells[key]
+
+    def move(self, item):
+        """Re-bucket an item after it has moved."""
+        key = self._key(item.x, item.y)
+        old = self.where.get(item)
+        if key == old:
+            return
+        if old is not None:
+            self.remove(item)
+        self.where[item] = key
+        self.cells.setdefault(key, []).append(item)
+
+    def clear(self):
+        self.cells.clear()
+        self.where.clear()
+
+    # Items of cells within `span` cells of the one holding (x, y).
+    def _around(self, x, y, span_cols, span_rows):
+        col = int(x % self.width // self.cell_w) % self.cols
+        row = int(y % self.height // self.cell_h) % self.rows
+        cols = {(col + i) % self.cols for i in range(-span_cols, span_cols + 1)}
+        rows = {(row + j) % self.rows for j in range(-span_rows, span_rows + 1)}
+
+        cells = self.cells
+        for r in rows:
+            for c in cols:
+                items = cells.get(r*self.cols + c)
+                if items:
+                    yield from items
+
+    def delta(self, x, y, item):
+        """Wrap-aware vector from (x, y) to the item."""
+        return wrapped_delta(x, item.x, self.width), wrapped_delta(y, item.y, self.height)
+
+    def in_radius(self, x, y, radius):
+        """Return [(distance, item)] of items centered within radius, closest first."""
+        self.queries += 1
+        found = []
+        span_cols = math.ceil(radius/self.cell_w)
+        span_rows = math.ceil(radius/self.cell_h)
+        for item in self._around(x, y, span_cols, span_rows):
+            self.checked += 1
+            dx, dy = self.delta(x, y, item)
+            distance = math.hypot(dx, dy)
+            if distance <= radius:
+                found.append((distance, item))
+        found.sort(key=lambda pair: pair[0])
+        return found
+
+    def nearest(self, x, y, max_distance=None):
+        """Return (distance, item) of the closest item, or None.
+
+        Looks at rings of cells around the point, growing them until
+        nothing closer than the best candidate can be left outside.
+        """
+        self.queries += 1
+        col = int(x % self.width // self.cell_w) % self.cols
+        row = int(y % self.height // self.cell_h) % self.rows
+        cell = min(self.cell_w, self.cell_h)
+        reach = max(self.cols, self.rows)//2 + 1
+
+        best = None
+        visited = set()
+        for ring in range(reach + 1):
+            if best is not None and best[0] <= ring*cell - cell:
+                break
+            if max_distance is not None and max_distance < ring*cell - cell:
+                break
+
+            for j in range(-ring, ring + 1):
+                for i in range(-ring, ring + 1):
+                    if max(abs(i), abs(j)) != ring:
+                        continue
+                    key = ((row + j) % self.rows)*self.cols + (col + i) % self.cols
+                    if key in visited:
+                        continue
+                    visited.add(key)
+
+                    for item in self.cells.get(key, ()):
+                        self.checked += 1
+                        dx, dy = self.delta(x, y, item)
+                        distance = math.hypot(dx, dy)
+                        if best is None or distance < best[0]:
+                            best = (distance, item)
+
+        if best is not None and max_distance is not None and best[0] > max_distance:
+            return None
+        return best
+
+    def ray_cast(self, x, y, direction, length, radius_of=None):
+        """Return (distance along the ray, item) of the first item the ray hits, or None.
+
+        The ray starts at (x, y), follows the unit vector `direction` and
+        wraps around the screen edges. Items are circles of radius_of(item)
+        (half the item's width by default).
+        """
+        self.queries += 1
+        if radius_of is None:
+            radius_of = SpatialGrid.half_width
+
+        ux, uy = direction
+        step = min(self.cell_w, self.cell_h)
+        samples = int(length//step) + 1
+
+        best = None
+        seen = set()
+        for sample in range(samples + 1):
+            travelled = min(sample*step, length)
+            if best is not None and travelled - step > best[0]:
+                break
+
+            sx = x + ux*travelled
+            sy = y + uy*travelled
+            for item in self._around(sx, sy, 1, 1):
+                if item in seen:
+                    continue
+                seen.add(item)
+                self.checked += 1
+
+                # Closest approach of the ray to the item's center, measured from the sample point.
+                dx, dy = self.delta(sx, sy, item)
+                along = dx*ux + dy*uy
+                across = abs(dx*uy - dy*ux)
+                radius = radius_of(item)
+                if across > radius:
+                    continue
+
+                # Where the ray enters and leaves the item's circle.
+                chord = math.sqrt(radius*radius - across*across)
+                if travelled + along + chord < 0:
+                    continue
+                hit = max(travelled + along - chord, 0.0)
+                if hit <= length and (best is None or hit < best[0]):
+                    best = (hit, item)
+
+        return best
+
+    @staticmethod
+    def half_width(item):
+        return item.width/2
+
+    def stats(self):
+        return {
+            "items": len(self.where),
+            "cells": len(self.cells),
+            "queries": self.queries,
+            "checked_per_query": self.checked/max(self.queries, 1),
+        }
@@ -0,0 +1,330 @@
+"""Balance parameter sweeps -- seeded autopilot games for every point of a grid.
+
+    python sweep.py --param Debris.VELOCITY=2,3,4 --param Spacecraft.BLASTER_DELAY=20,30 --seeds 8
+    python sweep.py --param tier2.structure=2,3 --param Gameplay.TOUGH_ODDS=5,10 --workers 8
+
+Parameters are class attributes of asteroblast ("Class.NAME") or fields of a
+debris tier ("tierN.field", see Debris.TIERS). Every point of the grid is
+played with each seed on a process pool, headless and unthrottled, until the
+craft is destroyed or --max-frames have been flown. Finished games are
+cached, keyed by parameters, seed, frame limit and a hash of the game's code,
+so a re-run only plays what is missing (and all of it again once the code
+changes). Logs survival, score, depth and frame cost per point.
+"""
+
+# Include all necessary tools.
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+
+log = logging.getLogger("asteroblast.sweep")
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FPS = 60  # Game frames per second of play time.
+
+
+def parse_param(spec):
+    """'NAME=v1,v2,...' -> (name, [values])."""
+    name, sep, values = spec.partition("=")
+    if not sep or not values:
+        raise argparse.ArgumentTypeError(f"expected NAME=value[,value...], got {spec!r}")
+    return name.strip(), [parse_value(value) for value in values.split(",")]
+
+
+def parse_value(text):
+    text = text.strip()
+    for kind in (int, float):
+        try:
+            return kind(text)
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError(f"not a number: {text!r}")
+
+
+def code_version():
+    """Hash of every module of the game -- cached results of other code don't count."""
+    digest = hashlib.sha1()
+    for name in sorted(os.listdir(HERE)):
+        if name.endswith(".py"):
+            digest.update(name.encode())
+            with open(os.path.join(HERE, name), "rb") as source:
+                digest.update(source.read())
+    return digest.hexdigest()[:16]
+
+
+def cache_key(params, seed, max_frames, code):
+    key = json.dumps([sorted(params.items()), seed, max_frames, code])
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+class ResultCache(object):
+    """Finished games, one JSON line each -- appended as they come in,
+    so an interrupted sweep keeps what it has played."""
+
+    def __init__(self, path):
+        self.path = path
+        self.results = {}
+        # Bytes of complete lines.
+        kept = 0
+        if os.path.exists(path):
+            with open(path, "rb") as lines:
+                for line in lines:
+                    # A sweep killed in the middle of put() leaves its last line torn.
+                    if not line.endswith(b"\n"):
+                        log.warning("%s: dropping a torn last entry", path)
+                        break
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.results[entry["key"]] = entry["result"]
+                    kept += len(line)
+        self.file = open(path, "a")
+        # Appended after a torn line, the next entry would be lost with it.
+        self.file.truncate(kept)
+
+    def __contains__(self, key):
+        return key in self.results
+
+    def get(self, key):
+        return self.results[key]
+
+    def put(self, key, params, seed, code, result):
+        self.results[key] = result
+        self.file.write(json.dumps({"key": key, "params": params, "seed": seed, "code": code, "result": result}) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+# Worker process side -- the game is imported once per worker.
+asteroblast = None
+ORIGINALS = {}
+INIT_ERROR = None
+
+
+def init_worker():
+    global asteroblast, INIT_ERROR
+    try:
+        # The game loads its assets relative to its own directory.
+        os.chdir(HERE)
+        os.environ["ASTEROBLAST_HEADLESS"] = "1"
+        logging.getLogger("asteroblast").setLevel(logging.WARNING)
+        import asteroblast
+        asteroblast.ASSETS.start()
+        asteroblast.ASSETS.wait()
+        # Idle loader threads would keep the worker from exiting.
+        asteroblast.ASSETS.shutdown()
+    except Exception as error:
+        # Raised from here, the pool would replace the worker with another
+        # one failing the same way, forever -- jobs fail instead.
+        INIT_ERROR = error
+
+
+def check_worker():
+    if INIT_ERROR is not None:
+        raise RuntimeError(f"worker failed to start: {INIT_ERROR!r}")
+
+
+def _tier(name):
+    """'tierN.field' -> (tier number, field), None for class attributes."""
+    head, _, field = name.partition(".")
+    if head.startswith("tier") and head[4:].isdigit():
+        tier = int(head[4:])
+        if tier not in asteroblast.Debris.TIERS or field not in asteroblast.DebrisTier._fields:
+            raise ValueError(f"unknown debris tier parameter {name!r}")
+        return tier, field
+    return None
+
+
+def _owner(name):
+    owner_name, _, attribute = name.partition(".")
+    owner = getattr(asteroblast, owner_name, None)
+    if owner is None or not hasattr(owner, attribute):
+        raise ValueError(f"unknown parameter {name!r}")
+    return owner, attribute
+
+
+def apply_params(params):
+    """Put every parameter touched so far back to its default, then set the given ones."""
+    for name, value in ORIGINALS.items():
+        _set(name, value)
+    for name, value in params.items():
+        if name not in ORIGINALS:
+            ORIGINALS[name] = _get(name)
+        _set(name, value)
+
+
+def _get(name):
+    tier = _tier(name)
+    if tier:
+        return getattr(asteroblast.Debris.TIERS[tier[0]], tier[1])
+    owner, attribute = _owner(name)
+    return getattr(owner, attribute)
+
+
+def _set(name, value):
+    tier = _tier(name)
+    if tier:
+        tiers = asteroblast.Debris.TIERS
+        tiers[tier[0]] = tiers[tier[0]]._replace(**{tier[1]: value})
+    else:
+        owner, attribute = _owner(name)
+        setattr(owner, attribute, value)
+
+
+def play(job):
+    """Fly one seeded game with the autopilot. Returns (job, result)."""
+    check_worker()
+    params, seed, max_frames = job
+    apply_params(params)
+
+    # Nothing of the previous game may leak into this one.
+    asteroblast.clear_world()
+
+    loop = asteroblast.LOOP
+    pilot = asteroblast.make_autopilot()
+    pilot.attach(loop)
+    try:
+        game = asteroblast.Gameplay(controls=pilot, seed=seed)
+        game.play()
+
+        frames = 0
+        started = time.perf_counter()
+        while frames < max_frames and not game.over:
+            loop.run(max_frames=1, throttle=False)
+            frames += 1
+        elapsed = time.perf_counter() - started
+    finally:
+        loop.tick_listeners.remove(pilot.think)
+        asteroblast.PACER.leave_gameplay()
+
+    return job, {
+        "survived": not game.over,
+        "frames": frames,
+        "score": game.score.value,
+        "depth": game.depth,
+        "frame_ms": 1000*elapsed/max(frames, 1),
+    }
+
+
+# Main process side.
+def summarize(results):
+    """Aggregate per-seed results of one grid point."""
+    scores = [result["score"] for result in results]
+    frame_ms = sorted(result["frame_ms"] for result in results)
+    return {
+        "runs": len(results),
+        "survival": sum(result["survived"] for result in results)/len(results),
+        "time_alive_s": statistics.mean(result["frames"] for result in results)/FPS,
+        "score": statistics.mean(scores),
+        "score_stdev": statistics.stdev(scores) if len(scores) > 1 else 0.0,
+        "depth": statistics.mean(result["depth"] for result in results),
+        "depth_max": max(result["depth"] for result in results),
+        "frame_ms": statistics.mean(frame_ms),
+        "frame_ms_worst": frame_ms[-1],
+    }
+
+
+def sweep(grid, seeds, max_frames, workers, cache):
+    """Play every (point, seed) missing from the cache; return [(point, summary)]."""
+    names = [name for name, _ in grid]
+    points = [dict(zip(names, values)) for values in itertools.product(*(values for _, values in grid))]
+    code = code_version()
+
+    jobs = []
+    for params in points:
+        for seed in seeds:
+            if cache_key(params, seed, max_frames, code) not in cache:
+                jobs.append((params, seed, max_frames))
+    log.info("%d points x %d seeds, %d cached, %d to play on %d workers (code %s)",
+             len(points), len(seeds), len(points)*len(seeds) - len(jobs), len(jobs), workers, code)
+
+    if jobs:
+        context = multiprocessing.get_context("fork")
+        started = time.perf_counter()
+        with context.Pool(workers, initializer=init_worker) as pool:
+            try:
+                for done, (job, result) in enumerate(pool.imap_unordered(play, jobs), 1):
+                    params, seed, _ = job
+                    cache.put(cache_key(params, seed, max_frames, code), params, seed, code, result)
+                    if done % max(1, len(jobs)//10) == 0 or done == len(jobs):
+                        log.info("%d/%d games played (%.0f s)", done, len(jobs), time.perf_counter() - started)
+            finally:
+                # Let the workers finish on their own -- SDL turns SIGTERM into a quit event.
+                pool.close()
+                pool.join()
+
+    return [
+        (params, summarize([cache.get(cache_key(params, seed, max_frames, code)) for seed in seeds]))
+        for params in points
+    ]
+
+
+def report(summaries, sort_by):
+    summaries = sorted(summaries, key=lambda entry: entry[1][sort_by], reverse=True)
+    for params, summary in summaries:
+        point = " ".join(f"{name}={value}" for name, value in params.items()) or "(defaults)"
+        log.info(
+            "%s: survival %3.0f%%, alive %5.1f s, score %6.1f +-%5.1f, depth %4.1f (max %d), %.2f ms/frame (worst run %.2f)",
+            point,
+            100*summary["survival"],
+            summary["time_alive_s"],
+            summary["score"],
+            summary["score_stdev"],
+            summary["depth"],
+            summary["depth_max"],
+            summary["frame_ms"],
+            summary["frame_ms_worst"]
+        )
+    return summaries
+
+
+def write_csv(path, names, summaries):
+    with open(path, "w", newline="") as out:
+        writer = None
+        for params, summary in summaries:
+            row = dict(params, **summary)
+            if writer is None:
+                writer = csv.DictWriter(out, fieldnames=list(names) + list(summary))
+                writer.writeheader()
+            writer.writerow(row)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="asteroblast balance parameter sweep")
+    parser.add_argument("--param", type=parse_param, action="append", default=[], metavar="NAME=V1,V2",
+                        help="parameter and the values to try (repeat for a grid)")
+    parser.add_argument("--seeds", type=int, default=8, help="games per grid point (seeds 0..N-1)")
+    parser.add_argument("--max-frames", type=int, default=60*FPS, help="frame limit of a game (the craft survived)")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(), help="worker processes")
+    parser.add_argument("--cache", default="sweep-cache.jsonl", help="finished games cache file")
+    parser.add_argument("--sort", default="score",
+                        choices=["score", "survival", "time_alive_s", "depth", "frame_ms"],
+                        help="order of the report")
+    parser.add_argument("--csv", metavar="FILE", help="also write the summaries into a CSV file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(name)s: %(message)s")
+
+    cache = ResultCache(args.cache)
+    try:
+        summaries = sweep(args.param, list(range(args.seeds)), args.max_frames, args.workers, cache)
+    finally:
+        cache.close()
+
+    summaries = report(summaries, args.sort)
+    if args.csv:
+        write_csv(args.csv, [name for name, _ in args.param], summaries)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())